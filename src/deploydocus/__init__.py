@@ -1,14 +1,19 @@
-from .appstate import (
-    GitRepo,
-    HelmChart,
-    HelmChartGitRepo,
-    HelmConfigGitRepo,
-    HelmRepoChart,
-    Kustomization,
-    helm_template,
-)
-from .package.pkg import AbstractK8sPkg, InstanceSettings
-from .package.types import SUPPORTED_KINDS
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .appstate import (
+        GitRepo,
+        HelmChart,
+        HelmChartGitRepo,
+        HelmConfigGitRepo,
+        HelmRepoChart,
+        Kustomization,
+        helm_template,
+    )
+    from .package.pkg import AbstractK8sPkg, InstanceSettings
+    from .package.types import SUPPORTED_KINDS
 
 __all__ = [
     "helm_template",
@@ -22,3 +27,20 @@ __all__ = [
     "HelmRepoChart",
     "HelmChart",
 ]
+
+# The exports are imported on first access (see _lazy)
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "helm_template": ".appstate",
+        "AbstractK8sPkg": ".package.pkg",
+        "InstanceSettings": ".package.pkg",
+        "SUPPORTED_KINDS": ".package.types",
+        "GitRepo": ".appstate",
+        "HelmConfigGitRepo": ".appstate",
+        "Kustomization": ".appstate",
+        "HelmChartGitRepo": ".appstate",
+        "HelmRepoChart": ".appstate",
+        "HelmChart": ".appstate",
+    },
+)
@@ -0,0 +1,31 @@
+import importlib
+from typing import Any, Callable, Mapping
+
+
+def lazy_exports(
+    package: str, exports: Mapping[str, str]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """The module `__getattr__` and `__dir__` of a package whose exports are only
+    imported when first accessed, so that importing the package (e.g. to run the
+    CLI) does not import the kubernetes client, pydantic...
+
+    Args:
+        package: The `__name__` of the package
+        exports: The module (relative to the package) of each export
+
+    Returns:
+        The `__getattr__` and `__dir__` functions of the package
+    """
+
+    def __getattr__(name: str) -> Any:
+        if (module := exports.get(name)) is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module, package), name)
+        # Later accesses do not go through __getattr__
+        setattr(importlib.import_module(package), name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted({*vars(importlib.import_module(package)), *exports})
+
+    return __getattr__, __dir__
@@ -1,17 +1,32 @@
-from deploydocus.package.errors import KubeConfigError
-from deploydocus.package.installer import PkgInstaller
+from typing import TYPE_CHECKING
 
-from .helm3 import (
-    HelmChart,
-    HelmChartError,
-    HelmChartGitRepo,
-    HelmConfigGitRepo,
-    HelmPathError,
-    HelmRepoChart,
-    helm_template,
-)
-from .kustomize import Kustomization
-from .sources import GitRepo
+from deploydocus._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from deploydocus.package.errors import KubeConfigError
+    from deploydocus.package.installer import PkgInstaller
+
+    from .cache import RenderCache
+    from .helm3 import (
+        HelmChart,
+        HelmChartError,
+        HelmChartGitRepo,
+        HelmConfigGitRepo,
+        HelmPathError,
+        HelmRepoChart,
+        HelmTemplateError,
+        helm_template,
+        helm_template_iter,
+    )
+    from .kustomize import Kustomization, KustomizeError
+    from .render import (
+        RenderSource,
+        render_all,
+        render_source,
+        source_documents,
+        stream_all,
+    )
+    from .sources import GitRepo
 
 __all__ = [
     "PkgInstaller",
@@ -19,10 +34,45 @@ __all__ = [
     "HelmChart",
     "GitRepo",
     "Kustomization",
+    "KustomizeError",
     "HelmRepoChart",
     "HelmChartError",
     "HelmPathError",
     "helm_template",
     "HelmConfigGitRepo",
     "HelmChartGitRepo",
+    "RenderCache",
+    "HelmTemplateError",
+    "helm_template_iter",
+    "RenderSource",
+    "render_all",
+    "render_source",
+    "source_documents",
+    "stream_all",
 ]
+
+__getattr__, __dir__ = lazy_exports(
+    __name__,
+    {
+        "PkgInstaller": "deploydocus.package.installer",
+        "KubeConfigError": "deploydocus.package.errors",
+        "HelmChart": ".helm3",
+        "GitRepo": ".sources",
+        "Kustomization": ".kustomize",
+        "KustomizeError": ".kustomize",
+        "HelmRepoChart": ".helm3",
+        "HelmChartError": ".helm3",
+        "HelmPathError": ".helm3",
+        "helm_template": ".helm3",
+        "HelmConfigGitRepo": ".helm3",
+        "HelmChartGitRepo": ".helm3",
+        "RenderCache": ".cache",
+        "HelmTemplateError": ".helm3",
+        "helm_template_iter": ".helm3",
+        "RenderSource": ".render",
+        "render_all": ".render",
+        "render_source": ".render",
+        "source_documents": ".render",
+        "stream_all": ".render",
+    },
+)
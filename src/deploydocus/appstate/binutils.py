@@ -1,7 +1,54 @@
+"""The external commands (helm, git, kubectl, kustomize...). They are looked up on
+the PATH the first time they are used, not when deploydocus is imported: a missing
+command only fails the operations that need it.
+"""
+
+import functools
+from typing import Any
+
 from plumbum import local
+from plumbum.commands.processes import CommandNotFound  # type: ignore
+
+
+@functools.cache
+def _kustomize() -> dict[str, Any]:
+    try:
+        kustomize = local["kustomize"]
+        return {
+            "kustomize": kustomize,
+            "kustomize_build": kustomize["build"],
+            "kustomize_version": kustomize["version"],
+        }
+    except CommandNotFound:  # Fall back on the kustomize built into kubectl
+        kubectl = _command("kubectl")
+        return {
+            "kustomize": kubectl["kustomize"],
+            "kustomize_build": kubectl["kustomize"],
+            "kustomize_version": kubectl["version", "--client"],
+        }
+
+
+@functools.cache
+def _command(name: str) -> Any:
+    if name.startswith("kustomize"):
+        return _kustomize()[name]
+    return local[name]
+
+
+_COMMANDS = frozenset(
+    [
+        "helm",
+        "git",
+        "kubectl",
+        "kustomize",
+        "kustomize_build",
+        "kustomize_version",
+        "cp",
+    ]
+)
+
 
-helm = local["helm"]
-git = local["git"]
-kubectl = local["kubectl"]
-kustomize = local["kustomize"] or kubectl["kustomize"]
-cp = local["cp"]
+def __getattr__(name: str) -> Any:
+    if name not in _COMMANDS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return _command(name)
@@ -0,0 +1,225 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import IO, Any, Callable, Generator, Iterable, Iterator, Sequence
+
+from .yamlutils import load_all
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_VALUES_FLAGS = ("-f", "--values", "--set-file")
+
+# helm picks a random release name: the output can never be reused
+_NON_DETERMINISTIC_FLAGS = ("-g", "--generate-name")
+
+
+def default_cache_dir() -> Path:
+    """The root directory of the deploydocus caches: $DEPLOYDOCUS_CACHE_DIR,
+    else $XDG_CACHE_HOME/deploydocus, else ~/.cache/deploydocus
+    """
+    if cache_dir := os.environ.get("DEPLOYDOCUS_CACHE_DIR"):
+        return Path(cache_dir)
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(xdg_cache_home) / "deploydocus"
+
+
+def file_digest(path: Path | str) -> str:
+    """The sha256 hex digest of a file's content"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def values_digests(args: Sequence[str]) -> list[str]:
+    """The digests of the values files passed to helm (`-f`, `--values`,
+    `--set-file`), so that a change in a values file changes the cache key even if
+    the helm arguments are the same.
+
+    Args:
+        args: The helm arguments
+
+    Returns:
+        The digests, in the order of the arguments
+    """
+    digests: list[str] = []
+    for i, arg in enumerate(args):
+        paths: list[str] = []
+        if arg in _VALUES_FLAGS and i + 1 < len(args):
+            paths.append(args[i + 1])
+        elif arg.startswith(tuple(f"{flag}=" for flag in _VALUES_FLAGS)):
+            paths.append(arg.split("=", 1)[1])
+        for path in paths:
+            # --set-file takes key=path (comma separated)
+            for value in path.split(","):
+                value = value.split("=", 1)[-1]
+                if Path(value).is_file():
+                    digests.append(file_digest(value))
+    return digests
+
+
+def is_cacheable(args: Sequence[str]) -> bool:
+    """Tell if the output of helm with these arguments is deterministic"""
+    return not any(
+        arg in _NON_DETERMINISTIC_FLAGS or arg.startswith("--generate-name=")
+        for arg in args
+    )
+
+
+class RenderCache:
+    """An on-disk cache of rendered manifests (as text), bounded in size. When the
+    cache grows over `max_bytes`, the least recently used entries are evicted.
+
+    Entries are written atomically (written to a temporary file, then renamed), so
+    the cache can be shared by several threads and processes. Recency is tracked
+    through the modification time of the entries, which is updated on every hit.
+    """
+
+    cache_dir: Path
+    max_bytes: int
+
+    def __init__(
+        self,
+        cache_dir: Path | str | None = None,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    ):
+        """
+
+        Args:
+            cache_dir: Where the rendered manifests are stored. Defaults to the
+                "render" directory of default_cache_dir()
+            max_bytes: The maximum total size of the entries
+        """
+        self.cache_dir = (
+            Path(cache_dir) if cache_dir is not None else default_cache_dir() / "render"
+        )
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """A cache key made of the given parts (which must be JSON serializable or
+        convertible with str())
+        """
+        serialized = json.dumps(
+            parts, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.yaml"
+
+    def get(self, key: str) -> str | None:
+        """
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached rendered manifests, or None on a miss
+        """
+        path = self._path(key)
+        try:
+            rendered = path.read_text()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        logger.debug(f"Render cache hit {key}")
+        return rendered
+
+    def put(self, key: str, rendered: str):
+        """Store the rendered manifests, then evict the least recently used entries
+        if the cache is over its size limit
+
+        Args:
+            key: The cache key
+            rendered: The rendered manifests
+        """
+        with self.writer(key) as f:
+            f.write(rendered.encode())
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[IO[bytes]]:
+        """Store the rendered manifests as they are written to the returned (binary)
+        file, e.g. while they are being rendered. The entry is only created once
+        the context exits without an exception; the least recently used entries
+        are then evicted if the cache is over its size limit.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The file to write the rendered manifests to
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(
+            "wb", dir=self.cache_dir, prefix=".", suffix=".tmp", delete=False
+        ) as f:
+            try:
+                yield f
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, self._path(key))
+        self.evict()
+
+    def documents(
+        self, key: str, render: Callable[[IO[bytes]], Iterator[Any]]
+    ) -> Generator[Any, None, None]:
+        """The documents of an entry, parsed one at a time. On a miss, those of
+        `render`, which writes the rendered text to the given file as it goes (see
+        writer()): the entry is stored once the render completes.
+
+        Args:
+            key: The cache key
+            render: Renders the manifests, yielding their documents, and copies
+                the rendered text to the given file
+
+        Returns:
+            The documents
+        """
+        if (rendered := self.get(key)) is not None:
+            yield from load_all(rendered)
+            return
+        with self.writer(key) as f:
+            yield from render(f)
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in
+        `max_bytes`
+        """
+        entries: list[tuple[float, int, Path]] = []
+        for path in self._entries():
+            try:
+                st = path.stat()
+            except FileNotFoundError:  # Evicted concurrently
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            logger.debug(f"Evicting {path}")
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _entries(self) -> Iterable[Path]:
+        if not self.cache_dir.is_dir():
+            return ()
+        return self.cache_dir.glob("*.yaml")
+
+    def clear(self):
+        """Remove all the entries"""
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+
+
+@functools.cache
+def default_render_cache() -> RenderCache:
+    """The render cache shared by all the charts that do not get a specific one"""
+    return RenderCache()
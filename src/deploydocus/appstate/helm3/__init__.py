@@ -6,7 +6,13 @@ from .helm import (
     HelmPathError,
     HelmRepoChart,
 )
-from .helm_shell import helm_template
+from .helm_shell import (
+    HelmTemplateError,
+    helm_template,
+    helm_template_iter,
+    helm_version,
+)
+from .service import HelmService
 
 __all__ = [
     "HelmChart",
@@ -16,4 +22,8 @@ __all__ = [
     "helm_template",
     "HelmConfigGitRepo",
     "HelmChartGitRepo",
+    "HelmTemplateError",
+    "helm_template_iter",
+    "helm_version",
+    "HelmService",
 ]
@@ -1,9 +1,18 @@
 import logging
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Annotated, Any, Mapping, Sequence, cast
+from typing import (
+    IO,
+    Annotated,
+    Any,
+    Callable,
+    Generator,
+    Iterable,
+    Mapping,
+    Sequence,
+    cast,
+)
 
-import yaml
 from pydantic import (
     AnyUrl,
     BaseModel,
@@ -13,8 +22,12 @@ from pydantic import (
     field_validator,
 )
 
-from ..binutils import helm
-from ..sources import GitRepo, GitUrl
+from .. import binutils
+from ..cache import RenderCache, default_render_cache, is_cacheable, values_digests
+from ..sources import GitRepo, GitUrl, repo_relpath
+from ..yamlutils import load_file
+from . import helm_shell
+from .service import HelmService, default_helm_service
 
 HelmUrl = Annotated[AnyUrl, UrlConstraints(allowed_schemes=["https", "oci"])]
 
@@ -31,6 +44,88 @@ class HelmChartError(Exception):
     """Path could not be interpreted as a Helm chart"""
 
 
+def _cached_render(
+    cache: RenderCache | bool,
+    key_parts: Sequence[Any],
+    args: Sequence[str],
+    render: Callable[[], str],
+) -> str:
+    """Look the rendered chart up in the render cache, calling `render` on a miss.
+
+    Args:
+        cache: The render cache. True for the default one, False for no caching
+        key_parts: What identifies the chart (source, version/commit, release...).
+            The helm arguments, the digests of the values files they refer to and
+            the helm version are added to them.
+        args: The helm arguments
+        render: Renders the chart
+
+    Returns:
+        The rendered chart
+    """
+    render_cache = default_render_cache() if cache is True else cache or None
+    if render_cache is None or not is_cacheable(args):
+        return render()
+    key = _render_key(render_cache, key_parts, args)
+    if (rendered := render_cache.get(key)) is None:
+        rendered = render()
+        render_cache.put(key, rendered)
+    return rendered
+
+
+def _render_key(
+    render_cache: RenderCache, key_parts: Sequence[Any], args: Sequence[str]
+) -> str:
+    return render_cache.key(
+        *key_parts, list(args), values_digests(args), helm_shell.helm_version()
+    )
+
+
+def _cached_documents(
+    cache: RenderCache | bool,
+    key_parts: Sequence[Any],
+    args: Sequence[str],
+    documents: Callable[[IO[bytes] | None], Generator[dict[str, Any], None, None]],
+) -> Generator[dict[str, Any], None, None]:
+    """The streaming counterpart of _cached_render: on a miss, the objects are
+    yielded as helm renders them, while its output is written to the cache entry.
+    The entry is only stored if the render completes.
+
+    Args:
+        cache: The render cache. True for the default one, False for no caching
+        key_parts: What identifies the chart (see _cached_render)
+        args: The helm arguments
+        documents: Renders the chart, yielding its objects, and copies the output
+            of helm to the given file (if not None)
+
+    Returns:
+        The rendered objects
+    """
+    render_cache = default_render_cache() if cache is True else cache or None
+    if render_cache is None or not is_cacheable(args):
+        yield from documents(None)
+        return
+    yield from render_cache.documents(
+        _render_key(render_cache, key_parts, args), documents
+    )
+
+
+def _local_chart_dependencies(root: Path, chart: Path) -> Iterable[Path]:
+    """The charts of the same repo that a chart depends on (`file://`
+    repositories of its Chart.yaml dependencies), relative to the root of the repo
+    """
+    try:
+        chart_yaml = load_file(root / chart / "Chart.yaml") or {}
+    except FileNotFoundError:
+        return
+    for dependency in chart_yaml.get("dependencies") or []:
+        repository: str = dependency.get("repository") or ""
+        if repository.startswith("file://") and (
+            path := repo_relpath(chart, repository.removeprefix("file://"))
+        ):
+            yield path
+
+
 class HelmConfigGitRepo:
     helm_config: GitRepo  # | Path | Mapping[str, Any]
     _dst_dir: Path | None = None
@@ -58,9 +153,7 @@ class HelmConfigGitRepo:
     def config(
         self, filepath: Path | str
     ) -> Mapping[str, Any] | Sequence[Mapping[str, Any]]:
-        filepath = Path(filepath)
-        with open(filepath, "rt") as f:
-            return yaml.safe_load(f)
+        return load_file(filepath)
 
 
 class HelmRender:
@@ -71,7 +164,7 @@ class HelmRender:
         configs: Sequence[HelmConfigGitRepo] | None = None,
         *args,
     ) -> str:
-        helm_template = helm["template"]
+        helm_template = binutils.helm["template"]
         if release_name is not None:
             helm_template = helm_template[release_name]
         helm_template = helm_template[*args]
@@ -94,6 +187,8 @@ class HelmRepoChart(BaseModel):
         release_name: str | None = None,
         configs: Sequence[HelmConfigGitRepo] | None = None,
         *args,
+        cache: RenderCache | bool = True,
+        helm_service: HelmService | None = None,
     ) -> str:
         """
 
@@ -101,18 +196,66 @@ class HelmRepoChart(BaseModel):
             release_name:
             configs:
             *args:
+            cache: The render cache (see `appstate.cache`). True for the default
+                one, False to always call helm. Only charts with a version are
+                cached, as the latest version of a chart can change at any time.
+            helm_service: Pulls the chart (once per version) and renders it. See
+                HelmService; defaults to the shared one.
 
         Returns:
 
         """
-        helm_template = helm["template"]
-        if release_name is not None:
-            helm_template = helm_template[release_name]
-        helm_template = helm_template[*self.template_cmd, *args]
-        ret_code, stdout, stderr = helm_template.run()
-        assert ret_code == 0, f"Helm render error {ret_code=}, {stdout=}," f" {stderr=}"
+        service = helm_service or default_helm_service()
+
+        def _render() -> str:
+            archive = (
+                service.pull(self.chart_name, self.version, repo_url=str(self.repo))
+                if self.url.scheme == "https"
+                else service.pull(str(self.url), self.version)
+            )
+            return service.template(release_name, archive, args)
+
+        if self.version is None:
+            return _render()
+        return _cached_render(
+            cache,
+            ["helm-repo", str(self.url), self.version, release_name],
+            args,
+            _render,
+        )
 
-        return stdout
+    def documents(
+        self,
+        release_name: str | None = None,
+        configs: Sequence[HelmConfigGitRepo] | None = None,
+        *args,
+        cache: RenderCache | bool = True,
+        helm_service: HelmService | None = None,
+    ) -> Generator[dict[str, Any], None, None]:
+        """Like render(), but yields the rendered objects as helm writes them out,
+        so that they can be installed while the chart is still being rendered
+
+        Returns:
+            The rendered objects
+        """
+        service = helm_service or default_helm_service()
+
+        def _documents(tee: IO[bytes] | None) -> Generator[dict[str, Any], None, None]:
+            archive = (
+                service.pull(self.chart_name, self.version, repo_url=str(self.repo))
+                if self.url.scheme == "https"
+                else service.pull(str(self.url), self.version)
+            )
+            return service.template_iter(release_name, archive, args, tee=tee)
+
+        if self.version is None:
+            return _documents(None)
+        return _cached_documents(
+            cache,
+            ["helm-repo", str(self.url), self.version, release_name],
+            args,
+            _documents,
+        )
 
     @computed_field  # type: ignore[misc]
     @property
@@ -137,11 +280,14 @@ class HelmRepoChart(BaseModel):
     @computed_field  # type: ignore[prop-decorator]
     @property
     def template_cmd(self) -> Sequence[str]:
-        return (
+        cmd = (
             [self.chart_name, f"--repo={self.repo}"]
             if self.url.scheme == "https"
             else [str(self.url)]
         )
+        if self.version is not None:
+            cmd.append(f"--version={self.version}")
+        return cmd
 
 
 class HelmChartGitRepo(BaseModel):
@@ -158,6 +304,37 @@ class HelmChartGitRepo(BaseModel):
     def _relative_path(cls, value: Path | str) -> Path:
         return value if isinstance(value, Path) else Path(value)
 
+    def _clone(
+        self,
+        dst_dir: Path | str,
+        gitargs: Sequence[str] | None,
+        commit: str | None = None,
+    ):
+        """Clone only the chart's directory (and the charts of the repo it depends
+        on) with a partial clone and a sparse checkout
+        """
+        self.git_repo.sparse_clone(
+            dst_dir,
+            [self.relpath],
+            args=gitargs,
+            dependencies=_local_chart_dependencies,
+            commit=commit,
+        )
+
+    def _key_parts(self, commit: str, release_name: str | None) -> list[Any]:
+        # The namespace is part of the helm arguments (see _namespace_args)
+        return [
+            "helm-git",
+            str(self.git_repo.url),
+            commit,
+            str(self.relpath),
+            release_name,
+        ]
+
+    @staticmethod
+    def _namespace_args(namespace: str, args: Sequence[str]) -> list[str]:
+        return [*args, "-n", namespace] if namespace != "default" else list(args)
+
     def render(
         self,
         release_name: str | None = None,
@@ -166,6 +343,7 @@ class HelmChartGitRepo(BaseModel):
         configs: Sequence[HelmConfigGitRepo] | None = None,
         gitargs: Sequence[str] | None = None,
         *args,
+        cache: RenderCache | bool = True,
     ) -> str:
         """
         Calls `helm template [NAME] [CHART] --dry-run=server
@@ -181,27 +359,84 @@ class HelmChartGitRepo(BaseModel):
             configs: values file paths or values to use
             *args: passed to helm and should be be all str.
                 Must not have "dry-run=", "--repo" entry
+            cache: The render cache (see `appstate.cache`). True for the default
+                one, False to always clone and call helm. The chart is cached by
+                commit: the branch is resolved with `git ls-remote` (see
+                GitRepo.resolve_commit), and a hit skips the clone altogether.
 
         Returns:
             The rendered chart
 
         """
 
-        helm_template = helm["template"]
+        helm_template = binutils.helm["template"]
         if release_name is not None:
             helm_template = helm_template[release_name]
+        helm_args = self._namespace_args(namespace, args)
+
+        def _helm_template(chart_path: Path) -> str:
+            helm_template_cmd = helm_template[chart_path][*helm_args]
+            returncode, stdout, stderr = helm_template_cmd.run(retcode=None)
+            if returncode != 0:
+                raise helm_shell.HelmTemplateError(
+                    f"Helm render error {returncode=}, stderr={stderr}"
+                )
+            return stdout
 
-        with TemporaryDirectory() as td:
-            self.git_repo.clone(td, args=gitargs)
+        def _clone_and_render(commit: str | None = None) -> str:
+            with TemporaryDirectory() as td:
+                self._clone(td, gitargs, commit)
+                return _helm_template(Path(td) / self.relpath)
+
+        if cache is False:
+            return _clone_and_render()
+        # Resolving the branch with ls-remote is cheap: an unchanged branch head
+        # means neither a clone nor a render
+        commit = self.git_repo.resolve_commit()
+        return _cached_render(
+            cache,
+            self._key_parts(commit, release_name),
+            helm_args,
+            lambda: _clone_and_render(commit),
+        )
 
-            chart_path = Path(td) / self.relpath
-            helm_template_cmd = helm_template[chart_path][*args]
-            ret_code, stdout, stderr = helm_template_cmd.run()
-            assert (
-                ret_code == 0
-            ), f"helm execution error {ret_code=}, {stdout=}, {stderr=}"
+    def documents(
+        self,
+        release_name: str | None = None,
+        namespace: str = "default",
+        create_namespace=False,
+        configs: Sequence[HelmConfigGitRepo] | None = None,
+        gitargs: Sequence[str] | None = None,
+        *args,
+        cache: RenderCache | bool = True,
+    ) -> Generator[dict[str, Any], None, None]:
+        """Like render(), but yields the rendered objects as helm writes them out,
+        so that they can be installed while the chart is still being rendered. The
+        clone is kept until the last object has been yielded.
 
-            return stdout
+        Returns:
+            The rendered objects
+        """
+        helm_args = self._namespace_args(namespace, args)
+
+        def _documents(
+            tee: IO[bytes] | None, commit: str | None = None
+        ) -> Generator[dict[str, Any], None, None]:
+            with TemporaryDirectory() as td:
+                self._clone(td, gitargs, commit)
+                yield from helm_shell.helm_template_iter(
+                    release_name, Path(td) / self.relpath, helm_args, tee=tee
+                )
+
+        if cache is False:
+            return _documents(None)
+        commit = self.git_repo.resolve_commit()
+        return _cached_documents(
+            cache,
+            self._key_parts(commit, release_name),
+            helm_args,
+            lambda tee: _documents(tee, commit),
+        )
 
 
 HelmChart = HelmChartGitRepo | HelmRepoChart
@@ -1,12 +1,34 @@
-from io import StringIO
-from typing import Any, Sequence
+import functools
+from pathlib import Path
+from threading import Lock
+from typing import IO, Any, Generator, Sequence
 
-import yaml
+from .. import binutils
+from ..yamlutils import load_all, load_all_output
 
-from ..binutils import helm
+_helm_version_lock = Lock()
 
-# Note: Not yet threadsafe
-helm_ver: str = helm["version"]()
+
+@functools.cache
+def _helm_version() -> str:
+    return binutils.helm["version"]()
+
+
+def helm_version() -> str:
+    """The output of `helm version`, obtained the first time it is needed"""
+    with _helm_version_lock:
+        return _helm_version()
+
+
+def __getattr__(name: str) -> Any:
+    # `helm_ver` used to be computed at import time
+    if name == "helm_ver":
+        return helm_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class HelmTemplateError(Exception):
+    """`helm template` failed"""
 
 
 def helm_template(
@@ -23,11 +45,46 @@ def helm_template(
     Returns:
 
     """
-    rendered_str: str = helm["template"](name, chart, *args)
+    rendered_str: str = binutils.helm["template"](name, chart, *args)
 
     if as_str:
         return rendered_str
     # Now  render as
-    with StringIO(rendered_str) as f:
-        chart_obj: list[dict[str, Any]] = list(yaml.safe_load_all(f))
+    chart_obj: list[dict[str, Any]] = list(load_all(rendered_str))
     return chart_obj[0] if len(chart_obj) == 1 else chart_obj
+
+
+def helm_template_iter(
+    name: str | None,
+    chart: str | Path,
+    args: Sequence[str],
+    *,
+    helm: Any = None,
+    tee: IO[bytes] | None = None,
+) -> Generator[dict[str, Any], None, None]:
+    """Render a helm chart using the `helm` CLI, yielding the rendered objects as
+    helm writes them out. The output of helm is parsed as it is read, so the first
+    objects are available before the render completes and only one object is held
+    in memory at a time.
+
+    Args:
+        name: The release name. None for a name chosen by helm
+        chart: The chart
+        args: Passed to `helm template`
+        helm: The helm command, e.g. with its environment (see HelmService).
+            Defaults to the helm of the PATH
+        tee: A binary file to which the output of helm is copied as it is read
+            (e.g. a render cache entry, see RenderCache.writer)
+
+    Returns:
+        The rendered objects
+
+    Raises:
+        HelmTemplateError: If helm fails (once its output has been consumed)
+    """
+    helm_template = (helm if helm is not None else binutils.helm)["template"]
+    if name is not None:
+        helm_template = helm_template[name]
+    return load_all_output(
+        helm_template[chart, *args], tee=tee, error=HelmTemplateError
+    )
@@ -0,0 +1,183 @@
+import functools
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Lock
+from typing import IO, Any, Generator, Sequence
+
+from .. import binutils
+from ..cache import default_cache_dir
+from .helm_shell import HelmTemplateError, helm_template_iter
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()[:16]
+
+
+class HelmService:
+    """Runs helm with its own cache and repository configuration, kept across
+    renders (and processes):
+
+    - HELM_CACHE_HOME and HELM_REPOSITORY_CACHE point to the "helm" directory of
+      the deploydocus cache, and HELM_REPOSITORY_CONFIG to a repositories file of
+      its own (the user's helm configuration is left alone).
+    - Each chart repo is added and its index updated once per service, the first
+      time one of its charts is pulled.
+    - The chart archives of pinned chart versions are pulled once and kept, so
+      rendering a chart again does not download it again.
+
+    Note: helm has no server mode; every render is still a `helm template`
+    process, but one that runs against a local chart archive.
+    """
+
+    cache_home: Path
+
+    def __init__(self, cache_home: Path | str | None = None):
+        """
+
+        Args:
+            cache_home: The helm cache directory. Defaults to the "helm" directory
+                of appstate.cache.default_cache_dir()
+        """
+        self.cache_home = (
+            Path(cache_home) if cache_home is not None else default_cache_dir() / "helm"
+        )
+        self._locks: defaultdict[str, Lock] = defaultdict(Lock)
+        self._locks_lock = Lock()
+        self._repos: dict[str, str] = {}
+
+    @property
+    def env(self) -> dict[str, str]:
+        """The environment variables helm runs with"""
+        return {
+            "HELM_CACHE_HOME": str(self.cache_home),
+            "HELM_REPOSITORY_CACHE": str(self.cache_home / "repository"),
+            "HELM_REPOSITORY_CONFIG": str(self.cache_home / "repositories.yaml"),
+        }
+
+    @property
+    def helm(self):
+        return binutils.helm.with_env(**self.env)
+
+    def _lock(self, key: str) -> Lock:
+        with self._locks_lock:
+            return self._locks[key]
+
+    def add_repo(self, repo_url: str) -> str:
+        """Add a chart repo and update its index, once
+
+        Args:
+            repo_url: The url of the (https) chart repo
+
+        Returns:
+            The name under which the repo was added
+        """
+        with self._lock(f"repo:{repo_url}"):
+            if (name := self._repos.get(repo_url)) is None:
+                name = f"deploydocus-{_digest(repo_url)}"
+                logger.debug(f"Adding helm repo {name} {repo_url}")
+                self.helm["repo", "add", "--force-update", name, repo_url]()
+                self.helm["repo", "update", name]()
+                self._repos[repo_url] = name
+        return name
+
+    def _pull(self, chart_ref: str, version: str | None, dst_dir: Path) -> Path:
+        pull = self.helm["pull", chart_ref, "--destination", dst_dir]
+        if version is not None:
+            pull = pull["--version", version]
+        pull()
+        return next(dst_dir.glob("*.tgz"))
+
+    def pull(
+        self, chart_name: str, version: str | None, repo_url: str | None = None
+    ) -> Path:
+        """Pull a chart archive. The archives of charts with a version are kept in
+        the cache and pulled only once.
+
+        Args:
+            chart_name: The name of the chart in the repo, or the oci:// url of the
+                chart if repo_url is None
+            version: The version of the chart. None for the latest one
+            repo_url: The url of the (https) chart repo
+
+        Returns:
+            The path of the chart archive. For charts without a version, the
+            archive is replaced by the next pull of that chart.
+        """
+        chart_ref = (
+            f"{self.add_repo(repo_url)}/{chart_name}"
+            if repo_url is not None
+            else chart_name
+        )
+        chart_dir = self.cache_home / "charts" / _digest(f"{repo_url}|{chart_name}")
+        chart_dir.mkdir(parents=True, exist_ok=True)
+        if version is None:
+            latest = chart_dir / "latest.tgz"
+            with self._lock(str(latest)), TemporaryDirectory(dir=chart_dir) as td:
+                os.replace(self._pull(chart_ref, None, Path(td)), latest)
+            return latest
+
+        archive = chart_dir / f"{version}.tgz"
+        with self._lock(str(archive)):
+            if not archive.exists():
+                logger.debug(f"Pulling {chart_ref} {version}")
+                with TemporaryDirectory(dir=chart_dir) as td:
+                    os.replace(self._pull(chart_ref, version, Path(td)), archive)
+        return archive
+
+    def template(
+        self, release_name: str | None, chart: Path | str, args: Sequence[str]
+    ) -> str:
+        """Run `helm template`
+
+        Args:
+            release_name: The release name
+            chart: The chart (e.g. as returned by pull())
+            args: Passed to helm
+
+        Returns:
+            The rendered chart
+
+        Raises:
+            HelmTemplateError: If helm fails
+        """
+        helm_template = self.helm["template"]
+        if release_name is not None:
+            helm_template = helm_template[release_name]
+        returncode, stdout, stderr = helm_template[chart, *args].run(retcode=None)
+        if returncode != 0:
+            raise HelmTemplateError(f"Helm render error {returncode=}, stderr={stderr}")
+        return stdout
+
+    def template_iter(
+        self,
+        release_name: str | None,
+        chart: Path | str,
+        args: Sequence[str],
+        *,
+        tee: IO[bytes] | None = None,
+    ) -> Generator[dict[str, Any], None, None]:
+        """Run `helm template`, yielding the rendered objects as helm writes them
+        out (see helm_shell.helm_template_iter)
+
+        Args:
+            release_name: The release name
+            chart: The chart (e.g. as returned by pull())
+            args: Passed to helm
+            tee: A binary file to which the output of helm is copied
+
+        Returns:
+            The rendered objects
+        """
+        return helm_template_iter(release_name, chart, args, helm=self.helm, tee=tee)
+
+
+@functools.cache
+def default_helm_service() -> HelmService:
+    """The helm service shared by all the charts"""
+    return HelmService()
@@ -1,3 +1,3 @@
-from .kustomize import Kustomization
+from .kustomize import Kustomization, KustomizeError
 
-__all__ = ["Kustomization"]
+__all__ = ["Kustomization", "KustomizeError"]
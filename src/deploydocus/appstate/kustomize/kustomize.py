@@ -1,9 +1,127 @@
+import functools
+import hashlib
+import logging
+import os
+from contextlib import ExitStack
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import IO, Any, Generator, Iterable, Sequence
+from urllib.parse import parse_qs, urlsplit
 
 from pydantic import BaseModel
 
-from deploydocus.appstate.binutils import kustomize
+from deploydocus.appstate import binutils
+from deploydocus.appstate.cache import RenderCache, default_render_cache, file_digest
 from deploydocus.appstate.sources import GitRepo
+from deploydocus.appstate.yamlutils import load_all, load_all_output, load_file
+
+logger = logging.getLogger(__name__)
+
+KUSTOMIZATION_FILES = ("kustomization.yaml", "kustomization.yml", "Kustomization")
+
+# The fields of a kustomization that may refer to other kustomizations
+_KUSTOMIZATION_DIR_FIELDS = ("resources", "bases", "components")
+
+
+class KustomizeError(Exception):
+    """`kustomize build` failed"""
+
+
+def _kustomization_refs(
+    root: Path, kustomization: Path
+) -> tuple[list[Path], list[str]]:
+    """The directories that a kustomization refers to (its bases, components and
+    directory resources), relative to the root of the repo, and the remote
+    resources (urls) it refers to. The directories may be outside the root (see
+    _is_outside).
+    """
+    for filename in KUSTOMIZATION_FILES:
+        if (root / kustomization / filename).is_file():
+            spec = load_file(root / kustomization / filename) or {}
+            break
+    else:
+        return [], []
+    local_refs: list[Path] = []
+    remote_refs: list[str] = []
+    for field in _KUSTOMIZATION_DIR_FIELDS:
+        for entry in spec.get(field) or []:
+            if not isinstance(entry, str):
+                continue
+            if "://" in entry or entry.startswith("github.com/"):
+                remote_refs.append(entry)
+                continue
+            path = Path(os.path.normpath(kustomization / entry))
+            if path.suffix in (".yaml", ".yml", ".json"):
+                path = path.parent  # A resource file: check out its directory
+            # Files of the kustomization directory are checked out already
+            if _is_outside(path) or not path.is_relative_to(kustomization):
+                local_refs.append(path)
+    return local_refs, remote_refs
+
+
+def _is_outside(path: Path) -> bool:
+    """Tell if a (normalized) path relative to the root leaves the root"""
+    return path.is_absolute() or path.parts[:1] == ("..",)
+
+
+def _kustomization_dependencies(root: Path, kustomization: Path) -> Iterable[Path]:
+    """The directories of the same repo that a kustomization refers to. Remote
+    resources (urls) are left to kustomize.
+    """
+    return [
+        path
+        for path in _kustomization_refs(root, kustomization)[0]
+        if not _is_outside(path)
+    ]
+
+
+def _kustomization_tree(root: Path, relpath: Path) -> tuple[list[Path], list[str]]:
+    """All the directories a kustomization is built from (its own and, recursively,
+    those it refers to), relative to the root, and all the remote resources
+    """
+    dirs: list[Path] = [relpath]
+    remote: list[str] = []
+    pending = [relpath]
+    while pending:
+        local_refs, remote_refs = _kustomization_refs(root, pending.pop())
+        remote.extend(remote_refs)
+        for path in local_refs:
+            if path not in dirs:
+                dirs.append(path)
+                pending.append(path)
+    return dirs, remote
+
+
+def _tree_digest(root: Path, dirs: Iterable[Path]) -> str:
+    """A digest of the files (paths and content) of directories, including those
+    outside the root
+    """
+    digest = hashlib.sha256()
+    files = sorted(
+        {
+            Path(os.path.normpath(f))
+            for d in dirs
+            for f in (root / d).rglob("*")
+            if f.is_file()
+        },
+        key=str,
+    )
+    for f in files:
+        path = Path(os.path.relpath(f, root)).as_posix()
+        digest.update(f"{path}\0{file_digest(f)}\0".encode())
+    return digest.hexdigest()
+
+
+def _is_pinned(remote_ref: str) -> bool:
+    """Tell if a remote resource refers to a fixed version (e.g. `?ref=v1.2.0`)"""
+    query = parse_qs(urlsplit(remote_ref).query)
+    return bool(query.get("ref") or query.get("version"))
+
+
+@functools.cache
+def _kustomize_version() -> str:
+    """The version of kustomize, obtained the first time it is needed"""
+    return binutils.kustomize_version()
 
 
 class Kustomization(BaseModel):
@@ -32,22 +150,194 @@ class Kustomization(BaseModel):
     #
     #     self.relpath = Path(relpath) if relpath else None
 
-    def render(self, dst_dir: Path | str, *args) -> str:
+    def _build(self, path: Path, args: Sequence[str]) -> str:
+        returncode, stdout, stderr = binutils.kustomize_build[*args, path].run(
+            retcode=None
+        )
+        if returncode != 0:
+            raise KustomizeError(f"kustomize build failed {returncode=}, {stderr=}")
+        return stdout
+
+    def _build_iter(
+        self, path: Path, args: Sequence[str], tee: IO[bytes] | None = None
+    ) -> Generator[dict[str, Any], None, None]:
+        return load_all_output(
+            binutils.kustomize_build[*args, path], tee=tee, error=KustomizeError
+        )
+
+    def _local_key(
+        self, render_cache: RenderCache, root: Path, args: Sequence[str]
+    ) -> str | None:
+        """The cache key of a local kustomization, None if it is not cacheable"""
+        dirs, remote = _kustomization_tree(root, self.relpath)
+        if not all(_is_pinned(r) for r in remote):
+            return None
+        return render_cache.key(
+            "kustomize-path",
+            str(root / self.relpath),
+            _tree_digest(root, dirs),
+            _kustomize_version(),
+            list(args),
+        )
+
+    def _git_key(
+        self, git_repo: GitRepo, render_cache: RenderCache, args: Sequence[str]
+    ) -> tuple[str, str]:
+        """The commit of a Git kustomization and its cache key"""
+        commit = git_repo.resolve_commit()
+        key = render_cache.key(
+            "kustomize-git",
+            str(git_repo.url),
+            commit,
+            str(self.relpath),
+            _kustomize_version(),
+            list(args),
+        )
+        return commit, key
+
+    def _clone(self, git_repo: GitRepo, root: Path, commit: str | None):
+        # Only check out the kustomization and the bases it refers to
+        git_repo.sparse_clone(
+            root,
+            [self.relpath],
+            dependencies=_kustomization_dependencies,
+            commit=commit,
+        )
+
+    def _cacheable_tree(self, root: Path) -> bool:
+        """Tell if the build of a checked out tree can be cached: not if it refers
+        to remote resources that are not pinned or to directories outside the repo
         """
+        dirs, remote = _kustomization_tree(root, self.relpath)
+        if outside := [d for d in dirs if _is_outside(d)]:
+            # Not part of the commit the output would be cached by
+            logger.debug(f"Not caching, directories outside the repo {outside}")
+            return False
+        if not all(_is_pinned(r) for r in remote):
+            logger.debug(f"Not caching, unpinned remote resources in {remote}")
+            return False
+        return True
+
+    def render(
+        self,
+        dst_dir: Path | str | None = None,
+        *args,
+        cache: RenderCache | bool = True,
+    ) -> str:
+        """Build the kustomization (`kustomize build`, or `kubectl kustomize` if
+        kustomize is not installed).
+
+        A local kustomization is built in place. A kustomization from a Git repo is
+        cloned first (only its directory and the directories it refers to, see
+        GitRepo.sparse_clone).
+
+        The output is cached (see `appstate.cache`), keyed by the commit of a Git
+        kustomization (resolved with `git ls-remote`) or by a digest of the files
+        of a local one (including the bases outside its directory), plus the
+        kustomize version and arguments. Kustomizations referring to remote
+        resources that are not pinned (with a `ref` or `version`), and Git
+        kustomizations referring to directories outside the repo, are not cached.
 
         Args:
-            dst_dir: local directory to which to clone (git)
-            *args: passed to git
+            dst_dir: local directory to which to clone (git). If None, a temporary
+                directory is used, and a cache hit skips the clone altogether.
+            *args: passed to kustomize
+            cache: The render cache. True for the default one, False for no
+                caching
 
         Returns:
-            None
+            The rendered manifests
         """
-        dst_dir = Path(dst_dir).expanduser()
+        render_cache = default_render_cache() if cache is True else cache or None
 
-        if isinstance(self.kustomization, GitRepo):
-            self.kustomization.clone(dst_dir, args=args)
-        ret_code, stdout, stderr = kustomize.run()
-        assert ret_code == 0, (
-            f"kustomization execution error " f"{ret_code=}, {stdout=}, {stderr=}"
-        )
-        return stdout
+        if isinstance(self.kustomization, Path):
+            root = self.kustomization.expanduser()
+            if (
+                render_cache is None
+                or (key := self._local_key(render_cache, root, args)) is None
+            ):
+                return self._build(root / self.relpath, args)
+            if (rendered := render_cache.get(key)) is None:
+                rendered = self._build(root / self.relpath, args)
+                render_cache.put(key, rendered)
+            return rendered
+
+        git_repo = self.kustomization
+        commit: str | None = None
+        git_key: str | None = None
+        if render_cache is not None:
+            commit, git_key = self._git_key(git_repo, render_cache, args)
+            if dst_dir is None and (rendered := render_cache.get(git_key)):
+                return rendered
+
+        def _clone_and_build(root: Path) -> str:
+            self._clone(git_repo, root, commit)
+            rendered = self._build(root / self.relpath, args)
+            if (
+                render_cache is not None
+                and git_key is not None
+                and self._cacheable_tree(root)
+            ):
+                render_cache.put(git_key, rendered)
+            return rendered
+
+        if dst_dir is not None:
+            return _clone_and_build(Path(dst_dir).expanduser())
+        with TemporaryDirectory() as td:
+            return _clone_and_build(Path(td))
+
+    def documents(
+        self,
+        dst_dir: Path | str | None = None,
+        *args,
+        cache: RenderCache | bool = True,
+    ) -> Generator[dict[str, Any], None, None]:
+        """Like render(), but yields the rendered objects as they are parsed from
+        the output of kustomize, while it is being read (kustomize writes it out
+        once the kustomization is built), instead of buffering the whole output
+        first. The output is cached as it is read.
+
+        Returns:
+            The rendered objects
+        """
+        render_cache = default_render_cache() if cache is True else cache or None
+
+        if isinstance(self.kustomization, Path):
+            root = self.kustomization.expanduser()
+            path = root / self.relpath
+            if (
+                render_cache is None
+                or (key := self._local_key(render_cache, root, args)) is None
+            ):
+                yield from self._build_iter(path, args)
+                return
+            yield from render_cache.documents(
+                key, lambda tee: self._build_iter(path, args, tee)
+            )
+            return
+
+        git_repo = self.kustomization
+        commit: str | None = None
+        git_key: str | None = None
+        if render_cache is not None:
+            commit, git_key = self._git_key(git_repo, render_cache, args)
+            if dst_dir is None and (rendered := render_cache.get(git_key)) is not None:
+                yield from load_all(rendered)
+                return
+
+        with ExitStack() as stack:
+            root = (
+                Path(dst_dir).expanduser()
+                if dst_dir is not None
+                else Path(stack.enter_context(TemporaryDirectory()))
+            )
+            self._clone(git_repo, root, commit)
+            if (
+                render_cache is not None
+                and git_key is not None
+                and self._cacheable_tree(root)
+            ):
+                tee = stack.enter_context(render_cache.writer(git_key))
+                yield from self._build_iter(root / self.relpath, args, tee)
+            else:
+                yield from self._build_iter(root / self.relpath, args)
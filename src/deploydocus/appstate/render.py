@@ -0,0 +1,193 @@
+import itertools
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import ExitStack, closing
+from queue import Full, Queue
+from threading import Event
+from typing import Any, Callable, Generator, Iterator, Sequence
+
+from deploydocus.package.kinds import sort_by_kind
+
+from .helm3 import HelmChartGitRepo, HelmRepoChart
+from .kustomize import Kustomization
+from .yamlutils import load_all
+
+logger = logging.getLogger(__name__)
+
+type RenderSource = HelmChartGitRepo | HelmRepoChart | Kustomization | Callable[[], str]
+
+DEFAULT_STREAM_BUFFER = 256
+"""The number of rendered objects of a source buffered ahead of the installer"""
+
+_DONE = object()
+
+
+def render_source(
+    source: RenderSource,
+    release_name: str | None = None,
+    namespace: str = "default",
+) -> str:
+    """Render a single source
+
+    Args:
+        source: A Helm chart, a kustomization or a callable returning rendered
+            manifests (for sources that need other arguments)
+        release_name: The release name of Helm charts
+        namespace: The namespace Helm charts are rendered for
+
+    Returns:
+        The rendered manifests
+    """
+    match source:
+        case HelmRepoChart():
+            return source.render(release_name, None, "--namespace", namespace)
+        case HelmChartGitRepo():
+            return source.render(
+                release_name, namespace, False, None, None, "--namespace", namespace
+            )
+        case Kustomization():
+            return source.render()
+        case _:
+            return source()
+
+
+def source_documents(
+    source: RenderSource,
+    release_name: str | None = None,
+    namespace: str = "default",
+) -> Generator[dict[str, Any], None, None]:
+    """Render a single source, yielding its objects as they are rendered: Helm
+    charts are parsed while helm writes them out (see helm_template_iter), so the
+    first objects are available before the render completes. Kustomizations (which
+    kustomize writes out at once) and the other sources are parsed one object at a
+    time.
+
+    Args:
+        source: See render_source
+        release_name: The release name of Helm charts
+        namespace: The namespace Helm charts are rendered for
+
+    Returns:
+        The rendered objects
+    """
+    match source:
+        case HelmRepoChart():
+            return source.documents(release_name, None, "--namespace", namespace)
+        case HelmChartGitRepo():
+            return source.documents(
+                release_name, namespace, False, None, None, "--namespace", namespace
+            )
+        case Kustomization():
+            return source.documents()
+        case _:
+            return load_all(source())
+
+
+def stream_all(
+    sources: Sequence[RenderSource],
+    release_name: str | None = None,
+    namespace: str = "default",
+    *,
+    buffer: int = DEFAULT_STREAM_BUFFER,
+    executor: Executor | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Render several sources concurrently, yielding their objects as they are
+    rendered, in the order of the sources (see source_documents).
+
+    Each source is rendered on a thread of its own, which keeps up to `buffer`
+    objects ahead of the consumer: the objects of the first source can be applied
+    while it and the other sources are still rendering. The objects are not sorted
+    (see PkgInstaller.apply, which applies them in waves as they come). When the
+    consumer stops early, the renders are stopped.
+
+    Args:
+        sources: The sources to render (see render_source)
+        release_name: The release name of Helm charts
+        namespace: The namespace Helm charts are rendered for
+        buffer: The maximum number of objects buffered per source
+        executor: The executor to run the renders on. Defaults to a thread per
+            source.
+
+    Returns:
+        The rendered objects
+
+    Raises:
+        Exception: The first error of a render, once the objects rendered
+            before it have been yielded
+    """
+    stop = Event()
+    queues: list[Queue] = [Queue(maxsize=buffer) for _ in sources]
+
+    def _put(queue: Queue, item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _pump(source: RenderSource, queue: Queue):
+        logger.debug(f"Rendering {source}")
+        try:
+            with closing(source_documents(source, release_name, namespace)) as objs:
+                for obj in objs:
+                    if not _put(queue, obj):
+                        return
+            _put(queue, _DONE)
+        except Exception as e:
+            _put(queue, e)
+
+    with ExitStack() as stack:
+        if executor is None:
+            executor = stack.enter_context(
+                ThreadPoolExecutor(max_workers=len(sources) or 1)
+            )
+        stack.callback(stop.set)
+        for source, queue in zip(sources, queues):
+            executor.submit(_pump, source, queue)
+        for queue in queues:
+            while (item := queue.get()) is not _DONE:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+
+def render_all(
+    sources: Sequence[RenderSource],
+    release_name: str | None = None,
+    namespace: str = "default",
+    *,
+    max_workers: int | None = None,
+    executor: Executor | None = None,
+) -> list[dict[str, Any]]:
+    """Render several sources concurrently and merge their objects.
+
+    The renders mostly wait on subprocesses (helm, kustomize, git), so they run in
+    a thread pool. The objects are in installation order (see `package.kinds`);
+    objects of the same kind keep the order of the sources, then the order in
+    which they were rendered.
+
+    Args:
+        sources: The sources to render (see render_source)
+        release_name: The release name of Helm charts
+        namespace: The namespace Helm charts are rendered for
+        max_workers: The maximum number of concurrent renders (when no executor is
+            given). Defaults to one per source.
+        executor: The executor to run the renders on, e.g. one shared with other
+            work
+
+    Returns:
+        The rendered objects
+    """
+
+    def _render(source: RenderSource) -> list[dict[str, Any]]:
+        logger.debug(f"Rendering {source}")
+        return list(source_documents(source, release_name, namespace))
+
+    if executor is not None:
+        rendered = list(executor.map(_render, sources))
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers or len(sources) or 1) as ex:
+            rendered = list(ex.map(_render, sources))
+    return sort_by_kind(itertools.chain.from_iterable(rendered))
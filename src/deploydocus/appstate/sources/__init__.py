@@ -1,3 +1,17 @@
-from .git import GitRepo, GitUrl, NotGitRepoError
+from .git import (
+    GitMirrorCache,
+    GitRefError,
+    GitRepo,
+    GitUrl,
+    NotGitRepoError,
+    repo_relpath,
+)
 
-__all__ = ["GitRepo", "NotGitRepoError", "GitUrl"]
+__all__ = [
+    "GitRepo",
+    "NotGitRepoError",
+    "GitUrl",
+    "GitMirrorCache",
+    "repo_relpath",
+    "GitRefError",
+]
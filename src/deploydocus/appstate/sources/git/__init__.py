@@ -1,3 +1,11 @@
-from .git import GitRepo, GitUrl, NotGitRepoError
+from .git import GitRefError, GitRepo, GitUrl, NotGitRepoError, repo_relpath
+from .mirror import GitMirrorCache
 
-__all__ = ["GitRepo", "NotGitRepoError", "GitUrl"]
+__all__ = [
+    "GitRepo",
+    "NotGitRepoError",
+    "GitUrl",
+    "GitMirrorCache",
+    "repo_relpath",
+    "GitRefError",
+]
@@ -1,22 +1,57 @@
+import os
 import re
 from pathlib import Path
-from typing import Annotated, Sequence, cast
+from typing import Annotated, Callable, Iterable, Sequence, cast
 
 import pydantic
 from plumbum import local
 from pydantic import Field, UrlConstraints, field_validator
 from pydantic_core import Url
 
-from ...binutils import git
+from ... import binutils
+from .mirror import GitMirrorCache, default_git_mirror
 
 GIT_POSTFIX = ".git"
 
 _url_path_re = re.compile(r"/([\w-]+)/([\w-]+)(.git)?")
 
+_commit_sha_re = re.compile(r"[0-9a-f]{40}")
+
 
 class NotGitRepoError(Exception): ...
 
 
+class GitRefError(Exception):
+    """The branch (or tag) is not in the remote repo"""
+
+
+def repo_relpath(base: Path, path: str) -> Path | None:
+    """The path, relative to the root of the repo, of a path relative to a
+    directory of the repo. None if the path is outside the repo.
+
+    Args:
+        base: The directory the path is relative to (relative to the root)
+        path: The path
+    """
+    resolved = Path(os.path.normpath(base / path))
+    if resolved.is_absolute() or resolved.parts[:1] == ("..",):
+        return None
+    return resolved
+
+
+def _sparse_checkout(dst_dir: Path, subcommand: str, paths: Sequence[Path | str]):
+    """Run `git sparse-checkout set|add` (cone mode) in a clone"""
+    sparse_checkout = binutils.git["-C", dst_dir, "sparse-checkout", subcommand]
+    if subcommand == "set":
+        sparse_checkout = sparse_checkout["--cone"]
+    ret_code, stdout, stderr = sparse_checkout[
+        *(Path(p).as_posix() for p in paths)
+    ].run()
+    assert ret_code == 0, (
+        f"git sparse-checkout execution error {ret_code=}, {stdout=}," f" {stderr=}"
+    )
+
+
 GitUrl = Annotated[
     Url,
     UrlConstraints(allowed_schemes=["https", "git+https"]),
@@ -30,6 +65,7 @@ class GitRepo(pydantic.BaseModel):
     _cloned = False
     _dst_dir: Path | None = None
     _curr_branch: str | None = None
+    _commit: str | None = None
 
     @field_validator("url", mode="before")
     @classmethod
@@ -46,13 +82,31 @@ class GitRepo(pydantic.BaseModel):
         self,
         dst_dir: Path | str,
         args: Sequence[str] | None = None,
+        *,
+        mirror: GitMirrorCache | bool = True,
+        sparse_paths: Sequence[Path | str] | None = None,
+        commit: str | None = None,
     ):
         """Clone the Git repo to destination directory. By default only a single
         branch is cloned.
 
+        With `sparse_paths`, the clone is a partial clone (`--filter=blob:none`)
+        and only those directories (plus the files at the root of the repo) are
+        checked out, so only their blobs are downloaded. More directories can be
+        checked out later with sparse_checkout().
+
         Args:
             dst_dir: The destination directory to clone to
             args: Additional arguments passed to `git clone`
+            mirror: Clone from a local mirror of the repo (see GitMirrorCache),
+                which is fetched incrementally instead of downloading the repo
+                again. True for the default mirror cache, False to clone from the
+                remote.
+            sparse_paths: The directories to check out (relative to the root of
+                the repo). None checks out the whole tree.
+            commit: The commit to check out (detached), e.g. as returned by
+                resolve_commit(), so that the clone matches it even if the branch
+                moved in between. Defaults to `branch` if it is a commit SHA.
 
         Returns:
             None
@@ -67,8 +121,12 @@ class GitRepo(pydantic.BaseModel):
 
         dst_dir = Path(dst_dir)
         args = args or tuple()
+        commit = commit or self.pinned_commit
+        # A commit SHA cannot be cloned as a branch: clone the default branch and
+        # fetch the commit if needed
+        branch = None if self.pinned_commit else self.branch
         clone_branch_args: list[str] = []
-        match self.branch, self.depth:
+        match branch, self.depth:
             case "*", 0:  # clone all branches and all depths
                 pass
             case "*", _:  # clone all branches and to specified depth
@@ -79,7 +137,7 @@ class GitRepo(pydantic.BaseModel):
                 clone_branch_args.append("--single-branch")
             case _, 0:
                 clone_branch_args.extend(
-                    ["--single-branch", "--branch", cast(str, self.branch)]
+                    ["--single-branch", "--branch", cast(str, branch)]
                 )
             case None, _:
                 clone_branch_args.extend(
@@ -92,31 +150,176 @@ class GitRepo(pydantic.BaseModel):
                         str(self.depth),
                         "--single-branch",
                         "--branch",
-                        cast(str, self.branch),
+                        cast(str, branch),
                     ]
                 )
 
-        args = (*clone_branch_args, *args)
-        clone = git["clone", *args, str(self.url), dst_dir]
-        ret_code, stdout, stderr = clone.run()
+        git_mirror = default_git_mirror() if mirror is True else mirror or None
+        if git_mirror is not None:
+            # A clone from the mirror shares its objects: --depth would not save
+            # anything (and git ignores it for local clones anyway)
+            if "--depth" in clone_branch_args:
+                i = clone_branch_args.index("--depth")
+                del clone_branch_args[i : i + 2]
+            git_mirror.clone(
+                str(self.url),
+                dst_dir,
+                args=(*clone_branch_args, *args),
+                partial=sparse_paths is not None,
+            )
+        else:
+            if sparse_paths is not None:
+                clone_branch_args.append("--filter=blob:none")
+            args = ("--no-checkout", *clone_branch_args, *args)
+            clone = binutils.git["clone", *args, str(self.url), dst_dir]
+            ret_code, stdout, stderr = clone.run()
+            assert ret_code == 0, (
+                f"git clone execution error {ret_code=}, {stdout=}," f" {stderr=}"
+            )
+
+        checkout = binutils.git["-C", dst_dir, "checkout"]
+        if commit is not None:
+            has_commit = binutils.git[
+                "-C", dst_dir, "cat-file", "-e", f"{commit}^{{commit}}"
+            ]
+            if has_commit.run(retcode=None)[0] != 0:
+                fetch = binutils.git["-C", dst_dir, "fetch"]
+                if self.depth:
+                    fetch = fetch["--depth", str(self.depth)]
+                fetch["origin", commit]()
+            checkout = checkout["--detach", commit]
+
+        if sparse_paths is not None:
+            _sparse_checkout(dst_dir, "set", sparse_paths)
+        ret_code, stdout, stderr = checkout.run()
         assert ret_code == 0, (
-            f"git clone execution error {ret_code=}, {stdout=}," f" {stderr=}"
+            f"git checkout execution error {ret_code=}, {stdout=}," f" {stderr=}"
         )
 
         if self.branch is None or self.branch == "*":
-            self._git_curr_branch = git["branch", "--show-branch"]
+            self._git_curr_branch = binutils.git["branch", "--show-branch"]
         self._cloned = True
         self._dst_dir = dst_dir
 
+    def sparse_clone(
+        self,
+        dst_dir: Path | str,
+        paths: Sequence[Path | str],
+        args: Sequence[str] | None = None,
+        *,
+        dependencies: Callable[[Path, Path], Iterable[Path]] | None = None,
+        mirror: GitMirrorCache | bool = True,
+        commit: str | None = None,
+    ):
+        """Clone the Git repo checking out only some directories, and the
+        directories they depend on.
+
+        Args:
+            dst_dir: The destination directory to clone to
+            paths: The directories to check out (relative to the root of the repo)
+            args: Additional arguments passed to `git clone`
+            dependencies: Given the root of the clone and a checked out directory,
+                returns the directories it depends on (relative to the root of the
+                repo), e.g. the bases of a kustomization. They are checked out in
+                turn, until no new directory is found.
+            mirror: See clone()
+            commit: See clone()
+        """
+        if any(Path(p) == Path(".") for p in paths):
+            self.clone(dst_dir, args=args, mirror=mirror, commit=commit)
+            return
+        self.clone(dst_dir, args=args, mirror=mirror, sparse_paths=paths, commit=commit)
+        if dependencies is None:
+            return
+        root = cast(Path, self._dst_dir)
+        checked_out = {Path(p) for p in paths}
+        pending = set(checked_out)
+        while pending:
+            found = {
+                d for path in pending for d in dependencies(root, path)
+            } - checked_out
+            if found:
+                self.sparse_checkout(sorted(found))
+            checked_out |= found
+            pending = found
+
+    def sparse_checkout(self, paths: Sequence[Path | str]):
+        """Check out more directories of a clone made with `sparse_paths`
+
+        Args:
+            paths: The directories (relative to the root of the repo)
+        """
+        assert self._dst_dir is not None, "Repo not cloned"
+        _sparse_checkout(self._dst_dir, "add", paths)
+
     @property
     def root(self) -> Path | None:
         return self._dst_dir
 
+    @property
+    def pinned_commit(self) -> str | None:
+        """The commit, if `branch` is a full commit SHA (rather than a branch or a
+        tag name)
+        """
+        if self.branch is not None and _commit_sha_re.fullmatch(self.branch):
+            return self.branch
+        return None
+
+    def resolve_commit(self) -> str:
+        """Resolve `branch` (the default branch if None or "*") to the commit SHA it
+        currently points to with `git ls-remote`, which does not clone or fetch
+        anything. A branch that is a commit SHA resolves to itself.
+
+        Returns:
+            The commit SHA (also available as `commit` afterward)
+
+        Raises:
+            GitRefError: The branch (or tag) does not exist
+        """
+        if (commit := self.pinned_commit) is None:
+            ref = "HEAD" if self.branch in (None, "*") else cast(str, self.branch)
+            patterns = [ref] if ref == "HEAD" else [ref, f"{ref}^{{}}"]
+            ls_remote = binutils.git["ls-remote", str(self.url), *patterns]
+            ret_code, stdout, stderr = ls_remote.run()
+            assert ret_code == 0, (
+                f"git ls-remote execution error {ret_code=}, {stdout=}," f" {stderr=}"
+            )
+            refs: dict[str, str] = {}
+            for line in stdout.splitlines():
+                sha, _, name = line.partition("\t")
+                refs[name] = sha
+            # Branches first, then tags (peeled for annotated tags)
+            for name in ("HEAD", f"refs/heads/{ref}", f"refs/tags/{ref}^{{}}"):
+                if (commit := refs.get(name)) is not None:
+                    break
+            else:
+                if (commit := refs.get(f"refs/tags/{ref}")) is None:
+                    raise GitRefError(f"{ref} not found in {self.url}")
+        self._commit = commit
+        return commit
+
+    @property
+    def commit(self) -> str | None:
+        """The commit SHA last resolved by resolve_commit(), if any"""
+        return self._commit
+
+    @property
+    def head_commit(self) -> str:
+        """The commit checked out in the clone"""
+        assert self._dst_dir is not None, "Repo not cloned"
+        ret_code, stdout, stderr = binutils.git[
+            "-C", self._dst_dir, "rev-parse", "HEAD"
+        ].run()
+        assert ret_code == 0, (
+            f"git rev-parse failed: {ret_code=}, {stdout=}," f" {stderr=}"
+        )
+        return stdout.strip()
+
     @property
     def current_branch(self) -> str:
         if self._curr_branch is None:
             cd = local["cd"][self._dst_dir]
-            gb = git["branch"]["--show-branch"]
+            gb = binutils.git["branch"]["--show-branch"]
             ret_code, stdout, stderr = gb[cd].run()
             assert ret_code == 0, (
                 f"git current branch failed: {ret_code=}, {stdout=}," f" {stderr=}"
@@ -0,0 +1,184 @@
+import fcntl
+import functools
+import hashlib
+import logging
+import re
+import shutil
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Lock
+from typing import Iterator
+
+from ... import binutils
+from ...cache import default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+_unsafe_chars_re = re.compile(r"[^\w.-]+")
+
+
+class GitMirrorCache:
+    """Bare mirrors of Git repos, kept under a cache directory and updated with
+    incremental fetches. Clones are made from the mirror with `git clone --shared`,
+    so they reuse the mirror's objects instead of downloading them again.
+
+    A mirror is locked while it is created, fetched or cloned from: with a lock
+    file (fcntl.flock) against other processes and with a threading.Lock against
+    the other threads of this process.
+
+    A repo has up to two mirrors: a full one and a partial one, without blobs
+    (`--filter=blob:none`), for the sparse checkouts. They are kept apart so that
+    a sparse checkout never turns the full mirror into a partial one, whose blobs
+    every clone would then download from the remote again. A sparse checkout uses
+    the full mirror when there is one.
+
+    Note: shared clones borrow the objects of the mirror. They are meant to be
+    short-lived (e.g. rendered from, then removed), not kept around while the
+    mirror is garbage collected.
+    """
+
+    cache_dir: Path
+
+    def __init__(self, cache_dir: Path | str | None = None):
+        """
+
+        Args:
+            cache_dir: Where the mirrors are kept. Defaults to the "git" directory
+                of appstate.cache.default_cache_dir()
+        """
+        self.cache_dir = (
+            Path(cache_dir) if cache_dir is not None else default_cache_dir() / "git"
+        )
+        self._locks: defaultdict[Path, Lock] = defaultdict(Lock)
+        self._locks_lock = Lock()
+
+    def mirror_path(self, url: str, partial: bool = False) -> Path:
+        """The directory of the bare mirror of a repo, or of its partial mirror"""
+        digest = hashlib.sha256(url.encode()).hexdigest()[:16]
+        name = _unsafe_chars_re.sub("_", url.rsplit("/", 1)[-1])
+        return self.cache_dir / f"{digest}-{name}{'.partial' if partial else ''}"
+
+    @contextmanager
+    def locked(self, url: str, partial: bool = False) -> Iterator[Path]:
+        """Hold the lock of the mirror of a repo
+
+        Args:
+            url: The url of the repo
+            partial: The partial mirror rather than the full one
+
+        Returns:
+            The directory of the mirror (which may not exist yet)
+        """
+        path = self.mirror_path(url, partial)
+        with self._locks_lock:
+            thread_lock = self._locks[path]
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with thread_lock, open(path.parent / f"{path.name}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield path
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _update(self, url: str, path: Path, partial: bool = False):
+        """Create the mirror or fetch the changes since the last update. The lock
+        of the mirror must be held.
+
+        The partial mirror (without any blob, `--filter=blob:none`) is created if
+        `partial` is True. Fetches keep the filter the mirror was created with.
+        """
+        if path.exists() and not partial and _partial_clone_filter(path):
+            # A full mirror left without blobs by an earlier version
+            logger.info(f"Mirroring {url} again into {path}, with its blobs")
+            shutil.rmtree(path)
+        if path.exists():
+            logger.debug(f"Fetching {url} into {path}")
+            cmd = binutils.git["-C", path, "fetch", "--prune", "--tags", "origin"]
+            ret_code, stdout, stderr = cmd.run(retcode=None)
+            assert (
+                ret_code == 0
+            ), f"git fetch execution error {ret_code=}, {stdout=}, {stderr=}"
+            return
+        logger.debug(f"Mirroring {url} into {path}")
+        # Clone next to the final location, so that an interrupted clone never
+        # leaves an incomplete mirror behind
+        with TemporaryDirectory(dir=self.cache_dir, prefix=".") as td:
+            tmp_path = Path(td) / "mirror.git"
+            filter_args = ["--filter=blob:none"] if partial else []
+            cmd = binutils.git["clone", "--mirror", *filter_args, url, tmp_path]
+            ret_code, stdout, stderr = cmd.run(retcode=None)
+            assert (
+                ret_code == 0
+            ), f"git clone execution error {ret_code=}, {stdout=}, {stderr=}"
+            tmp_path.rename(path)
+
+    def update(self, url: str, partial: bool = False) -> Path:
+        """Create or update the mirror of a repo
+
+        Args:
+            url: The url of the repo
+            partial: The partial mirror (without blobs) rather than the full one
+
+        Returns:
+            The directory of the mirror
+        """
+        with self.locked(url, partial) as path:
+            self._update(url, path, partial)
+        return path
+
+    def clone(
+        self,
+        url: str,
+        dst_dir: Path | str,
+        args: tuple[str, ...] = (),
+        *,
+        partial: bool = False,
+    ):
+        """Update the mirror of a repo, then clone it from the mirror, without
+        checking out any file. The origin of the clone is the url of the repo, not
+        the mirror.
+
+        Clones from the partial mirror are made partial clones of the repo, so that
+        the blobs missing from the mirror are fetched from the repo (into the
+        clone) when the files are checked out.
+
+        Args:
+            url: The url of the repo
+            dst_dir: The destination directory
+            args: Additional arguments passed to `git clone`
+            partial: Clone from the partial mirror, unless there is a full mirror
+                already (e.g. for a sparse checkout)
+        """
+        if partial and self.mirror_path(url).exists():
+            partial = False
+        with self.locked(url, partial) as path:
+            self._update(url, path, partial)
+            cmd = binutils.git[
+                "clone", "--shared", "--no-checkout", *args, path, dst_dir
+            ]
+            ret_code, stdout, stderr = cmd.run(retcode=None)
+            assert (
+                ret_code == 0
+            ), f"git clone execution error {ret_code=}, {stdout=}, {stderr=}"
+            partial_clone_filter = _partial_clone_filter(path)
+        git_config = binutils.git["-C", dst_dir, "config"]
+        binutils.git["-C", dst_dir, "remote", "set-url", "origin", url]()
+        if partial_clone_filter:
+            git_config["remote.origin.promisor", "true"]()
+            git_config["remote.origin.partialclonefilter", partial_clone_filter]()
+
+
+def _partial_clone_filter(path: Path) -> str | None:
+    """The filter of a partial clone or mirror, None if it has all the objects"""
+    ret_code, stdout, _ = binutils.git[
+        "-C", path, "config", "remote.origin.partialclonefilter"
+    ].run(retcode=None)
+    return (stdout.strip() or None) if ret_code == 0 else None
+
+
+@functools.cache
+def default_git_mirror() -> GitMirrorCache:
+    """The mirror cache shared by all the GitRepos that do not get a specific one"""
+    return GitMirrorCache()
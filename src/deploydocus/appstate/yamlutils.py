@@ -0,0 +1,111 @@
+from io import BufferedReader
+from pathlib import Path
+from subprocess import PIPE
+from tempfile import TemporaryFile
+from typing import IO, TYPE_CHECKING, Any, Generator
+
+import yaml
+
+if TYPE_CHECKING:
+    from _typeshed import SupportsRead
+
+# The libyaml based loader is much faster; the pure Python one is the fallback when
+# pyyaml was built without libyaml
+SafeLoader: type = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+type Stream = str | bytes | SupportsRead[str] | SupportsRead[bytes]
+"""YAML text, or a file object or anything else with a read() method (e.g. a
+reader of a pipe), as accepted by the yaml loaders"""
+
+
+def load(stream: Stream) -> Any:
+    """Load a single YAML document with the fastest safe loader available"""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def load_file(path: Path | str) -> Any:
+    """Load a YAML file holding a single document"""
+    with open(path, "rb") as f:
+        return load(f)
+
+
+def load_all(stream: Stream) -> Generator[Any, None, None]:
+    """Load the documents of a YAML stream one at a time, with the fastest safe
+    loader available. When the stream is a file (e.g. the stdout of a process), it
+    is read incrementally: each document is yielded as soon as it has been read,
+    and only one document is held in memory at a time.
+
+    Empty documents (e.g. between two consecutive `---`) are skipped.
+
+    Args:
+        stream: The YAML text or a file object (text or binary), or anything with
+            a read() method
+
+    Returns:
+        The documents
+    """
+    for document in yaml.load_all(stream, Loader=SafeLoader):
+        if document is not None:
+            yield document
+
+
+class _PipeReader:
+    """Reads what is available from a pipe, instead of waiting for a full buffer
+    (the YAML loaders read by large blocks), and optionally copies what it reads to
+    another file
+    """
+
+    def __init__(self, src: BufferedReader, tee: IO[bytes] | None = None):
+        self._src = src
+        self._tee = tee
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._src.read1(size)
+        if self._tee is not None:
+            self._tee.write(data)
+        return data
+
+
+def load_all_output(
+    command: Any,
+    *,
+    tee: IO[bytes] | None = None,
+    error: type[Exception] = RuntimeError,
+) -> Generator[Any, None, None]:
+    """Run a command and load the documents of its output as it writes them out
+    (see load_all): the first documents are available before the command
+    completes. If the documents are not all consumed, the command is terminated.
+
+    Args:
+        command: The (plumbum) command, e.g. `helm template ...`
+        tee: A binary file to which the output is copied as it is read (e.g. a
+            render cache entry, see RenderCache.writer)
+        error: The exception raised if the command fails
+
+    Returns:
+        The documents
+
+    Raises:
+        error: If the command fails (once its output has been consumed), with
+            its stderr
+    """
+    # stderr goes to a file so that the command never blocks on a full pipe
+    with TemporaryFile() as stderr:
+        proc = command.popen(stdout=PIPE, stderr=stderr)
+        completed = False
+        try:
+            yield from load_all(_PipeReader(proc.stdout, tee))
+            completed = True
+        finally:
+            proc.stdout.close()
+            if not completed:
+                # Stopped early: do not wait for the command to write everything
+                proc.terminate()
+            proc.wait()
+        if proc.returncode != 0:
+            stderr.seek(0)
+            raise error(
+                f"{command} failed, returncode={proc.returncode}, "
+                f"stderr={stderr.read().decode(errors='replace')}"
+            )
@@ -0,0 +1,230 @@
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import json
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+from deploydocus.appstate.yamlutils import load_file
+from deploydocus.package.pkg import AbstractK8sPkg
+from deploydocus.package.settings import InstanceSettings
+from deploydocus.package.utils import settings_file_path
+
+
+class PkgLoadError(Exception):
+    """The package or its settings could not be loaded"""
+
+
+# Releases are loaded concurrently; a module file must only be executed once
+_load_lock = threading.RLock()
+
+
+@dataclass
+class Release:
+    """An instance of a package to reconcile"""
+
+    name: str
+    """The name of the release (the instance name, unless the settings have one)"""
+    filepath: Path | None = None
+    """The file or directory of the package module"""
+    module: str | None = None
+    """The name of the package module (exclusive of filepath)"""
+    settings: dict[str, Any] = field(default_factory=dict)
+    """The instance settings, as in release.json"""
+
+
+def load_module(
+    filepath: Path | str | None = None, module: str | None = None
+) -> ModuleType:
+    """Import the module of a package, either from a file (a .py file or the
+    directory of a package) or by its name
+
+    Args:
+        filepath: The file or directory of the module
+        module: The name of the module, importable from the sys.path
+
+    Returns:
+        The module
+    """
+    if filepath is not None and module is None:
+        with _load_lock:
+            return _load_file_module(Path(filepath).expanduser().resolve())
+    if module is not None and filepath is None:
+        return importlib.import_module(module)
+    raise PkgLoadError("Exactly one of filepath and module is required")
+
+
+def _file_module_name(path: Path) -> str:
+    """The name a module file is imported under: unique to the file, so that it
+    can neither replace nor be replaced by another module (e.g. a package file
+    named json.py)
+    """
+    return f"deploydocus_pkg_{hashlib.sha256(str(path).encode()).hexdigest()[:16]}"
+
+
+def _load_file_module(path: Path) -> ModuleType:
+    if path.is_dir():
+        path = path / "__init__.py"
+    if not path.is_file():
+        raise PkgLoadError(f"No module at {path}")
+    name = _file_module_name(path)
+    if (loaded := sys.modules.get(name)) is not None:
+        return loaded
+    spec = importlib.util.spec_from_file_location(
+        name,
+        path,
+        submodule_search_locations=(
+            [str(path.parent)] if path.name == "__init__.py" else None
+        ),
+    )
+    assert spec is not None and spec.loader is not None, f"Cannot load {path}"
+    loaded = importlib.util.module_from_spec(spec)
+    # Registered first, so that the relative imports of a package resolve
+    sys.modules[name] = loaded
+    try:
+        spec.loader.exec_module(loaded)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return loaded
+
+
+def _only_subclass(module: ModuleType, base: type) -> type:
+    found = {
+        obj
+        for _, obj in inspect.getmembers(module, inspect.isclass)
+        if issubclass(obj, base) and obj is not base and not inspect.isabstract(obj)
+    }
+    if len(found) > 1:
+        # Prefer the classes defined by the module (or its package) over the
+        # classes it imports
+        found = {c for c in found if c.__module__.startswith(module.__name__)}
+    if len(found) != 1:
+        raise PkgLoadError(
+            f"Expected a single {base.__name__} in {module.__name__}, found "
+            f"{sorted(c.__qualname__ for c in found)}"
+        )
+    return found.pop()
+
+
+def find_pkg_classes(
+    module: ModuleType,
+) -> tuple[type[AbstractK8sPkg], type[InstanceSettings]]:
+    """Look up the package class and its settings class in a module: the only
+    concrete subclass of AbstractK8sPkg and the only subclass of InstanceSettings
+    it holds
+
+    Args:
+        module: The module of the package
+
+    Returns:
+        The package class and the instance settings class
+    """
+    return _only_subclass(module, AbstractK8sPkg), _only_subclass(
+        module, InstanceSettings
+    )
+
+
+def load_pkg(release: Release) -> AbstractK8sPkg:
+    """Build the package of a release: import its module, build its instance
+    settings and instantiate it. The package name and version come from the
+    pkg.json next to the module, if any.
+
+    Args:
+        release: The release
+
+    Returns:
+        The package
+    """
+    module = load_module(release.filepath, release.module)
+    pkg_class, settings_class = find_pkg_classes(module)
+    settings = settings_class(**{"instance_name": release.name, **release.settings})
+
+    pkg_kwargs: dict[str, Any] = {}
+    if getattr(module, "__file__", None):
+        pkg_json = settings_file_path(module.__file__, "pkg.json")  # type: ignore
+        if pkg_json.is_file():
+            with open(pkg_json, "rt") as f:
+                pkg_kwargs = json.load(f)
+    return pkg_class(settings, **pkg_kwargs)
+
+
+def load_settings(path: Path) -> dict[str, Any]:
+    """Read instance settings (e.g. a release.json) from a JSON or YAML file"""
+    settings = load_file(path) or {}
+    if not isinstance(settings, dict):
+        raise PkgLoadError(f"The settings in {path} are not a mapping")
+    return settings
+
+
+def load_releases(
+    releases: Path | str,
+    *,
+    filepath: Path | str | None = None,
+    module: str | None = None,
+) -> list[Release]:
+    """Read the releases to reconcile, either from a directory or from a manifest.
+
+    A directory holds the settings (release.json) of one release per JSON or YAML
+    file, the file name being the release name; they all use the package given by
+    filepath or module.
+
+    A manifest (JSON or YAML) lists the releases, each with a `name`, the
+    `filepath` or `module` of its package (defaults to the given ones) and its
+    `settings`, or a `settings_file` (relative to the manifest).
+
+    Args:
+        releases: The directory or manifest
+        filepath: The file or directory of the package module
+        module: The name of the package module
+
+    Returns:
+        The releases
+    """
+    releases = Path(releases).expanduser()
+    default_filepath = Path(filepath) if filepath is not None else None
+    if releases.is_dir():
+        return [
+            Release(
+                name=path.stem,
+                filepath=default_filepath,
+                module=module,
+                settings=load_settings(path),
+            )
+            for path in sorted(releases.iterdir())
+            if path.suffix in (".json", ".yaml", ".yml")
+        ]
+
+    entries = load_file(releases)
+    if isinstance(entries, dict):
+        entries = entries.get("releases")
+    if not isinstance(entries, list):
+        raise PkgLoadError(f"{releases} does not list releases")
+    loaded: list[Release] = []
+    for entry in entries:
+        if entry.get("filepath") is not None:
+            entry_filepath, entry_module = releases.parent / entry["filepath"], None
+        elif entry.get("module") is not None:
+            entry_filepath, entry_module = None, entry["module"]
+        else:
+            entry_filepath, entry_module = default_filepath, module
+        settings = dict(entry.get("settings") or {})
+        if entry.get("settings_file"):
+            settings = {
+                **load_settings(releases.parent / entry["settings_file"]),
+                **settings,
+            }
+        loaded.append(
+            Release(
+                name=entry["name"],
+                filepath=entry_filepath,
+                module=entry_module,
+                settings=settings,
+            )
+        )
+    return loaded
@@ -1,38 +1,300 @@
-from typing import Annotated
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Annotated, NamedTuple
 
 import typer
 
+# The package modules (and so the kubernetes client, pydantic...) are imported by
+# the commands that need them, not at startup
+
 app = typer.Typer(no_args_is_help=True)
 
 
+class ReconcileResult(NamedTuple):
+    """The outcome of the reconciliation of a release"""
+
+    name: str
+    seconds: float
+    applied: int = 0
+    pruned: int = 0
+    error: BaseException | None = None
+
+
+def _reconcile(installer, release, max_workers: int) -> ReconcileResult:
+    from .loader import load_pkg
+
+    start = time.perf_counter()
+    try:
+        pkg = load_pkg(release)
+        pruned: list = []
+        applied = installer.upgrade_current_installation(
+            pkg, create_allowed=True, pruned=pruned, max_workers=max_workers
+        )
+    except Exception as e:
+        return ReconcileResult(release.name, time.perf_counter() - start, error=e)
+    return ReconcileResult(
+        release.name, time.perf_counter() - start, len(applied), len(pruned)
+    )
+
+
+def _print_summary(results: list[ReconcileResult], seconds: float):
+    width = max([len(r.name) for r in results] + [len("RELEASE")])
+    typer.echo(f"{'RELEASE':<{width}}  STATUS  {'TIME':>8}  APPLIED  PRUNED")
+    for r in results:
+        status = "failed" if r.error is not None else "ok"
+        typer.echo(
+            f"{r.name:<{width}}  {status:<6}  {r.seconds:>7.2f}s  "
+            f"{r.applied:>7}  {r.pruned:>6}"
+        )
+    failed = [r for r in results if r.error is not None]
+    typer.echo(
+        f"{len(results)} release(s) in {seconds:.2f}s, {len(failed)} failed",
+    )
+    for r in failed:
+        typer.echo(f"{r.name}: {r.error!r}", err=True)
+
+
 @app.command(name="recon")
 def reconcile(
-    appname: Annotated[str, typer.Argument(help="Application name")],
-    filepath: Annotated[str | None, typer.Option(help="Path to script")] = None,
+    appname: Annotated[
+        str | None,
+        typer.Argument(help="Application (instance) name, unless --releases is used"),
+    ] = None,
+    filepath: Annotated[
+        Path | None,
+        typer.Option(help="Path to the package module (a .py file or a directory)"),
+    ] = None,
     module: Annotated[str | None, typer.Option(help="Module name")] = None,
+    release: Annotated[
+        Path | None,
+        typer.Option(help="The instance settings (release.json) of the application"),
+    ] = None,
+    releases: Annotated[
+        Path | None,
+        typer.Option(
+            help="A directory of instance settings files (one release per file) or "
+            "a manifest listing the releases, to reconcile them all"
+        ),
+    ] = None,
+    workers: Annotated[
+        int, typer.Option(help="The number of releases reconciled concurrently")
+    ] = 4,
+    api_workers: Annotated[
+        int,
+        typer.Option(help="The number of components applied concurrently per release"),
+    ] = 1,
     context: Annotated[
         str | None,
         typer.Option(
             help="Context ",
         ),
     ] = None,
+    kubeconfig: Annotated[Path | None, typer.Option(help="The kubeconfig file")] = None,
 ):
-    """Does the equivalent of a `kubectl apply -f -` with a rendered manifest
+    """Does the equivalent of a `kubectl apply -f -` with a rendered manifest: the
+    package is installed, or upgraded (objects whose spec changed are patched,
+    objects no longer rendered are pruned)
 
     Args:
-        module:
         appname: Name of the application
-        filepath:
-        context:
+        filepath: The file or directory of the package module
+        module: The name of the package module
+        release: The instance settings file
+        releases: The releases to reconcile (see loader.load_releases)
+        workers: The maximum number of releases reconciled concurrently
+        api_workers: The maximum number of components of a release applied
+            concurrently
+        context: The kubeconfig context
+        kubeconfig: The kubeconfig file
 
     Returns:
 
     """
-    print(f"{appname=} {filepath=} {module=} {context=}")
+    from deploydocus.installer import ClusterContext
+
+    from .loader import Release, load_releases, load_settings
+
+    if releases is not None:
+        batch = load_releases(releases, filepath=filepath, module=module)
+    elif appname is not None:
+        batch = [
+            Release(
+                name=appname,
+                filepath=filepath,
+                module=module,
+                settings=load_settings(release) if release is not None else {},
+            )
+        ]
+    else:
+        raise typer.BadParameter("Either an appname or --releases is required")
+
+    workers = max(min(workers, len(batch)), 1)
+    start = time.perf_counter()
+    with ClusterContext(
+        context=context,
+        config_file=kubeconfig,
+        pool_maxsize=max(workers * api_workers, 1),
+    ) as ctx:
+        installer = ctx.pkg_installer()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(lambda r: _reconcile(installer, r, api_workers), batch)
+            )
+    _print_summary(results, time.perf_counter() - start)
+    if any(r.error is not None for r in results):
+        raise typer.Exit(code=1)
+
+
+def _print_found(found: list, verb: str):
+    counts: Counter[tuple[str, str]] = Counter(
+        (c.metadata.namespace or "-", c.kind) for c in found
+    )
+    for c in found:
+        typer.echo(
+            f"{c.metadata.namespace or '-':<20}  {c.kind:<24}  {c.metadata.name}"
+        )
+    typer.echo("")
+    for (namespace, kind), count in sorted(counts.items()):
+        typer.echo(f"{namespace:<20}  {kind:<24}  {count}")
+    namespaces = {namespace for namespace, _ in counts if namespace != "-"}
+    typer.echo(f"{len(found)} object(s) in {len(namespaces)} namespace(s) {verb}")
 
 
 @app.command(name="reverse", help="Uninstall the application defined by the appname")
 def uninstall(
-    appname: Annotated[str, typer.Argument(help="Application name")],
+    appname: Annotated[str, typer.Argument(help="Application (instance) name")],
+    namespace: Annotated[
+        list[str] | None,
+        typer.Option(
+            "--namespace",
+            "-n",
+            help="A namespace to uninstall from (repeatable). All by default",
+        ),
+    ] = None,
+    pkg_name: Annotated[
+        str | None, typer.Option(help="Only uninstall the releases of this package")
+    ] = None,
+    dry_run: Annotated[
+        bool, typer.Option(help="List what would be deleted, without deleting")
+    ] = False,
+    workers: Annotated[
+        int, typer.Option(help="The number of concurrent API requests")
+    ] = 8,
+    propagation_policy: Annotated[
+        str | None,
+        typer.Option(help="Foreground, Background or Orphan. Defaults per kind"),
+    ] = None,
+    context: Annotated[str | None, typer.Option(help="Context ")] = None,
+    kubeconfig: Annotated[Path | None, typer.Option(help="The kubeconfig file")] = None,
+):
+    """Uninstall the releases of an application found by their labels (the
+    `default_selectors` of its packages) in the given namespaces, or all of them.
+    Each kind is looked up with a single label selector query, and the objects
+    found are deleted concurrently, kind by kind in the reverse of installation
+    order.
+
+    Args:
+        appname: The instance name of the releases
+        namespace: The namespaces to look in. All if empty
+        pkg_name: The package name of the releases. Any if None
+        dry_run: If True, only list the objects that would be deleted
+        workers: The maximum number of concurrent API requests
+        propagation_policy: The propagation policy of the deletes
+        context: The kubeconfig context
+        kubeconfig: The kubeconfig file
+
+    Returns:
+
+    """
+    from deploydocus.installer import ClusterContext
+    from deploydocus.package.pkg import release_selectors
+
+    selectors = ",".join(
+        f"{k}={v}" for k, v in release_selectors(appname, pkg_name).items()
+    )
+    start = time.perf_counter()
+    with ClusterContext(
+        context=context, config_file=kubeconfig, pool_maxsize=max(workers, 1)
+    ) as ctx:
+        installer = ctx.pkg_installer()
+        found = installer.find_installed(
+            selectors, namespace or None, max_workers=workers
+        )
+        if dry_run:
+            _print_found(found, "would be deleted")
+            return
+        deleted = installer.delete_installed(
+            found, max_workers=workers, propagation_policy=propagation_policy
+        )
+    _print_found(deleted, f"deleted in {time.perf_counter() - start:.2f}s")
+
+
+@app.command(name="list", help="List the releases installed in the cluster")
+def list_releases(
+    instance: Annotated[
+        str | None, typer.Option(help="Only the releases of this instance name")
+    ] = None,
+    pkg_name: Annotated[
+        str | None, typer.Option(help="Only the releases of this package")
+    ] = None,
+    namespace: Annotated[
+        str | None,
+        typer.Option("--namespace", "-n", help="Only the releases in this namespace"),
+    ] = None,
+    objects: Annotated[
+        bool, typer.Option(help="List the objects of each release")
+    ] = False,
+    workers: Annotated[
+        int, typer.Option(help="The number of concurrent API requests")
+    ] = 8,
+    context: Annotated[str | None, typer.Option(help="Context ")] = None,
+    kubeconfig: Annotated[Path | None, typer.Option(help="The kubeconfig file")] = None,
 ):
-    pass
+    """List the releases installed in the cluster and what they own, from a single
+    list request per kind (see package.inventory)
+
+    Args:
+        instance: The instance name of the releases. Any if None
+        pkg_name: The package name of the releases. Any if None
+        namespace: A namespace in which the releases have objects. Any if None
+        objects: If True, list the objects of each release
+        workers: The maximum number of concurrent API requests
+        context: The kubeconfig context
+        kubeconfig: The kubeconfig file
+
+    Returns:
+
+    """
+    from deploydocus.installer import ClusterContext
+    from deploydocus.package.inventory import Inventory
+
+    with ClusterContext(
+        context=context, config_file=kubeconfig, pool_maxsize=max(workers, 1)
+    ) as ctx:
+        inventory = Inventory.collect(ctx.pkg_installer(), max_workers=workers)
+    releases = inventory.query(
+        instance=instance, pkg_name=pkg_name, namespace=namespace
+    )
+    typer.echo(
+        f"{'INSTANCE':<24}  {'PACKAGE':<20}  {'VERSION':<10}  {'OBJECTS':>7}  "
+        "NAMESPACES"
+    )
+    for release in releases:
+        key = release.key
+        typer.echo(
+            f"{key.instance:<24}  {key.pkg_name or '-':<20}  "
+            f"{key.pkg_version or '-':<10}  {len(release.objects):>7}  "
+            f"{','.join(sorted(release.namespaces)) or '-'}"
+        )
+        if objects:
+            for obj in release.objects:
+                typer.echo(
+                    f"    {obj.kind}/{obj.metadata.name}"
+                    + (
+                        f" -n {obj.metadata.namespace}"
+                        if obj.metadata.namespace
+                        else ""
+                    )
+                )
@@ -1,10 +1,21 @@
-import tempfile
+import logging
+from pathlib import Path
+from typing import Any, Sequence
+
+from kubernetes.client import ApiClient, Configuration
+from kubernetes.config import load_kube_config, load_kube_config_from_dict
 
 from .appstate.helm3 import HelmChart
 from .appstate.kustomize import Kustomization
+from .appstate.render import stream_all
+from .package.errors import KubeConfigError
+from .package.installer import PkgInstaller
+from .package.types import K8sModel, K8sModelSequence
 
 type LegacyTools = HelmChart | Kustomization
 
+logger = logging.getLogger(__name__)
+
 
 class ClusterContext:
     """Represents the Kubernetes cluster on which to operate and any authentication
@@ -12,20 +23,130 @@ class ClusterContext:
     May well be non-cluster admin context but the presumption is that if the installer
     is using this context to perform an operation such as install a helm chart, then
     it has the necessary permissions to be able to complete the operation.
+
+    The context holds a single API client (and so a single pool of connections to
+    the API server) to be shared by the installers working on the cluster.
     """
 
-    ...
+    _api_client: ApiClient
+
+    def __init__(
+        self,
+        context: str | None = None,
+        config_file: Path | None = None,
+        config_dict: dict[str, Any] | None = None,
+        *,
+        pool_maxsize: int | None = None,
+    ):
+        """
+
+        Args:
+            context: The kubeconfig context
+            config_file: The kubeconfig file
+            config_dict: The kubeconfig as a dict (exclusive of config_file)
+            pool_maxsize: The maximum number of connections kept open to the API
+                server. Should be at least the number of concurrent requests (e.g.
+                the `max_workers` of the installers). None keeps the client
+                default.
+        """
+        configuration = Configuration()
+        match (config_dict, config_file):
+            case (None, _):
+                load_kube_config(
+                    config_file=config_file,
+                    context=context,
+                    client_configuration=configuration,
+                    persist_config=False,
+                )
+            case (_, None):
+                load_kube_config_from_dict(
+                    config_dict=config_dict,
+                    context=context,
+                    client_configuration=configuration,
+                )
+            case _:
+                raise KubeConfigError(
+                    "Both config_file and config_dict cannot be provided"
+                )
+        if pool_maxsize is not None:
+            configuration.connection_pool_maxsize = pool_maxsize
+        self._api_client = ApiClient(configuration)
+
+    @property
+    def api_client(self) -> ApiClient:
+        """
+
+        Returns: The kubernetes API client
+
+        """
+        return self._api_client
+
+    def pkg_installer(self, **kwargs) -> PkgInstaller:
+        """A PkgInstaller sharing the API client of this context
+
+        Args:
+            **kwargs: Passed to PkgInstaller
+
+        Returns:
+            The installer
+        """
+        return PkgInstaller(api_client=self.api_client, **kwargs)
+
+    def close(self):
+        self._api_client.close()
+
+    def __enter__(self) -> "ClusterContext":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
 class ApplicationInstaller:
-    def __init__(self, ctx: ClusterContext):
+    def __init__(self, ctx: ClusterContext, *, max_workers: int = 1, **kwargs):
+        """
+
+        Args:
+            ctx: The cluster to install on
+            max_workers: The maximum number of objects applied concurrently
+            **kwargs: Passed to the PkgInstaller (e.g. server_side_apply)
+        """
         self.ctx = ctx
+        self.max_workers = max_workers
+        self.pkg_installer = ctx.pkg_installer(**kwargs)
 
-    def apply(self, pkg: LegacyTools):
+    def apply(
+        self,
+        pkg: LegacyTools | Sequence[LegacyTools],
+        release_name: str | None = None,
+        namespace: str = "default",
+        installed: list[K8sModel] | None = None,
+    ) -> K8sModelSequence:
         """renders and applies an assembled package to the cluster using the
         cluster context.
+
+        The sources are rendered concurrently and their objects are streamed to
+        `PkgInstaller.apply` as they are rendered (see `appstate.render.stream_all`):
+        the first objects of a Helm chart are being applied while helm is still
+        rendering it, and while the other sources are rendering.
+
+        Args:
+            pkg: A Helm chart or kustomization, or several of them
+            release_name: The release name of Helm charts
+            namespace: The namespace to render and install into
+            installed: (recommended) If a list is provided, the applied objects are
+                appended to it as they are applied
+
+        Returns:
+            The applied objects
         """
-        with tempfile.NamedTemporaryFile() as ntf:
-            with tempfile.TemporaryDirectory() as td:
-                resources_raw: str = pkg.render(td)
-            ntf.write(resources_raw)  # type: ignore[call-overload]
+        sources = [pkg] if isinstance(pkg, (HelmChart, Kustomization)) else pkg
+        if installed is None:
+            installed = []
+        self.pkg_installer.apply(
+            stream_all(sources, release_name, namespace),
+            namespace,
+            installed=installed,
+            max_workers=self.max_workers,
+        )
+        return installed
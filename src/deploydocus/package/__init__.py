@@ -1,3 +1,10 @@
-from .pkg import AbstractK8sPkg
+from typing import TYPE_CHECKING
+
+from deploydocus._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .pkg import AbstractK8sPkg
 
 __all__ = ["AbstractK8sPkg"]
+
+__getattr__, __dir__ = lazy_exports(__name__, {"AbstractK8sPkg": ".pkg"})
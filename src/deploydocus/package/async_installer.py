@@ -0,0 +1,387 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Sequence
+
+from kubernetes_asyncio import client as async_client
+from kubernetes_asyncio.client import ApiClient, Configuration
+from kubernetes_asyncio.client.exceptions import ApiException
+from kubernetes_asyncio.config import load_kube_config, load_kube_config_from_dict
+
+from deploydocus.package.diff import ObjectKey, installed_spec_hash
+from deploydocus.package.errors import KubeConfigError, PkgAlreadyInstalled
+from deploydocus.package.installer import _label_selector, _unlist_k8s_model
+from deploydocus.package.kinds import component_kind, install_waves, kind_rank
+from deploydocus.package.manifest import Manifest
+from deploydocus.package.pkg import AbstractK8sPkg
+from deploydocus.package.types import (
+    SUPPORTED_KINDS,
+    K8sModel,
+    K8sModelSequence,
+    ManifestDict,
+    ManifestSequence,
+)
+from deploydocus.package.utils import (
+    DEFAULT_FIELD_MANAGER,
+    crud_target,
+    k8s_api,
+    k8s_model_class,
+    metadata_list_models,
+    metadata_list_request,
+    server_side_apply_request,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+class AsyncPkgInstaller:
+    """Installs, uninstalls and discovers packages like the PkgInstaller, with all
+    the cluster I/O done on an asyncio HTTP client. A single event loop can drive
+    many installers (or many packages through one installer); the number of
+    requests in flight per installer is bounded by `max_concurrency`.
+
+    Requires the kubernetes_asyncio client (the `asyncio` extra). The kinds and
+    operations are resolved with the same dispatch table as the PkgInstaller (see
+    `package.utils.crud_target`) since the kubernetes_asyncio API classes mirror the
+    kubernetes.client ones.
+    """
+
+    _api_client: ApiClient
+
+    def __init__(
+        self,
+        api_client: ApiClient,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        server_side_apply: bool = False,
+        field_manager: str = DEFAULT_FIELD_MANAGER,
+        force_conflicts: bool = False,
+    ):
+        """
+
+        Args:
+            api_client: The kubernetes_asyncio API client (see `from_config`)
+            max_concurrency: The maximum number of API requests in flight
+            server_side_apply: See PkgInstaller
+            field_manager: See PkgInstaller
+            force_conflicts: See PkgInstaller
+        """
+        self._api_client = api_client
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.server_side_apply = server_side_apply
+        self.field_manager = field_manager
+        self.force_conflicts = force_conflicts
+
+    @classmethod
+    async def from_config(
+        cls,
+        context: str | None = None,
+        config_file: Path | None = None,
+        config_dict: dict[str, Any] | None = None,
+        *,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        **kwargs,
+    ) -> "AsyncPkgInstaller":
+        """Create an installer from a kubeconfig. The connection pool of the client
+        is sized to `max_concurrency`.
+
+        Args:
+            context: The kubeconfig context
+            config_file: The kubeconfig file
+            config_dict: The kubeconfig as a dict (exclusive of config_file)
+            max_concurrency: The maximum number of API requests in flight
+            **kwargs: Passed to the constructor
+
+        Returns:
+            The installer
+        """
+        configuration = Configuration()
+        match (config_dict, config_file):
+            case (None, _):
+                await load_kube_config(
+                    config_file=config_file,
+                    context=context,
+                    client_configuration=configuration,
+                    persist_config=False,
+                )
+            case (_, None):
+                await load_kube_config_from_dict(
+                    config_dict=config_dict,
+                    context=context,
+                    client_configuration=configuration,
+                )
+            case _:
+                raise KubeConfigError(
+                    "Both config_file and config_dict cannot be provided"
+                )
+        configuration.connection_pool_maxsize = max_concurrency
+        return cls(ApiClient(configuration), max_concurrency=max_concurrency, **kwargs)
+
+    @property
+    def api_client(self) -> ApiClient:
+        """
+
+        Returns: The kubernetes_asyncio API client
+
+        """
+        return self._api_client
+
+    async def close(self):
+        await self._api_client.close()
+
+    async def __aenter__(self) -> "AsyncPkgInstaller":
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _call(self, kind: str, op: str, api_version: str | None = None, **kwargs):
+        target = crud_target(kind, op, api_version=api_version)
+        api = k8s_api(self.api_client, getattr(async_client, target.api_class.__name__))
+        if not target.namespaced:
+            kwargs.pop("namespace", None)
+        async with self._semaphore:
+            return await getattr(api, target.method)(**kwargs)
+
+    async def _call_api(self, request: dict[str, Any], response_type: str) -> Any:
+        async with self._semaphore:
+            return await self.api_client.call_api(
+                **request, response_types_map={200: response_type, 201: response_type}
+            )
+
+    def _is_namespaced(self, kind: str) -> bool:
+        return crud_target(kind, "get").namespaced
+
+    async def _install(
+        self,
+        component: ManifestDict | Manifest,
+        namespace: str,
+        current: Mapping[ObjectKey, K8sModel] | None = None,
+    ) -> K8sModel:
+        """See `PkgInstaller._install`"""
+        manifest = Manifest.of(component)
+        kind, name = manifest.kind, manifest.name
+        namespaced = self._is_namespaced(kind)
+        if namespaced:
+            namespace = manifest.namespace or namespace
+
+        existing_component: K8sModel | None = None
+        if current is not None:
+            existing_component = current.get(
+                manifest.key(namespace=namespace, is_namespaced=self._is_namespaced)
+            )
+        elif not self.server_side_apply:
+            try:
+                existing_component = await self._call(
+                    kind, "get", name=name, namespace=namespace
+                )
+            except ApiException as ae:
+                if ae.status != 404:
+                    raise
+
+        if (
+            existing_component is not None
+            and installed_spec_hash(existing_component) == manifest.spec_hash
+        ):
+            logger.debug(f"Unchanged, not applying {kind}/{name}")
+            return existing_component
+
+        body = manifest.with_spec_hash()
+        if self.server_side_apply:
+            return await self._call_api(
+                server_side_apply_request(
+                    body,
+                    namespaced=namespaced,
+                    namespace=namespace,
+                    field_manager=self.field_manager,
+                    force=self.force_conflicts,
+                ),
+                k8s_model_class(kind).__name__,
+            )
+        if existing_component is not None:
+            return await self._call(
+                kind, "patch", name=name, namespace=namespace, body=body
+            )
+        return await self._call(kind, "create", namespace=namespace, body=body)
+
+    async def _apply_waves(
+        self,
+        components: Sequence[ManifestDict | Manifest],
+        namespace: str,
+        installed: list[K8sModel],
+        current: Mapping[ObjectKey, K8sModel] | None = None,
+    ):
+        """See `PkgInstaller._apply_waves`. The components of a wave are applied
+        concurrently, bounded by the installer's `max_concurrency`.
+        """
+        for wave in install_waves(list(map(Manifest.of, components))):
+            results = await asyncio.gather(
+                *(self._install(c, namespace, current) for c in wave),
+                return_exceptions=True,
+            )
+            failure: BaseException | None = None
+            for result in results:
+                if isinstance(result, BaseException):
+                    failure = failure or result
+                    continue
+                logger.debug(f"installed_component={result}")
+                installed.append(result)
+            if failure is not None:
+                raise failure
+
+    async def install(
+        self,
+        deploydocus_pkg: AbstractK8sPkg,
+        installed: list[K8sModel] | None = None,
+    ) -> K8sModelSequence:
+        """See `PkgInstaller.install`"""
+        if installed is None:
+            installed = []
+
+        current_app = await self.find_current_app_installations(
+            deploydocus_pkg, metadata_only=True
+        )
+        if current_app:
+            raise PkgAlreadyInstalled(current_app)
+        try:
+            await self._apply_waves(
+                deploydocus_pkg.render(),
+                namespace=deploydocus_pkg.instance_settings.instance_namespace,
+                installed=installed,
+            )
+        except ApiException as ae:
+            ae.add_note(
+                "Installation failed: "
+                f"package={deploydocus_pkg.pkg_name} "
+                f"instance name={deploydocus_pkg.instance_settings}"
+            )
+            raise
+        return installed
+
+    async def _delete(self, component: ManifestDict, namespace: str) -> Any:
+        """Delete a single object (or the items of a List). Objects that are
+        already gone are skipped.
+
+        Returns:
+            The responses of the deletes
+        """
+        data = self.api_client.sanitize_for_serialization(component)
+        if data["kind"].endswith("List"):
+            kind = data["kind"][:-4]
+            items = [
+                {**i, "apiVersion": data["apiVersion"], "kind": kind}
+                for i in reversed(data["items"])
+            ]
+        else:
+            items = [data]
+        deleted = []
+        for item in items:
+            try:
+                deleted.append(
+                    await self._call(
+                        item["kind"],
+                        "delete",
+                        api_version=item["apiVersion"],
+                        name=item["metadata"]["name"],
+                        namespace=item["metadata"].get("namespace") or namespace,
+                    )
+                )
+            except ApiException as ae:
+                if ae.status != 404:
+                    raise
+        return deleted
+
+    async def uninstall(self, deploydocus_pkg: AbstractK8sPkg) -> Sequence[K8sModel]:
+        """See `PkgInstaller.uninstall`. The components are deleted in reverse
+        installation order, kind by kind; the components of a kind are deleted
+        concurrently.
+        """
+        uninstalled: list[K8sModel] = []
+        components_list = await self.find_current_app_installations(
+            deploydocus_pkg, metadata_only=True
+        )
+        namespace = deploydocus_pkg.instance_settings.instance_namespace
+        for wave in reversed(list(install_waves(components_list))):
+            results = await asyncio.gather(*(self._delete(c, namespace) for c in wave))
+            uninstalled.extend(c for c, ret in zip(wave, results) if ret)
+        return uninstalled
+
+    async def revert_install(
+        self, installed: ManifestSequence, namespace: str, uninstall_point=0
+    ) -> ManifestSequence:
+        """See `PkgInstaller.revert_install`"""
+        uninstalled = []
+        for component in reversed(installed[uninstall_point:]):
+            logger.info(f"Reverting: {component}")
+            if ret := await self._delete(component, namespace):
+                uninstalled.append(ret)
+        return uninstalled
+
+    async def _list_installed(
+        self, kind: str, selectors: str, namespace: str, metadata_only: bool
+    ) -> K8sModelSequence:
+        """See `PkgInstaller._list_installed`"""
+        try:
+            namespaced = self._is_namespaced(kind)
+            if metadata_only:
+                data = await self._call_api(
+                    metadata_list_request(
+                        kind,
+                        namespaced=namespaced,
+                        namespace=namespace,
+                        label_selector=selectors,
+                    ),
+                    "object",
+                )
+                items = metadata_list_models(self.api_client, kind, data, async_client)
+            else:
+                items = (
+                    await self._call(
+                        kind, "list", namespace=namespace, label_selector=selectors
+                    )
+                ).items or []
+            return [
+                _unlist_k8s_model(i, kind)
+                for i in items
+                if not getattr(i.metadata, "owner_references", None)
+            ]
+        except ApiException as ae:
+            if ae.status == 404:
+                return []
+            logger.error(f"{kind=} {ae.status=} {ae.reason=} {ae.body=}")
+            raise
+
+    async def find_current_app_installations(
+        self,
+        deploydocus_pkg: AbstractK8sPkg,
+        *,
+        rendered_kinds_only: bool = False,
+        extra_kinds: Iterable[str] = (),
+        metadata_only: bool = False,
+    ) -> K8sModelSequence:
+        """See `PkgInstaller.find_current_app_installations`. All the kinds are
+        looked up concurrently.
+        """
+        selectors = _label_selector(deploydocus_pkg)
+        kinds: list[str] = list(SUPPORTED_KINDS)
+        if rendered_kinds_only:
+            wanted = {component_kind(c) for c in deploydocus_pkg.render()}
+            wanted.update(extra_kinds)
+            kinds = sorted(wanted.intersection(kinds), key=kind_rank)
+        results = await asyncio.gather(
+            *(
+                self._list_installed(
+                    kind,
+                    selectors,
+                    namespace=deploydocus_pkg.instance_settings.instance_namespace,
+                    metadata_only=metadata_only,
+                )
+                for kind in kinds
+                if kind[-4:] != "List"
+            )
+        )
+        existing_components: list[K8sModel] = [i for items in results for i in items]
+        logger.info(f"{existing_components=}")
+        return existing_components
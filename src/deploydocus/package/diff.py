@@ -0,0 +1,93 @@
+from typing import Any, Callable, Mapping, NamedTuple, Sequence
+
+from deploydocus.package.manifest import (  # noqa: F401
+    Manifest,
+    ObjectKey,
+    spec_hash,
+    with_spec_hash,
+)
+from deploydocus.package.pkg import SPEC_HASH_ANNOTATION
+from deploydocus.package.types import K8sModel
+
+
+class ManifestDiff(NamedTuple):
+    """The writes needed to go from the installed objects to the rendered ones"""
+
+    create: list[Manifest]
+    """Rendered objects that are not installed"""
+    patch: list[Manifest]
+    """Rendered objects that are installed but whose spec hash changed"""
+    prune: list[K8sModel]
+    """Installed objects that are no longer rendered"""
+    unchanged: list[K8sModel]
+    """Installed objects whose spec hash is the same as the rendered one"""
+
+
+def installed_spec_hash(installed: K8sModel) -> str | None:
+    """The spec hash recorded on an installed object, if any"""
+    annotations = installed.metadata.annotations or {}
+    return annotations.get(SPEC_HASH_ANNOTATION)
+
+
+def object_key(
+    obj: Mapping[str, Any] | K8sModel | Manifest,
+    *,
+    namespace: str,
+    is_namespaced: Callable[[str], bool],
+) -> ObjectKey:
+    """Identifies an object by kind, namespace (None for non-namespaced kinds) and
+    name
+
+    Args:
+        obj: A manifest (dict), a kubernetes.client model or a Manifest
+        namespace: The namespace of namespaced objects without one
+        is_namespaced: Tells if a kind is namespaced
+
+    Returns:
+        The key
+    """
+    if isinstance(obj, Manifest):
+        return obj.key(namespace=namespace, is_namespaced=is_namespaced)
+    if isinstance(obj, Mapping):
+        kind, metadata = obj["kind"], obj["metadata"]
+        obj_namespace, name = metadata.get("namespace"), metadata["name"]
+    else:
+        kind, obj_namespace, name = obj.kind, obj.metadata.namespace, obj.metadata.name
+    return kind, (obj_namespace or namespace) if is_namespaced(kind) else None, name
+
+
+def diff_manifests(
+    desired: Sequence[Mapping[str, Any] | Manifest],
+    installed: Sequence[K8sModel],
+    *,
+    namespace: str,
+    is_namespaced: Callable[[str], bool],
+) -> ManifestDiff:
+    """Three-way diff between the rendered objects, the installed objects and the
+    spec hashes recorded on them when they were last applied. Only the hashes are
+    compared, the objects are not walked field by field.
+
+    Args:
+        desired: The rendered objects, as dicts or Manifests
+        installed: The installed objects (metadata is enough)
+        namespace: The namespace of rendered namespaced objects without one
+        is_namespaced: Tells if a kind is namespaced
+
+    Returns:
+        The objects to create, patch and prune and the unchanged ones
+    """
+    current: dict[ObjectKey, K8sModel] = {
+        object_key(i, namespace=namespace, is_namespaced=is_namespaced): i
+        for i in installed
+    }
+    diff = ManifestDiff([], [], [], [])
+    for manifest in map(Manifest.of, desired):
+        key = manifest.key(namespace=namespace, is_namespaced=is_namespaced)
+        if (existing := current.pop(key, None)) is None:
+            diff.create.append(manifest)
+        elif installed_spec_hash(existing) == manifest.spec_hash:
+            diff.unchanged.append(existing)
+        else:
+            diff.patch.append(manifest)
+    diff.prune.extend(current.values())
+    return diff
@@ -11,3 +11,11 @@ class PkgAlreadyInstalled(Exception):
     def __init__(self, components_found: list[K8sModel], *args):
         self.components_found = [c for c in components_found]
         super().__init__(f"{components_found}", *args)
+
+
+class ReadinessTimeout(Exception):
+    components_pending: list[K8sModel]
+
+    def __init__(self, components_pending: list[K8sModel], *args):
+        self.components_pending = [c for c in components_pending]
+        super().__init__(f"{components_pending}", *args)
@@ -0,0 +1,406 @@
+import functools
+import logging
+import time
+from collections import defaultdict
+from threading import Event, RLock, Thread
+from typing import Any, Callable, Iterable, Mapping
+
+from kubernetes import watch
+from kubernetes.client import ApiClient
+from kubernetes.client.exceptions import ApiException  # type: ignore
+
+from deploydocus.package.types import SUPPORTED_KINDS, K8sModel
+from deploydocus.package.utils import crud_target, interrupt_response, k8s_api
+
+logger = logging.getLogger(__name__)
+
+WATCH_TIMEOUT: int = 300
+"""The number of seconds after which the API server ends a watch (it is then
+resumed from the last resourceVersion)"""
+RETRY_DELAY: float = 1.0
+"""The number of seconds to wait before retrying a failed list or watch"""
+
+type StoreKey = tuple[str | None, str]
+
+
+def parse_label_selector(label_selector: str | Mapping[str, str] | None) -> dict:
+    """The labels of an equality based label selector (e.g. "a=b,c=d", as
+    produced from `default_selectors`)
+
+    Args:
+        label_selector: The label selector, or the labels themselves
+
+    Returns:
+        The labels
+    """
+    if label_selector is None:
+        return {}
+    if isinstance(label_selector, Mapping):
+        return dict(label_selector)
+    labels: dict[str, str] = {}
+    for term in filter(None, (t.strip() for t in label_selector.split(","))):
+        key, sep, value = term.partition("==" if "==" in term else "=")
+        if not sep or key.endswith("!"):
+            raise ValueError(f"Only equality label selectors are supported: {term}")
+        labels[key.strip()] = value.strip()
+    return labels
+
+
+class ObjectStore:
+    """A thread-safe store of the objects of a kind, indexed by namespace and name
+    and by label
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._objects: dict[StoreKey, K8sModel] = {}
+        self._by_label: defaultdict[tuple[str, str], set[StoreKey]] = defaultdict(set)
+        self.resource_version: str | None = None
+
+    @staticmethod
+    def _key(obj: K8sModel) -> StoreKey:
+        return obj.metadata.namespace, obj.metadata.name
+
+    def _index(self, key: StoreKey, obj: K8sModel):
+        for label in (obj.metadata.labels or {}).items():
+            self._by_label[label].add(key)
+
+    def _unindex(self, key: StoreKey):
+        if (obj := self._objects.get(key)) is None:
+            return
+        for label in (obj.metadata.labels or {}).items():
+            if keys := self._by_label.get(label):
+                keys.discard(key)
+                if not keys:
+                    del self._by_label[label]
+
+    def replace(self, objects: Iterable[K8sModel], resource_version: str | None):
+        """Replace the content of the store (after a list)"""
+        with self._lock:
+            self._objects.clear()
+            self._by_label.clear()
+            for obj in objects:
+                self.upsert(obj)
+            self.resource_version = resource_version
+
+    def upsert(self, obj: K8sModel):
+        with self._lock:
+            key = self._key(obj)
+            self._unindex(key)
+            self._objects[key] = obj
+            self._index(key, obj)
+
+    def delete(self, obj: K8sModel):
+        with self._lock:
+            key = self._key(obj)
+            self._unindex(key)
+            self._objects.pop(key, None)
+
+    def get(self, namespace: str | None, name: str) -> K8sModel | None:
+        """The object of a namespace (None for cluster-wide kinds) and name"""
+        with self._lock:
+            return self._objects.get((namespace, name))
+
+    def list(
+        self,
+        namespace: str | None = None,
+        label_selector: str | Mapping[str, str] | None = None,
+    ) -> list[K8sModel]:
+        """The objects selected by the labels, in a namespace or all of them
+
+        Args:
+            namespace: The namespace. None for all of them
+            label_selector: An equality based label selector (see
+                parse_label_selector)
+
+        Returns:
+            The objects
+        """
+        labels = parse_label_selector(label_selector)
+        with self._lock:
+            keys: set[StoreKey] | None = None
+            for label in labels.items():
+                selected = self._by_label.get(label, set())
+                keys = set(selected) if keys is None else keys & selected
+            if keys is None:
+                keys = set(self._objects)
+            return [
+                self._objects[k]
+                for k in sorted(keys, key=lambda k: (k[0] or "", k[1]))
+                if namespace is None or k[0] == namespace
+            ]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._objects)
+
+
+class Informer:
+    """Keeps a local store of the objects of a kind up to date: the objects are
+    listed once, then watched from the resourceVersion of the list. The watch asks
+    for bookmarks, so that it can be resumed from a recent resourceVersion when the
+    API server ends it, and the objects are listed again when that version has
+    expired (410 Gone).
+    """
+
+    def __init__(
+        self,
+        api_client: ApiClient,
+        kind: str,
+        *,
+        namespace: str | None = None,
+        label_selector: str | None = None,
+    ):
+        """
+
+        Args:
+            api_client: The kubernetes API client
+            kind: One of SUPPORTED_KINDS
+            namespace: The namespace to watch. None for all of them
+            label_selector: The label selector of the objects to watch
+        """
+        self.kind = kind
+        self.store = ObjectStore()
+        target = crud_target(kind, "list")
+        self.namespaced = target.namespaced
+        self._list_fn = getattr(k8s_api(api_client, target.api_class), target.method)
+        if target.namespaced and namespace is not None:
+            # list_namespaced_<kind>, one namespace
+            self._kwargs: dict[str, Any] = {"namespace": namespace}
+        elif target.namespaced:
+            self._list_fn = getattr(
+                k8s_api(api_client, target.api_class),
+                target.method.replace("_namespaced_", "_") + "_for_all_namespaces",
+            )
+            self._kwargs = {}
+        else:
+            self._kwargs = {}
+        if label_selector:
+            self._kwargs["label_selector"] = label_selector
+        self._synced = Event()
+        self._stop = Event()
+        self._watch: watch.Watch | None = None
+        self._response: Any = None
+        self._thread: Thread | None = None
+
+    def _prepare(self, obj: K8sModel) -> K8sModel:
+        # The items of lists and watch events have no kind nor apiVersion
+        obj.kind = self.kind
+        obj.api_version = SUPPORTED_KINDS[self.kind]
+        return obj
+
+    def _list(self):
+        listed = self._list_fn(**self._kwargs)
+        self.store.replace(
+            (self._prepare(i) for i in listed.items or []),
+            listed.metadata.resource_version,
+        )
+        self._synced.set()
+        logger.debug(f"Listed {len(self.store)} {self.kind}")
+
+    def _tracked(self, list_fn: Callable) -> Callable:
+        """Wrap the list function of the watch to keep its (streamed) response, so
+        that stop() can interrupt it
+        """
+
+        @functools.wraps(list_fn)
+        def _request(*args, **kwargs):
+            self._response = response = list_fn(*args, **kwargs)
+            if self._stop.is_set():
+                interrupt_response(response)
+            return response
+
+        return _request
+
+    def _watch_once(self):
+        self._watch = w = watch.Watch()
+        for event in w.stream(
+            self._tracked(self._list_fn),
+            resource_version=self.store.resource_version,
+            allow_watch_bookmarks=True,
+            timeout_seconds=WATCH_TIMEOUT,
+            _request_timeout=WATCH_TIMEOUT + 30,
+            **self._kwargs,
+        ):
+            # Bookmarks only carry a resourceVersion and are not deserialized
+            if event["type"] == "DELETED":
+                self.store.delete(event["object"])
+            elif event["type"] != "BOOKMARK":
+                self.store.upsert(self._prepare(event["object"]))
+            metadata = event["raw_object"].get("metadata") or {}
+            self.store.resource_version = metadata.get("resourceVersion")
+            if self._stop.is_set():
+                w.stop()
+
+    def run(self):
+        """List and watch until stopped"""
+        while not self._stop.is_set():
+            try:
+                if self.store.resource_version is None:
+                    self._list()
+                self._watch_once()
+            except ApiException as ae:
+                if ae.status == 410:
+                    logger.debug(f"Watch of {self.kind} expired, listing again")
+                    self.store.resource_version = None
+                    continue
+                logger.warning(f"Watch of {self.kind} failed: {ae.status=}")
+                self._stop.wait(RETRY_DELAY)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning(f"Watch of {self.kind} failed: {e!r}")
+                self._stop.wait(RETRY_DELAY)
+
+    def start(self):
+        """Run the informer in a (daemon) thread"""
+        assert self._thread is None, f"Informer of {self.kind} already started"
+        self._thread = Thread(
+            target=self.run, name=f"informer-{self.kind}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        """Stop the informer: the connection of the watch in progress is shut down,
+        which ends it right away
+
+        Args:
+            timeout: The maximum number of seconds to wait for the thread of the
+                informer to end. None waits as long as needed
+        """
+        self._stop.set()
+        if self._watch is not None:
+            self._watch.stop()
+        if self._response is not None:
+            interrupt_response(self._response)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def synced(self) -> bool:
+        """True once the objects have been listed"""
+        return self._synced.is_set()
+
+    def wait_for_sync(self, timeout: float | None = None) -> bool:
+        return self._synced.wait(timeout)
+
+
+class InformerCache:
+    """Informers for several kinds, sharing a namespace and a label selector: a
+    local, continuously updated cache of the objects a PkgInstaller works on (see
+    `PkgInstaller(informers=...)`).
+
+    Example:
+        with InformerCache(api_client, label_selector=MANAGED_BY_SELECTOR) as cache:
+            installer = PkgInstaller(api_client=api_client, informers=cache)
+    """
+
+    def __init__(
+        self,
+        api_client: ApiClient,
+        kinds: Iterable[str] | None = None,
+        *,
+        namespace: str | None = None,
+        label_selector: str | None = None,
+        sync_timeout: float | None = 60.0,
+    ):
+        """
+
+        Args:
+            api_client: The kubernetes API client
+            kinds: The kinds to cache. Defaults to the SUPPORTED_KINDS (but Lists)
+            namespace: The namespace to cache. None for all of them
+            label_selector: The label selector of the objects to cache. Objects it
+                does not select are looked up in the cluster.
+            sync_timeout: The maximum number of seconds start() waits for the
+                informers to list their objects. None waits as long as needed
+        """
+        if kinds is None:
+            kinds = [k for k in SUPPORTED_KINDS if k[-4:] != "List"]
+        self.namespace = namespace
+        self.label_selector = parse_label_selector(label_selector)
+        self.sync_timeout = sync_timeout
+        self.informers: dict[str, Informer] = {
+            kind: Informer(
+                api_client, kind, namespace=namespace, label_selector=label_selector
+            )
+            for kind in kinds
+        }
+
+    def start(self) -> bool:
+        """Start the informers and wait until they have listed their objects
+
+        Returns:
+            True if all the informers are synced
+        """
+        for informer in self.informers.values():
+            informer.start()
+        deadline = (
+            time.monotonic() + self.sync_timeout
+            if self.sync_timeout is not None
+            else None
+        )
+        return all(
+            informer.wait_for_sync(
+                max(deadline - time.monotonic(), 0) if deadline is not None else None
+            )
+            for informer in self.informers.values()
+        )
+
+    def stop(self):
+        for informer in self.informers.values():
+            informer.stop()
+
+    def __enter__(self) -> "InformerCache":
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def covers(
+        self,
+        kind: str,
+        namespace: str | None = None,
+        label_selector: str | Mapping[str, str] | None = None,
+    ) -> bool:
+        """Tell if the cache holds all the objects of a kind selected by the labels
+        in a namespace (None for all of them or for cluster-wide kinds), i.e. if it
+        can answer instead of the API server
+
+        Args:
+            kind: The kind
+            namespace: The namespace
+            label_selector: The label selector
+
+        Returns:
+            True if the cache can answer
+        """
+        informer = self.informers.get(kind)
+        if informer is None or not informer.synced:
+            return False
+        if (
+            informer.namespaced
+            and self.namespace is not None
+            and namespace != self.namespace
+        ):
+            return False
+        labels = parse_label_selector(label_selector).items()
+        return all(label in labels for label in self.label_selector.items())
+
+    def get(self, kind: str, namespace: str | None, name: str) -> K8sModel | None:
+        """An object from the cache (see `ObjectStore.get`)"""
+        informer = self.informers[kind]
+        return informer.store.get(namespace if informer.namespaced else None, name)
+
+    def list(
+        self,
+        kind: str,
+        namespace: str | None = None,
+        label_selector: str | Mapping[str, str] | None = None,
+    ) -> list[K8sModel]:
+        """Objects from the cache (see `ObjectStore.list`)"""
+        informer = self.informers[kind]
+        return informer.store.list(
+            namespace if informer.namespaced else None, label_selector
+        )
@@ -1,13 +1,30 @@
+import copy
 import logging
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Sequence, cast
+from typing import Any, Iterable, Mapping, Sequence, cast
 
 from kubernetes.client import ApiClient, V1ObjectMeta, V1Secret, V1Status
 from kubernetes.client.exceptions import ApiException  # type: ignore
 from kubernetes.config import new_client_from_config, new_client_from_config_dict
 
+from deploydocus.package.diff import (
+    ObjectKey,
+    diff_manifests,
+    installed_spec_hash,
+    object_key,
+)
 from deploydocus.package.errors import KubeConfigError, PkgAlreadyInstalled
+from deploydocus.package.informer import InformerCache
+from deploydocus.package.kinds import (
+    component_kind,
+    install_waves,
+    kind_rank,
+    stream_waves,
+)
+from deploydocus.package.manifest import Manifest
 from deploydocus.package.pkg import AbstractK8sPkg
+from deploydocus.package.readiness import DEFAULT_READY_TIMEOUT, wait_until_ready
 from deploydocus.package.types import (
     SUPPORTED_KINDS,
     K8sListModel,
@@ -17,12 +34,17 @@ from deploydocus.package.types import (
     ManifestSequence,
 )
 from deploydocus.package.utils import (
+    DEFAULT_FIELD_MANAGER,
+    UnsupportedOperation,
     create_component_factory,
+    crud_target,
     delete_from_dict,
     delete_from_model,
     get_component_factory,
     k8s_crud_callable,
+    list_metadata_only,
     patch_component_factory,
+    server_side_apply,
 )
 
 logger = logging.getLogger(__name__)
@@ -31,6 +53,10 @@ logger = logging.getLogger(__name__)
 class AppNotFound(Exception): ...
 
 
+def _label_selector(deploydocus_pkg: AbstractK8sPkg) -> str:
+    return ",".join([f"{k}={v}" for k, v in deploydocus_pkg.default_selectors.items()])
+
+
 def _unlist_k8s_model(x: K8sModel, kind: str):
     """A helper function to take the items field from a K8s List model
     (such as DeploymentList, SecretList) and create its equivalent model. So
@@ -48,7 +74,9 @@ def _unlist_k8s_model(x: K8sModel, kind: str):
     if kind == "Secret":
         metadata: V1ObjectMeta = x.metadata
         annotations: dict[str, str] = metadata.annotations
-        if "kubectl.kubernetes.io/last-applied-configuration" in annotations:
+        if annotations and (
+            "kubectl.kubernetes.io/last-applied-configuration" in annotations
+        ):
             annotations["kubectl.kubernetes.io/last-applied-configuration"] = "****"
         if x.data:
             cast(V1Secret, x).data = {"redacted": "KioqKg=="}
@@ -71,10 +99,41 @@ class PkgInstaller:
         context: str | None = None,
         config_file: Path | None = None,
         config_dict: dict[str, Any] | None = None,
+        *,
+        server_side_apply: bool = False,
+        field_manager: str = DEFAULT_FIELD_MANAGER,
+        force_conflicts: bool = False,
+        api_client: ApiClient | None = None,
+        informers: InformerCache | None = None,
     ):
-        self._api_client = _only_one(
+        """
+
+        Args:
+            context: The kubeconfig context
+            config_file: The kubeconfig file
+            config_dict: The kubeconfig as a dict (exclusive of config_file)
+            server_side_apply: If True, each component is created or updated with a
+                single server-side apply request instead of a GET followed by a
+                CREATE or PATCH
+            field_manager: The field manager used for server-side apply
+            force_conflicts: If True, server-side apply takes over the fields owned
+                by other field managers instead of failing with a conflict
+            api_client: An API client to use instead of creating one from the
+                kubeconfig (e.g. one shared by several installers, see
+                `deploydocus.installer.ClusterContext`)
+            informers: A started cache of the cluster objects (see
+                `package.informer`). The lookups it covers (kind, namespace and
+                labels) are answered from it instead of the API server: the GET
+                of each component in `_install` and the lists of
+                `find_current_app_installations` and `uninstall`.
+        """
+        self._api_client = api_client or _only_one(
             context=context, config_dict=config_dict, config_file=config_file
         )
+        self.server_side_apply = server_side_apply
+        self.field_manager = field_manager
+        self.force_conflicts = force_conflicts
+        self.informers = informers
 
     @property
     def api_client(self) -> ApiClient:
@@ -91,77 +150,170 @@ class PkgInstaller:
         for kind in reversed(SUPPORTED_KINDS):
             ...
 
+    def _is_namespaced(self, kind: str) -> bool:
+        return crud_target(kind, "get").namespaced
+
     def _install(
-        self, component: ManifestDict, namespace: str
+        self,
+        component: ManifestDict | Manifest,
+        namespace: str,
+        current: Mapping[ObjectKey, K8sModel] | None = None,
     ) -> K8sModel | Sequence[K8sModel]:
         """Install a single component if it does not already exist. Otherwise, update
 
+        The component is written with its spec hash annotation. If the installed
+        object carries the same spec hash, it is not written again.
+
         Args:
             component:
             namespace:
+            current: If known, the installed objects (metadata is enough) by their
+                key. Saves the GET that otherwise decides between a create, a patch
+                or nothing at all.
 
         Returns:
+            The object as returned by the API server or, if unchanged, the
+            installed object
 
         """
-        kind: str = (
-            cast(dict, component)["kind"]
-            if isinstance(component, dict)
-            else cast(str, getattr(component, "kind"))
-        )
-        name: str = (
-            cast(dict, component)["metadata"]["name"]
-            if isinstance(component, dict)
-            else cast(V1ObjectMeta, getattr(component, "metadata")).name
-        )
+        manifest = Manifest.of(component)
+        kind, name = manifest.kind, manifest.name
 
         get_component, namespaced = get_component_factory(
             kind=kind, k8s_client=self.api_client
         )
-        existing_component: K8sModel | None
-        try:
-            if namespaced:
-                namespace = (
-                    component["metadata"]["namespace"]
-                    if isinstance(component, dict)
-                    else cast(V1ObjectMeta, getattr(component, "metadata")).namespace
+        if namespaced:
+            namespace = manifest.namespace or namespace
+
+        existing_component: K8sModel | None = None
+        if current is not None:
+            existing_component = current.get(
+                manifest.key(namespace=namespace, is_namespaced=self._is_namespaced)
+            )
+        elif self.informers is not None and self.informers.covers(
+            kind, namespace if namespaced else None, manifest.labels
+        ):
+            existing_component = self.informers.get(kind, namespace, name)
+        elif not self.server_side_apply:
+            try:
+                existing_component = (
+                    get_component(name=name, namespace=namespace)
+                    if namespaced
+                    else get_component(name=name)
                 )
-                existing_component = get_component(name=name, namespace=namespace)
-            else:
-                existing_component = get_component(name=name)
-        except ApiException as ae:
-            if ae.status == 404:
-                existing_component = None
-            else:
-                raise
+            except ApiException as ae:
+                if ae.status != 404:
+                    raise
+
+        if (
+            existing_component is not None
+            and installed_spec_hash(existing_component) == manifest.spec_hash
+        ):
+            logger.debug(f"Unchanged, not applying {kind}/{name}")
+            return existing_component
+
+        body = manifest.with_spec_hash()
+        if self.server_side_apply:
+            return server_side_apply(
+                self.api_client,
+                body,
+                namespaced=namespaced,
+                namespace=namespace,
+                field_manager=self.field_manager,
+                force=self.force_conflicts,
+            )
 
-        if existing_component:
+        kwargs: dict[str, Any] = {"body": body}
+        if namespaced:
+            kwargs["namespace"] = namespace
+        if existing_component is not None:
             apply_operator, _ = patch_component_factory(
                 kind=kind, k8s_client=self.api_client
             )
+            kwargs["name"] = name
         else:
             apply_operator, _ = create_component_factory(
                 kind=kind, k8s_client=self.api_client
             )
+        return apply_operator(**kwargs)
 
-        if namespaced:
-            return apply_operator(namespace=namespace, body=component)
-        else:
-            return apply_operator(body=component)
+    def _apply_waves(
+        self,
+        components: Iterable[ManifestDict | Manifest],
+        namespace: str,
+        installed: list[K8sModel],
+        max_workers: int = 1,
+        current: Mapping[ObjectKey, K8sModel] | None = None,
+        streaming: bool = False,
+    ):
+        """Apply the components wave by wave (see `install_waves`). The components
+        of a wave are applied concurrently by at most `max_workers` threads and a
+        wave has to complete before the next one is started.
+
+        Args:
+            components: The components to apply
+            namespace: The default namespace of the components
+            installed: The successfully applied components are appended to it, in
+                the order of application
+            max_workers: The maximum number of concurrent API calls within a wave.
+                1 applies the components one at a time.
+            current: If known, the installed objects by their key (see `_install`)
+            streaming: If True, the waves are applied as the components come in
+                (see `stream_waves`) instead of once all of them are sorted
+
+        Raises:
+            ApiException: The first failure of a wave, once all the components of
+                that wave have been attempted.
+        """
+        manifests = map(Manifest.of, components)
+        waves = stream_waves(manifests) if streaming else install_waves(list(manifests))
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            for wave in waves:
+                if max_workers <= 1 or len(wave) == 1:
+                    for component in wave:
+                        installed_component = self._install(
+                            component, namespace, current
+                        )
+                        logger.debug(f"{installed_component=}")
+                        installed.append(installed_component)
+                    continue
+
+                futures = [
+                    executor.submit(self._install, c, namespace, current) for c in wave
+                ]
+                wait(futures)
+                failure: BaseException | None = None
+                for future in futures:
+                    if (exc := future.exception()) is not None:
+                        failure = failure or exc
+                        continue
+                    logger.debug(f"installed_component={future.result()}")
+                    installed.append(future.result())
+                if failure is not None:
+                    raise failure
 
     def install(
         self,
         deploydocus_pkg: AbstractK8sPkg,
         installed: list[K8sModel] | None = None,
+        *,
+        max_workers: int = 1,
     ) -> K8sModelSequence:
         """Install the components in the defined sequence (sequence comes from
             .render() ) call. In case a component fails, the application installation
             is abandoned without rolling back the already installed components.
 
+            The components are installed in waves of the same kind, ordered as in
+            SUPPORTED_KINDS. With `max_workers` > 1 the components of a wave are
+            installed concurrently; the next wave starts only once the current one
+            has completed.
+
         Args:
             installed: (recommended) If a list is provided, the created Kubernetes
                     objects will be appended to it. This is to help track the objects
                     as they are created in the Kubernetes cluster.
             deploydocus_pkg: The application package to be installed
+            max_workers: The maximum number of components installed concurrently
 
         Returns:
             sequence of components successfully installed
@@ -174,19 +326,17 @@ class PkgInstaller:
             installed = []
 
         current_app: list[K8sModel] = self.find_current_app_installations(
-            deploydocus_pkg
+            deploydocus_pkg, metadata_only=True, max_workers=max_workers
         )
         if current_app:
             raise PkgAlreadyInstalled(current_app)
         try:
-            components_list = deploydocus_pkg.render()
-            for component in components_list:
-                installed_component = self._install(
-                    component,
-                    namespace=deploydocus_pkg.instance_settings.instance_namespace,
-                )
-                logger.debug(f"{installed_component=}")
-                installed.append(installed_component)
+            self._apply_waves(
+                deploydocus_pkg.render(),
+                namespace=deploydocus_pkg.instance_settings.instance_namespace,
+                installed=installed,
+                max_workers=max_workers,
+            )
         except ApiException as ae:
             ae.add_note(
                 "Installation failed: "
@@ -197,45 +347,264 @@ class PkgInstaller:
 
         return installed
 
+    def apply(
+        self,
+        components: Iterable[ManifestDict],
+        namespace: str,
+        installed: list[K8sModel] | None = None,
+        *,
+        max_workers: int = 1,
+    ) -> K8sModelSequence:
+        """Apply (create or update) components that are not part of an
+        AbstractK8sPkg, e.g. the output of `helm template`, as they come.
+
+        The components are not sorted beforehand: they are applied in waves of
+        consecutive components of the same kind (see `stream_waves`), so a wave can
+        be applied while the next components are still being rendered.
+
+        Args:
+            components: The components, typically a generator
+            namespace: The namespace of namespaced components without one
+            installed: (recommended) If a list is provided, the applied objects are
+                appended to it as they are applied
+            max_workers: The maximum number of components applied concurrently
+
+        Returns:
+            The applied objects
+        """
+        if installed is None:
+            installed = []
+        self._apply_waves(
+            components,
+            namespace=namespace,
+            installed=installed,
+            max_workers=max_workers,
+            streaming=True,
+        )
+        return installed
+
+    def wait_until_ready(
+        self,
+        deploydocus_pkg: AbstractK8sPkg,
+        installed: K8sModelSequence | None = None,
+        *,
+        timeout: float = DEFAULT_READY_TIMEOUT,
+    ) -> K8sModelSequence:
+        """Wait until the installed components of a package are ready (Deployments
+        rolled out, Jobs completed, PersistentVolumeClaims bound...). The cluster is
+        watched, one watch per kind with the package's `default_selectors`, rather
+        than polled object by object. See `package.readiness`.
+
+        Args:
+            deploydocus_pkg: The installed package
+            installed: The components to wait for, e.g. as returned by install().
+                If None, the components currently installed are looked up.
+            timeout: The maximum number of seconds to wait
+
+        Returns:
+            The components waited for, as last seen
+
+        Raises:
+            ReadinessTimeout: When some components are not ready in time
+        """
+        if installed is None:
+            installed = self.find_current_app_installations(
+                deploydocus_pkg, metadata_only=True
+            )
+        return wait_until_ready(
+            self.api_client,
+            installed,
+            namespace=deploydocus_pkg.instance_settings.instance_namespace,
+            label_selector=_label_selector(deploydocus_pkg),
+            timeout=timeout,
+        )
+
+    def _delete_installed(
+        self,
+        component: K8sModel,
+        namespace: str,
+        propagation_policy: str | None = None,
+    ) -> V1Status | None:
+        """Delete a single installed object. An object that is already gone is
+        skipped (returns None).
+        """
+        delete_op, namespaced = k8s_crud_callable(
+            kind=component.kind, k8s_client=self.api_client, op="delete"
+        )
+        kwargs: dict[str, Any] = {"name": component.metadata.name}
+        if namespaced:
+            kwargs["namespace"] = component.metadata.namespace or namespace
+        if propagation_policy:
+            kwargs["propagation_policy"] = propagation_policy
+        try:
+            return delete_op(**kwargs)
+        except ApiException as ae:
+            if ae.status == 404:
+                return None
+            raise
+
+    def _delete_kind_collection(
+        self,
+        kind: str,
+        selectors: str,
+        namespace: str,
+        propagation_policy: str | None = None,
+    ) -> bool:
+        """Delete all the objects of a kind selected by the label selectors with a
+        single delete_collection call.
+
+        Returns:
+            False if the kind does not support delete_collection
+        """
+        try:
+            delete_collection, namespaced = k8s_crud_callable(
+                kind=kind, k8s_client=self.api_client, op="delete_collection"
+            )
+        except UnsupportedOperation:
+            return False
+        kwargs: dict[str, Any] = {"label_selector": selectors}
+        if namespaced:
+            kwargs["namespace"] = namespace
+        if propagation_policy:
+            kwargs["propagation_policy"] = propagation_policy
+        delete_collection(**kwargs)
+        return True
+
     def uninstall(
         self,
         deploydocus_pkg: AbstractK8sPkg,
+        *,
+        max_workers: int = 1,
+        propagation_policy: str | None = None,
+        use_delete_collection: bool = False,
     ) -> Sequence[K8sModel]:
         """Uninstall a package.
 
+        The components are deleted kind by kind, in the reverse of the
+        SUPPORTED_KINDS order. The components of a kind are deleted concurrently
+        and all of them are deleted before moving on to the next kind.
+
         Args:
             deploydocus_pkg: The package to install
+            max_workers: The maximum number of components deleted concurrently
+            propagation_policy: The propagation policy of the deletes
+                ("Foreground", "Background" or "Orphan"). None uses the default
+                policy of each kind.
+            use_delete_collection: If True, the components of a kind are deleted
+                with a single delete_collection call using the package's
+                `default_selectors` whenever every object of that kind matched by
+                the selectors is a component of the package (i.e. no object owned
+                by another one, such as the Pods of a ReplicaSet, matches).
 
         Returns:
+            The components deleted
 
         """
         uninstalled: list[K8sModel] = []
+        namespace = deploydocus_pkg.instance_settings.instance_namespace
+        selectors = _label_selector(deploydocus_pkg)
+        kinds = [k for k in SUPPORTED_KINDS if k[-4:] != "List"]
 
-        components_list: K8sModelSequence = self.find_current_app_installations(
-            deploydocus_pkg
-        )
-        logger.warning(f"{components_list=}")
-        for component in reversed(components_list):
-            delete_op, namespaced = k8s_crud_callable(
-                kind=cast(K8sModel, component).kind,
-                k8s_client=self.api_client,
-                op="delete",
+        def _list(kind: str) -> K8sModelSequence:
+            return self._list_installed(
+                kind, selectors, namespace, metadata_only=True, include_owned=True
             )
-            ret: V1Status = (
-                delete_op(
-                    name=cast(K8sModel, component).metadata.name,
-                    namespace=deploydocus_pkg.instance_settings.instance_namespace,
-                )
-                if namespaced
-                else delete_op(
-                    name=cast(K8sModel, component).metadata.name,
-                )
+
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            listed = list(executor.map(_list, kinds))
+            logger.debug(
+                "Uninstalling: "
+                + ", ".join(f"{len(i)} {k}" for k, i in zip(kinds, listed) if i)
             )
+            for kind, items in reversed(list(zip(kinds, listed))):
+                components = [
+                    i
+                    for i in items
+                    if not getattr(i.metadata, "owner_references", None)
+                ]
+                if not components:
+                    continue
+                if (
+                    use_delete_collection
+                    and len(components) == len(items)
+                    and len(components) > 1
+                    and self._delete_kind_collection(
+                        kind, selectors, namespace, propagation_policy
+                    )
+                ):
+                    uninstalled.extend(components)
+                    continue
 
-            if ret:
-                uninstalled.append(component)
+                uninstalled.extend(
+                    self._delete_wave(
+                        executor, components, namespace, propagation_policy
+                    )
+                )
         return uninstalled
 
+    def _delete_wave(
+        self,
+        executor: ThreadPoolExecutor,
+        components: Sequence[K8sModel],
+        namespace: str,
+        propagation_policy: str | None = None,
+    ) -> list[K8sModel]:
+        """Delete installed objects concurrently
+
+        Returns:
+            The objects deleted (not those already gone)
+
+        Raises:
+            ApiException: The first failure, once all the deletes have been
+                attempted
+        """
+        futures = [
+            executor.submit(self._delete_installed, c, namespace, propagation_policy)
+            for c in components
+        ]
+        wait(futures)
+        deleted: list[K8sModel] = []
+        failure: BaseException | None = None
+        for component, future in zip(components, futures):
+            if (exc := future.exception()) is not None:
+                failure = failure or exc
+            elif future.result():
+                deleted.append(component)
+        if failure is not None:
+            raise failure
+        return deleted
+
+    def delete_installed(
+        self,
+        components: Sequence[K8sModel],
+        *,
+        namespace: str = "default",
+        max_workers: int = 1,
+        propagation_policy: str | None = None,
+    ) -> list[K8sModel]:
+        """Delete installed objects (e.g. as found by find_installed), kind by kind
+        in the reverse of installation order, as uninstall() does. The objects of a
+        kind are deleted concurrently, whatever their namespace.
+
+        Args:
+            components: The installed objects (metadata is enough)
+            namespace: The namespace of namespaced objects without one
+            max_workers: The maximum number of objects deleted concurrently
+            propagation_policy: The propagation policy of the deletes (see
+                uninstall())
+
+        Returns:
+            The objects deleted
+        """
+        deleted: list[K8sModel] = []
+        waves = list(install_waves(components))
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            for wave in reversed(waves):
+                deleted.extend(
+                    self._delete_wave(executor, wave, namespace, propagation_policy)
+                )
+        return deleted
+
     def revert_install(
         self, installed: ManifestSequence, namespace: str, uninstall_point=0
     ) -> ManifestSequence:
@@ -253,92 +622,251 @@ class PkgInstaller:
         uninstalled = []
         for component in reversed(installed[uninstall_point:]):
             logger.info(f"Reverting: {component}")
-            ret = (
-                delete_from_dict(
-                    self.api_client,
-                    data=component,
-                    namespace=namespace,
-                )
-                if isinstance(component, dict)
-                else delete_from_model(
-                    self.api_client,
-                    data=component,
-                    namespace=namespace,
-                )
-            )
+            ret = delete_from_dict(self.api_client, data=component, namespace=namespace)
 
             if ret:
                 uninstalled.append(ret)
         return uninstalled
 
-    def find_current_app_installations(
+    def _list_installed(
         self,
-        deploydocus_pkg: AbstractK8sPkg,
+        kind: str,
+        selectors: str,
+        namespace: str | None,
+        metadata_only: bool,
+        include_owned: bool = False,
     ) -> K8sModelSequence:
-        """Look for installed versions of the application
+        """List the objects of a single kind selected by the label selectors.
+        Objects owned by other objects (e.g. the ReplicaSets of a Deployment) are
+        left out unless `include_owned` is True.
 
         Args:
-            deploydocus_pkg:
+            kind: The kind to list
+            selectors: The label selector
+            namespace: The namespace for namespaced kinds. None lists all the
+                namespaces (metadata_only only)
+            metadata_only: If True, only the metadata of the objects is fetched
+            include_owned: If True, objects owned by other objects are kept
 
         Returns:
-            The components of an installed package (in installation order)
+            The objects found
         """
-        selectors = ",".join(
-            [f"{k}={v}" for k, v in deploydocus_pkg.default_selectors.items()]
-        )
-        existing_components: list[K8sModel] = []
-        for kind in SUPPORTED_KINDS:
-            try:
-                if kind[-4:] == "List":
-                    continue
-                _callable, _namespaced = k8s_crud_callable(
-                    k8s_client=self.api_client, op="list", kind=kind
+        try:
+            _callable, _namespaced = k8s_crud_callable(
+                k8s_client=self.api_client, op="list", kind=kind
+            )
+            _items: K8sModelSequence
+            list_namespace = namespace if _namespaced else None
+            if self.informers is not None and self.informers.covers(
+                kind, list_namespace, selectors
+            ):
+                return [
+                    # Do not redact the Secrets of the cache
+                    _unlist_k8s_model(copy.deepcopy(i), kind) if kind == "Secret" else i
+                    for i in self.informers.list(kind, list_namespace, selectors)
+                    if include_owned
+                    or not getattr(i.metadata, "owner_references", None)
+                ]
+            if metadata_only:
+                _items = list_metadata_only(
+                    self.api_client,
+                    kind=kind,
+                    namespaced=_namespaced,
+                    namespace=namespace,
+                    label_selector=selectors,
                 )
-
+            else:
                 _components: K8sListModel = (
-                    _callable(
-                        namespace=deploydocus_pkg.instance_settings.instance_namespace,
-                        label_selector=selectors,
-                    )
+                    _callable(namespace=namespace, label_selector=selectors)
                     if _namespaced
                     else _callable(label_selector=selectors)
                 )
                 logger.debug(f"{_components=}")
-                if _components.items:
-                    items = [
-                        _unlist_k8s_model(i, kind)
-                        for i in cast(K8sModelSequence, _components.items)
-                        if not getattr(i.metadata, "owner_references", None)
-                    ]
-                    existing_components.extend(items)
-            except TypeError as t:
-                raise Exception(f"{kind=}") from t
-            except ApiException as ae:
-                if ae.status == 404:
-                    continue
-                logger.error(f"{kind=} {ae.status=} {ae.reason=} {ae.body=}")
-                raise
+                _items = cast(K8sModelSequence, _components.items or [])
+            return [
+                _unlist_k8s_model(i, kind)
+                for i in _items
+                if include_owned or not getattr(i.metadata, "owner_references", None)
+            ]
+        except TypeError as t:
+            raise Exception(f"{kind=}") from t
+        except ApiException as ae:
+            if ae.status == 404:
+                return []
+            logger.error(f"{kind=} {ae.status=} {ae.reason=} {ae.body=}")
+            raise
+
+    def find_current_app_installations(
+        self,
+        deploydocus_pkg: AbstractK8sPkg,
+        *,
+        rendered_kinds_only: bool = False,
+        extra_kinds: Iterable[str] = (),
+        metadata_only: bool = False,
+        max_workers: int = 1,
+    ) -> K8sModelSequence:
+        """Look for installed versions of the application
+
+        Args:
+            deploydocus_pkg:
+            rendered_kinds_only: If True, only the kinds present in the rendered
+                package (plus `extra_kinds`) are looked up instead of all the
+                SUPPORTED_KINDS
+            extra_kinds: Kinds to look up in addition to the rendered ones, e.g. kinds
+                that a previous version of the package used to install
+            metadata_only: If True, only the metadata of the installed objects is
+                fetched (a PartialObjectMetadataList), not their full bodies
+            max_workers: The maximum number of kinds looked up concurrently
+
+        Returns:
+            The components of an installed package (in installation order)
+        """
+        selectors = _label_selector(deploydocus_pkg)
+        kinds: list[str]
+        if rendered_kinds_only:
+            wanted = {component_kind(c) for c in deploydocus_pkg.render()}
+            wanted.update(extra_kinds)
+            kinds = sorted(wanted.intersection(SUPPORTED_KINDS), key=kind_rank)
+            if unsupported := wanted.difference(kinds):
+                logger.warning(f"Not looking up unsupported kinds {unsupported}")
+        else:
+            kinds = list(SUPPORTED_KINDS)
+        kinds = [k for k in kinds if k[-4:] != "List"]
+
+        def _list(kind: str) -> K8sModelSequence:
+            return self._list_installed(
+                kind,
+                selectors,
+                namespace=deploydocus_pkg.instance_settings.instance_namespace,
+                metadata_only=metadata_only,
+            )
+
+        existing_components: list[K8sModel] = []
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            for items in executor.map(_list, kinds):
+                existing_components.extend(items)
         logger.info(f"{existing_components=}")
         return existing_components
 
+    def find_installed(
+        self,
+        selectors: str,
+        namespaces: Iterable[str] | None = None,
+        *,
+        max_workers: int = 1,
+    ) -> K8sModelSequence:
+        """Look up the installed objects selected by a label selector in several
+        namespaces (or all of them), fetching only their metadata. There is a
+        single list request per kind: across all the namespaces, unless only one
+        namespace is given. Objects owned by other objects are left out.
+
+        Args:
+            selectors: The label selector, e.g. the default_selectors of a release
+            namespaces: The namespaces to look in. None for all of them. Objects of
+                cluster-wide kinds are always included.
+            max_workers: The maximum number of kinds looked up concurrently
+
+        Returns:
+            The objects found, in installation order
+        """
+        wanted = set(namespaces) if namespaces is not None else None
+        namespace = next(iter(wanted)) if wanted and len(wanted) == 1 else None
+        kinds = [k for k in SUPPORTED_KINDS if k[-4:] != "List"]
+
+        def _list(kind: str) -> K8sModelSequence:
+            return self._list_installed(kind, selectors, namespace, metadata_only=True)
+
+        found: list[K8sModel] = []
+        with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+            for items in executor.map(_list, kinds):
+                found.extend(
+                    i
+                    for i in items
+                    if wanted is None
+                    or i.metadata.namespace is None
+                    or i.metadata.namespace in wanted
+                )
+        return found
+
     def upgrade_current_installation(
-        self, deploydocus_pkg: AbstractK8sPkg, create_allowed=True
-    ):
+        self,
+        deploydocus_pkg: AbstractK8sPkg,
+        create_allowed=True,
+        *,
+        pruned: list[K8sModel] | None = None,
+        max_workers: int = 1,
+    ) -> K8sModelSequence:
         """Upgrade an existing installation. If there is none, then (optionally),
         install
 
+        The rendered package is diffed against the installed objects using the spec
+        hash annotation recorded on them when they were last applied: new objects
+        are created, objects whose spec hash changed are patched, objects no longer
+        rendered are pruned and the others are left alone. Upgrading to an
+        unchanged package makes no writes.
+
         Args:
             create_allowed: If True, create a new
             deploydocus_pkg:
+            pruned: If a list is provided, the deleted Kubernetes objects are
+                appended to it
+            max_workers: The maximum number of components applied concurrently
 
         Returns:
+            The components created or patched
 
         """
-        current = self.find_current_app_installations(deploydocus_pkg)
+        current = self.find_current_app_installations(
+            deploydocus_pkg, metadata_only=True, max_workers=max_workers
+        )
         if not current and not create_allowed:
             raise AppNotFound
         elif not current and create_allowed:
-            self.install(deploydocus_pkg)
+            return self.install(deploydocus_pkg, max_workers=max_workers)
+
+        namespace = deploydocus_pkg.instance_settings.instance_namespace
+        diff = diff_manifests(
+            deploydocus_pkg.render(),
+            current,
+            namespace=namespace,
+            is_namespaced=self._is_namespaced,
+        )
+        logger.info(
+            f"Upgrading {deploydocus_pkg.pkg_name}: {len(diff.create)} to create, "
+            f"{len(diff.patch)} to patch, {len(diff.prune)} to prune, "
+            f"{len(diff.unchanged)} unchanged"
+        )
+
+        upgraded: list[K8sModel] = []
+        try:
+            self._apply_waves(
+                [*diff.create, *diff.patch],
+                namespace=namespace,
+                installed=upgraded,
+                max_workers=max_workers,
+                current={
+                    object_key(
+                        c, namespace=namespace, is_namespaced=self._is_namespaced
+                    ): c
+                    for c in current
+                },
+            )
+            if pruned is None:
+                pruned = []
+            for wave in reversed(list(install_waves(diff.prune))):
+                for obj in wave:
+                    if delete_from_model(
+                        self.api_client, data=obj, namespace=namespace
+                    ):
+                        pruned.append(obj)
+        except ApiException as ae:
+            ae.add_note(
+                "Upgrade failed: "
+                f"package={deploydocus_pkg.pkg_name} "
+                f"instance name={deploydocus_pkg.instance_settings}"
+            )
+            raise
+        return upgraded
 
 
 def _only_one(
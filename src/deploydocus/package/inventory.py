@@ -0,0 +1,189 @@
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
+from deploydocus.package.manifest import ObjectKey
+from deploydocus.package.pkg import DEPLOYDOCUS_DOMAIN
+from deploydocus.package.types import K8sModel
+
+if TYPE_CHECKING:
+    from deploydocus.package.installer import PkgInstaller
+
+logger = logging.getLogger(__name__)
+
+MANAGED_BY_SELECTOR = f"app.kubernetes.io/managed-by={DEPLOYDOCUS_DOMAIN}"
+
+
+class ReleaseKey(NamedTuple):
+    """Identifies a release: its instance name, package name and package version"""
+
+    instance: str
+    pkg_name: str | None
+    pkg_version: str | None
+
+
+@dataclass
+class InstalledRelease:
+    """A release found in the cluster and the objects it owns"""
+
+    key: ReleaseKey
+    objects: list[K8sModel] = field(default_factory=list)
+
+    @property
+    def namespaces(self) -> set[str]:
+        """The namespaces of its namespaced objects"""
+        return {o.metadata.namespace for o in self.objects if o.metadata.namespace}
+
+    @property
+    def kinds(self) -> Counter[str]:
+        """The number of objects of each kind"""
+        return Counter(o.kind for o in self.objects)
+
+
+def release_key(obj: K8sModel) -> ReleaseKey | None:
+    """The release an object belongs to, from its labels (see
+    AbstractK8sPkg.default_labels). The version comes from the `deploydocus-pkg`
+    label, `<pkg name>-<pkg version>`.
+
+    Args:
+        obj: An installed object (metadata is enough)
+
+    Returns:
+        The key of the release. None if the object has no instance label
+    """
+    labels = obj.metadata.labels or {}
+    if (instance := labels.get("app.kubernetes.io/instance")) is None:
+        return None
+    pkg_name = labels.get("app.kubernetes.io/name")
+    pkg_version: str | None = None
+    if pkg_label := labels.get("deploydocus-pkg"):
+        if pkg_name and pkg_label.startswith(f"{pkg_name}-"):
+            pkg_version = pkg_label[len(pkg_name) + 1 :]
+        else:
+            name, _, pkg_version = pkg_label.rpartition("-")
+            pkg_name = pkg_name or name
+    return ReleaseKey(instance, pkg_name, pkg_version)
+
+
+def _object_key(obj: K8sModel) -> ObjectKey:
+    return obj.kind, obj.metadata.namespace, obj.metadata.name
+
+
+class Inventory:
+    """An in-memory index of the releases installed in a cluster: all the objects
+    managed by deploydocus, grouped by release (instance, package name and
+    version) and indexed by instance, package, namespace and object.
+    """
+
+    def __init__(self, objects: Iterable[K8sModel] = ()):
+        """
+
+        Args:
+            objects: The installed objects (metadata is enough)
+        """
+        self._releases: dict[ReleaseKey, InstalledRelease] = {}
+        self._by_instance: defaultdict[str, set[ReleaseKey]] = defaultdict(set)
+        self._by_pkg: defaultdict[str | None, set[ReleaseKey]] = defaultdict(set)
+        self._by_namespace: defaultdict[str, set[ReleaseKey]] = defaultdict(set)
+        self._owners: dict[ObjectKey, ReleaseKey] = {}
+        for obj in objects:
+            self.add(obj)
+
+    @classmethod
+    def collect(
+        cls, pkg_installer: "PkgInstaller", *, max_workers: int = 1
+    ) -> "Inventory":
+        """Build the inventory of a cluster with a single metadata-only list request
+        per kind, across all the namespaces, selecting the objects managed by
+        deploydocus
+
+        Args:
+            pkg_installer: The installer of the cluster
+            max_workers: The maximum number of kinds listed concurrently
+
+        Returns:
+            The inventory
+        """
+        return cls(
+            pkg_installer.find_installed(
+                MANAGED_BY_SELECTOR, None, max_workers=max_workers
+            )
+        )
+
+    def add(self, obj: K8sModel):
+        """Index an installed object. Objects without an instance label are
+        skipped.
+        """
+        if (key := release_key(obj)) is None:
+            logger.debug(f"Not part of a release: {_object_key(obj)}")
+            return
+        if (release := self._releases.get(key)) is None:
+            release = self._releases[key] = InstalledRelease(key)
+            self._by_instance[key.instance].add(key)
+            self._by_pkg[key.pkg_name].add(key)
+        release.objects.append(obj)
+        if obj.metadata.namespace:
+            self._by_namespace[obj.metadata.namespace].add(key)
+        self._owners[_object_key(obj)] = key
+
+    @property
+    def releases(self) -> list[InstalledRelease]:
+        """All the releases, sorted by key"""
+        return [self._releases[k] for k in sorted(self._releases, key=_sort_key)]
+
+    def get(self, key: ReleaseKey) -> InstalledRelease | None:
+        return self._releases.get(key)
+
+    def query(
+        self,
+        *,
+        instance: str | None = None,
+        pkg_name: str | None = None,
+        pkg_version: str | None = None,
+        namespace: str | None = None,
+    ) -> list[InstalledRelease]:
+        """The releases matching all the criteria given
+
+        Args:
+            instance: The instance name
+            pkg_name: The package name
+            pkg_version: The package version
+            namespace: A namespace in which the release has objects
+
+        Returns:
+            The releases, sorted by key
+        """
+        keys: set[ReleaseKey] = set(self._releases)
+        if instance is not None:
+            keys &= self._by_instance.get(instance, set())
+        if pkg_name is not None:
+            keys &= self._by_pkg.get(pkg_name, set())
+        if namespace is not None:
+            keys &= self._by_namespace.get(namespace, set())
+        if pkg_version is not None:
+            keys = {k for k in keys if k.pkg_version == pkg_version}
+        return [self._releases[k] for k in sorted(keys, key=_sort_key)]
+
+    def owner(
+        self, kind: str, namespace: str | None, name: str
+    ) -> InstalledRelease | None:
+        """The release owning an object
+
+        Args:
+            kind: The kind of the object
+            namespace: The namespace of the object (None for cluster-wide kinds)
+            name: The name of the object
+
+        Returns:
+            The release, None if the object is not part of one
+        """
+        key = self._owners.get((kind, namespace, name))
+        return self._releases[key] if key is not None else None
+
+    def __len__(self) -> int:
+        return len(self._releases)
+
+
+def _sort_key(key: ReleaseKey) -> tuple[str, str, str]:
+    return key.instance, key.pkg_name or "", key.pkg_version or ""
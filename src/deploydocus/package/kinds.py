@@ -0,0 +1,126 @@
+import itertools
+from threading import Lock
+from typing import Any, Iterable, Iterator, TypeVar, cast
+
+from deploydocus.package.types import SUPPORTED_KINDS
+
+T = TypeVar("T")
+
+# The rank of the kinds in installation order: SUPPORTED_KINDS first, in their
+# order, then the kinds registered with register_kind()
+_kind_ranks: dict[str, float] = {
+    kind: float(i) for i, kind in enumerate(SUPPORTED_KINDS)
+}
+_kind_ranks_lock = Lock()
+_next_rank: float = float(len(SUPPORTED_KINDS))
+
+UNKNOWN_KIND_RANK = float("inf")
+"""The rank of the kinds neither supported nor registered: installed last"""
+
+
+def kind_rank(kind: str) -> float:
+    """The position of a kind in installation order (lowest first)
+
+    Args:
+        kind: The kind
+
+    Returns:
+        The rank of the kind. UNKNOWN_KIND_RANK for unknown kinds
+    """
+    return _kind_ranks.get(kind, UNKNOWN_KIND_RANK)
+
+
+def register_kind(kind: str, *, after: str | None = None) -> float:
+    """Give a kind that is not in SUPPORTED_KINDS (e.g. the kind of a custom
+    resource) a place in installation order. A kind that already has one keeps it.
+
+    Args:
+        kind: The kind
+        after: The kind after which to install it (and before the kinds that
+            follow that one). By default, the kind goes after all the supported
+            kinds and the kinds registered before it, but before unknown kinds: a
+            custom resource comes after its CustomResourceDefinition and
+            Namespace.
+
+    Returns:
+        The rank of the kind
+    """
+    global _next_rank
+    with _kind_ranks_lock:
+        if (rank := _kind_ranks.get(kind)) is not None:
+            return rank
+        if after is None:
+            rank = _next_rank
+            _next_rank += 1
+        else:
+            assert after in _kind_ranks, f"Cannot rank {kind} after unknown {after}"
+            after_rank = _kind_ranks[after]
+            next_ranks = [r for r in _kind_ranks.values() if r > after_rank]
+            rank = (after_rank + min(next_ranks, default=after_rank + 2)) / 2
+            _next_rank = max(_next_rank, rank + 1)
+        _kind_ranks[kind] = rank
+        return rank
+
+
+def component_kind(component: Any) -> str:
+    """The kind of a manifest (dict), kubernetes.client model or Manifest"""
+    return (
+        cast(dict, component)["kind"]
+        if isinstance(component, dict)
+        else cast(str, getattr(component, "kind"))
+    )
+
+
+def sort_by_kind(components: Iterable[T]) -> list[T]:
+    """Sort components in installation order (see kind_rank). The sort is stable:
+    components of the same kind keep their order.
+
+    Args:
+        components: Manifests (dicts), kubernetes.client models or Manifests
+
+    Returns:
+        The sorted components
+    """
+    return sorted(components, key=lambda c: kind_rank(component_kind(c)))
+
+
+def install_waves(components: Iterable[T]) -> Iterator[list[T]]:
+    """Group the components into waves of the same kind, in installation order
+    (Namespaces, RBAC and other prerequisites first, workloads later, then
+    registered kinds and unknown kinds last). Within a wave the rendered order is
+    preserved.
+
+    Args:
+        components: The rendered components
+
+    Returns:
+        The waves in the order in which they must be applied
+    """
+    for _, wave in itertools.groupby(sort_by_kind(components), key=component_kind):
+        yield list(wave)
+
+
+def stream_waves(components: Iterable[T]) -> Iterator[list[T]]:
+    """Group the components into waves as they come, without waiting for all of
+    them: a wave is flushed as soon as a component of another kind rank arrives.
+    Streams that are already in installation order (such as `helm template` output,
+    mostly) give the same waves as install_waves(); out of order components still
+    get applied, in a wave of their own.
+
+    Args:
+        components: The components, e.g. as they are rendered
+
+    Returns:
+        The waves in the order in which they must be applied
+    """
+    wave: list[T] = []
+    wave_rank: float | None = None
+    for component in components:
+        rank = kind_rank(component_kind(component))
+        if wave and rank != wave_rank:
+            yield wave
+            wave = []
+        wave_rank = rank
+        wave.append(component)
+    if wave:
+        yield wave
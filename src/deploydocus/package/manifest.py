@@ -0,0 +1,218 @@
+import functools
+import hashlib
+import json
+from typing import Any, Callable, Mapping
+
+from kubernetes.client import ApiClient
+
+from deploydocus.package.pkg import SPEC_HASH_ANNOTATION
+from deploydocus.package.types import K8sModel, ManifestDict
+
+# Fields set by the API server, which are not part of the desired state
+_SERVER_METADATA = frozenset(
+    [
+        "creationTimestamp",
+        "generation",
+        "managedFields",
+        "resourceVersion",
+        "selfLink",
+        "uid",
+    ]
+)
+
+type ObjectKey = tuple[str, str | None, str]
+
+
+def spec_hash(manifest: Mapping[str, Any]) -> str:
+    """A digest of the desired state of an object: the manifest without its status,
+    the metadata fields set by the API server and the spec hash annotation itself,
+    serialized canonically.
+
+    Args:
+        manifest: The manifest, as a dict (camelCase keys, as rendered)
+
+    Returns:
+        The hex digest
+    """
+    canonical = {k: v for k, v in manifest.items() if k != "status"}
+    metadata = {
+        k: v
+        for k, v in (manifest.get("metadata") or {}).items()
+        if k not in _SERVER_METADATA
+    }
+    annotations = {
+        k: v
+        for k, v in (metadata.pop("annotations", None) or {}).items()
+        if k != SPEC_HASH_ANNOTATION
+    }
+    if annotations:
+        metadata["annotations"] = annotations
+    canonical["metadata"] = metadata
+    serialized = json.dumps(
+        canonical, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def _annotated(manifest: Mapping[str, Any], digest: str) -> dict[str, Any]:
+    metadata = dict(manifest.get("metadata") or {})
+    metadata["annotations"] = {
+        **(metadata.get("annotations") or {}),
+        SPEC_HASH_ANNOTATION: digest,
+    }
+    return {**manifest, "metadata": metadata}
+
+
+def with_spec_hash(manifest: Mapping[str, Any]) -> dict[str, Any]:
+    """A copy of the manifest carrying its spec hash annotation
+
+    Args:
+        manifest: The manifest, as a dict
+
+    Returns:
+        The annotated copy
+    """
+    return _annotated(manifest, spec_hash(manifest))
+
+
+@functools.cache
+def _serializer() -> ApiClient:
+    # Only used for sanitize_for_serialization, which never reaches the network
+    return ApiClient()
+
+
+class Manifest:
+    """The internal record of an object: its identity (kind, apiVersion, namespace,
+    name), its labels and its body, which is all that ordering, indexing and
+    diffing need. The spec hash is computed once, the first time it is needed.
+
+    A rendered dict is wrapped as it is, neither copied nor converted; a
+    kubernetes.client model is read through its attributes and only serialized
+    if its body is needed.
+    """
+
+    __slots__ = (
+        "kind",
+        "api_version",
+        "namespace",
+        "name",
+        "labels",
+        "_body",
+        "_model",
+        "_spec_hash",
+    )
+
+    kind: str
+    api_version: str | None
+    namespace: str | None
+    name: str
+    labels: Mapping[str, str]
+
+    def __init__(
+        self,
+        kind: str,
+        api_version: str | None,
+        name: str,
+        namespace: str | None = None,
+        labels: Mapping[str, str] | None = None,
+        *,
+        body: Mapping[str, Any] | None = None,
+        model: Any = None,
+    ):
+        """
+
+        Args:
+            kind: The kind of the object
+            api_version: The apiVersion of the object
+            name: The name of the object ("" for lists)
+            namespace: The namespace of the object, if set
+            labels: The labels of the object
+            body: The manifest as a dict (camelCase keys)
+            model: The kubernetes.client model, when there is no body
+        """
+        assert (
+            body is not None or model is not None
+        ), "Either the body or the model is required"
+        self.kind = kind
+        self.api_version = api_version
+        self.name = name
+        self.namespace = namespace
+        self.labels = labels or {}
+        self._body = body
+        self._model = model
+        self._spec_hash: str | None = None
+
+    @classmethod
+    def from_dict(cls, body: Mapping[str, Any]) -> "Manifest":
+        metadata = body.get("metadata") or {}
+        return cls(
+            body["kind"],
+            body.get("apiVersion"),
+            metadata.get("name", ""),
+            metadata.get("namespace"),
+            metadata.get("labels"),
+            body=body,
+        )
+
+    @classmethod
+    def from_model(cls, model: K8sModel) -> "Manifest":
+        # Lists (e.g. V1SecretList) have a metadata without name nor labels
+        metadata = model.metadata
+        return cls(
+            model.kind,
+            model.api_version,
+            getattr(metadata, "name", ""),
+            getattr(metadata, "namespace", None),
+            getattr(metadata, "labels", None),
+            model=model,
+        )
+
+    @classmethod
+    def of(cls, component: "ManifestDict | Manifest") -> "Manifest":
+        """The record of a component, whatever its representation
+
+        Args:
+            component: A manifest (dict), a kubernetes.client model or a record
+
+        Returns:
+            The record (the component itself if it is one already)
+        """
+        if isinstance(component, Manifest):
+            return component
+        if isinstance(component, Mapping):
+            return cls.from_dict(component)
+        return cls.from_model(component)
+
+    @property
+    def body(self) -> Mapping[str, Any]:
+        """The manifest as a dict (camelCase keys). A model is serialized the first
+        time its body is needed.
+        """
+        if self._body is None:
+            self._body = _serializer().sanitize_for_serialization(self._model)
+        return self._body
+
+    @property
+    def spec_hash(self) -> str:
+        """See `spec_hash`"""
+        if self._spec_hash is None:
+            self._spec_hash = spec_hash(self.body)
+        return self._spec_hash
+
+    def with_spec_hash(self) -> dict[str, Any]:
+        """A copy of the body carrying its spec hash annotation, i.e. the body
+        written to the API server
+        """
+        return _annotated(self.body, self.spec_hash)
+
+    def key(self, *, namespace: str, is_namespaced: Callable[[str], bool]) -> ObjectKey:
+        """See `deploydocus.package.diff.object_key`"""
+        return (
+            self.kind,
+            (self.namespace or namespace) if is_namespaced(self.kind) else None,
+            self.name,
+        )
+
+    def __repr__(self) -> str:
+        namespace = f"{self.namespace}/" if self.namespace else ""
+        return f"Manifest({self.kind} {namespace}{self.name})"
@@ -2,40 +2,77 @@ import abc
 import logging
 from functools import wraps
 from pathlib import Path
-from typing import LiteralString
+from typing import LiteralString, Sequence
 
+from deploydocus.package.kinds import component_kind, kind_rank, register_kind
 from deploydocus.package.settings import InstanceSettings
-from deploydocus.package.types import (
-    SUPPORTED_KINDS,
-    LabelsDict,
-    LabelsSelector,
-    ManifestSequence,
-)
+from deploydocus.package.types import LabelsDict, LabelsSelector, ManifestSequence
 
 logger = logging.getLogger(__name__)
 
 DEPLOYDOCUS_DOMAIN: LiteralString = "deploydocus.io"
+# Along with the `default_labels`, every object applied by the PkgInstaller carries
+# this annotation: the digest of its rendered manifest. Objects whose annotation
+# matches the newly rendered manifest are not written again.
+SPEC_HASH_ANNOTATION: LiteralString = f"{DEPLOYDOCUS_DOMAIN}/spec-hash"
 
 
 def autosort(f):
+    """Sort the components returned by a render() method in installation order
+    (see `package.kinds`). Kinds that are neither supported nor registered go last.
+    """
+
     @wraps(f)
     def wrapped(*args, **kwargs):
         ret: ManifestSequence = f(*args, **kwargs)
-        ret.sort(
-            key=lambda obj: list(SUPPORTED_KINDS).index(
-                obj["kind"] if isinstance(obj, dict) else obj.kind
-            )
-        )
+        ret.sort(key=lambda obj: kind_rank(component_kind(obj)))
         return ret
 
-    print(type(f))
-
     return wrapped
 
 
+def release_selectors(
+    instance_name: str, pkg_name: str | None = None
+) -> LabelsSelector:
+    """The labels selecting the objects of a release (see
+    AbstractK8sPkg.default_selectors), without the package at hand
+
+    Args:
+        instance_name: The instance name of the release
+        pkg_name: The package name. None selects the instance whatever its
+            package
+
+    Returns:
+        The labels
+    """
+    selectors: LabelsSelector = {
+        "app.kubernetes.io/instance": instance_name,
+        "app.kubernetes.io/managed-by": DEPLOYDOCUS_DOMAIN,
+    }
+    if pkg_name is not None:
+        return {"app.kubernetes.io/name": pkg_name, **selectors}
+    return selectors
+
+
 class AbstractK8sPkg(abc.ABC):
     pkg_name: str
     pkg_version: str
+    custom_kinds: Sequence[str] = ()
+    """The kinds not in SUPPORTED_KINDS that the package renders (e.g. custom
+    resources), in the order in which to install them, after the supported kinds.
+    They are registered with `package.kinds.register_kind` when the package class
+    is defined.
+
+    Only their place in installation order is registered: it orders the rendered
+    components and their install waves. Installing, reading or deleting an object
+    still goes through `package.utils.crud_target`, which only knows the
+    SUPPORTED_KINDS, so PkgInstaller rejects the objects of these kinds.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for kind in cls.custom_kinds:
+            register_kind(kind)
 
     def __init__(
         self,
@@ -67,11 +104,7 @@ class AbstractK8sPkg(abc.ABC):
 
     @property
     def default_selectors(self) -> LabelsSelector:
-        return {
-            "app.kubernetes.io/name": self.pkg_name,
-            "app.kubernetes.io/instance": self.instance_settings.instance_name,
-            "app.kubernetes.io/managed-by": DEPLOYDOCUS_DOMAIN,
-        }
+        return release_selectors(self.instance_settings.instance_name, self.pkg_name)
 
     def read_template(self, template_filename: str, **kwargs) -> str:
         """
@@ -0,0 +1,295 @@
+import functools
+import logging
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from threading import Event, Lock
+from typing import Any, Callable, Iterable
+
+from kubernetes import watch
+from kubernetes.client import ApiClient
+from kubernetes.client.exceptions import ApiException  # type: ignore
+
+from deploydocus.package.diff import ObjectKey, object_key
+from deploydocus.package.errors import ReadinessTimeout
+from deploydocus.package.types import K8sModel, K8sModelSequence
+from deploydocus.package.utils import crud_target, interrupt_response, k8s_api
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_READY_TIMEOUT: float = 300.0
+
+type ReadinessRule = Callable[[Any], bool]
+
+
+def _condition_true(obj: Any, condition_type: str) -> bool:
+    return any(
+        c.type == condition_type and c.status == "True"
+        for c in (obj.status.conditions or [])
+    )
+
+
+def _observed(obj: Any) -> bool:
+    """The controller has seen the latest spec of the object"""
+    return (obj.status.observed_generation or 0) >= (obj.metadata.generation or 0)
+
+
+def _deployment_ready(obj: Any) -> bool:
+    # Same checks as `kubectl rollout status deployment`
+    replicas = 1 if obj.spec.replicas is None else obj.spec.replicas
+    status = obj.status
+    return (
+        _observed(obj)
+        and (status.updated_replicas or 0) >= replicas
+        and (status.replicas or 0) <= (status.updated_replicas or 0)
+        and (status.available_replicas or 0) >= (status.updated_replicas or 0)
+    )
+
+
+def _stateful_set_ready(obj: Any) -> bool:
+    replicas = 1 if obj.spec.replicas is None else obj.spec.replicas
+    status = obj.status
+    return (
+        _observed(obj)
+        and (status.ready_replicas or 0) >= replicas
+        and (status.updated_replicas or 0) >= replicas
+    )
+
+
+def _daemon_set_ready(obj: Any) -> bool:
+    status = obj.status
+    return (
+        _observed(obj)
+        and (status.updated_number_scheduled or 0) >= status.desired_number_scheduled
+        and (status.number_available or 0) >= status.desired_number_scheduled
+    )
+
+
+def _replica_set_ready(obj: Any) -> bool:
+    replicas = 1 if obj.spec.replicas is None else obj.spec.replicas
+    return _observed(obj) and (obj.status.ready_replicas or 0) >= replicas
+
+
+def _job_ready(obj: Any) -> bool:
+    completions = 1 if obj.spec.completions is None else obj.spec.completions
+    return (
+        _condition_true(obj, "Complete") or (obj.status.succeeded or 0) >= completions
+    )
+
+
+def _pvc_ready(obj: Any) -> bool:
+    return obj.status.phase == "Bound"
+
+
+def _pod_ready(obj: Any) -> bool:
+    return obj.status.phase == "Succeeded" or _condition_true(obj, "Ready")
+
+
+READINESS_RULES: dict[str, ReadinessRule] = {
+    "DaemonSet": _daemon_set_ready,
+    "Deployment": _deployment_ready,
+    "Job": _job_ready,
+    "PersistentVolumeClaim": _pvc_ready,
+    "Pod": _pod_ready,
+    "ReplicaSet": _replica_set_ready,
+    "StatefulSet": _stateful_set_ready,
+}
+"""The kinds whose readiness is waited for. Objects of other kinds are ready as
+soon as they are installed."""
+
+
+def is_ready(obj: K8sModel) -> bool:
+    """Tell if an installed object is ready according to the rule of its kind
+
+    Args:
+        obj: The installed object (as read from the cluster)
+
+    Returns:
+        True if the object is ready or its kind has no readiness rule
+    """
+    rule = READINESS_RULES.get(obj.kind)
+    return rule is None or (obj.status is not None and rule(obj))
+
+
+class _WatchGroup:
+    """The watches of a `wait_until_ready` call, so that they can all be cancelled
+    as soon as one of them fails.
+
+    Stopping a `Watch` only takes effect at its next event, which may take up to
+    the whole timeout: the connection of each watch in progress is also shut down,
+    which ends it right away.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._responses: dict[watch.Watch, Any] = {}
+        self.stopped = Event()
+
+    def request(self, w: watch.Watch, list_fn: Callable) -> Callable:
+        """Wrap the list function of a watch to keep track of its responses"""
+
+        @functools.wraps(list_fn)
+        def _request(*args, **kwargs):
+            response = list_fn(*args, **kwargs)
+            with self._lock:
+                self._responses[w] = response
+            if self.stopped.is_set():
+                interrupt_response(response)
+            return response
+
+        return _request
+
+    def done(self, w: watch.Watch):
+        with self._lock:
+            self._responses.pop(w, None)
+
+    def stop(self):
+        """Stop all the watches in progress"""
+        self.stopped.set()
+        with self._lock:
+            responses = list(self._responses.items())
+        for w, response in responses:
+            w.stop()
+            interrupt_response(response)
+
+
+def _watch_kind(
+    api_client: ApiClient,
+    kind: str,
+    namespace: str | None,
+    label_selector: str,
+    names: set[str],
+    deadline: float,
+    watches: _WatchGroup,
+) -> dict[str, K8sModel]:
+    """Watch the objects of a kind selected by the label selector until the named
+    ones are all ready, the deadline passes or the watches are stopped.
+
+    The first request of the watch has no resourceVersion, so the API server starts
+    with an ADDED event for every object that already exists: no separate list (or
+    poll) is needed. The watch is resumed from the last resourceVersion seen if the
+    server closes it early, and restarted from scratch if that version expired.
+
+    Returns:
+        The ready objects, by name
+    """
+    target = crud_target(kind, "watch")
+    list_fn = getattr(k8s_api(api_client, target.api_class), target.method)
+    kwargs: dict[str, Any] = {"label_selector": label_selector}
+    if target.namespaced:
+        kwargs["namespace"] = namespace
+
+    ready: dict[str, K8sModel] = {}
+    resource_version: str | None = None
+    while (
+        not names.issubset(ready)
+        and not watches.stopped.is_set()
+        and (remaining := deadline - time.monotonic()) > 0
+    ):
+        w = watch.Watch()
+        if resource_version is not None:
+            kwargs["resource_version"] = resource_version
+        else:
+            kwargs.pop("resource_version", None)
+        try:
+            for event in w.stream(
+                watches.request(w, list_fn),
+                timeout_seconds=max(int(remaining), 1),
+                _request_timeout=remaining + 5,
+                **kwargs,
+            ):
+                obj = event["object"]
+                name = obj.metadata.name
+                resource_version = obj.metadata.resource_version
+                if name not in names:
+                    continue
+                obj.kind = kind
+                if event["type"] != "DELETED" and is_ready(obj):
+                    ready[name] = obj
+                else:
+                    ready.pop(name, None)
+                if names.issubset(ready) or watches.stopped.is_set():
+                    w.stop()
+        except Exception as e:
+            if watches.stopped.is_set():
+                # Cancelled, see _WatchGroup.stop
+                break
+            if not isinstance(e, ApiException) or e.status != 410:
+                raise
+            logger.debug(f"Watch of {kind} expired, restarting it")
+            resource_version = None
+        finally:
+            watches.done(w)
+    return ready
+
+
+def wait_until_ready(
+    api_client: ApiClient,
+    installed: Iterable[K8sModel],
+    *,
+    namespace: str,
+    label_selector: str,
+    timeout: float = DEFAULT_READY_TIMEOUT,
+) -> K8sModelSequence:
+    """Wait until the installed objects are ready.
+
+    A single watch is opened per kind (and namespace) with the label selector, for
+    the kinds that have a readiness rule (see READINESS_RULES), and all of them are
+    watched concurrently.
+
+    Args:
+        api_client: The kubernetes API client
+        installed: The installed objects
+        namespace: The namespace of namespaced objects without one
+        label_selector: A label selector that matches all the installed objects
+        timeout: The maximum number of seconds to wait
+
+    Returns:
+        The objects waited for, as last seen (in the order of `installed`)
+
+    Raises:
+        ReadinessTimeout: When some objects are not ready once the timeout elapsed
+    """
+
+    def _is_namespaced(kind: str) -> bool:
+        return crud_target(kind, "get").namespaced
+
+    keys: dict[ObjectKey, K8sModel] = {
+        object_key(i, namespace=namespace, is_namespaced=_is_namespaced): i
+        for i in installed
+        if i.kind in READINESS_RULES
+    }
+    watched: dict[tuple[str, str | None], set[str]] = {}
+    for kind, obj_namespace, name in keys:
+        watched.setdefault((kind, obj_namespace), set()).add(name)
+    if not watched:
+        return []
+
+    deadline = time.monotonic() + timeout
+    watches = _WatchGroup()
+    ready: dict[ObjectKey, K8sModel] = {}
+    with ThreadPoolExecutor(max_workers=len(watched)) as executor:
+        futures = {
+            (kind, obj_namespace): executor.submit(
+                _watch_kind,
+                api_client,
+                kind,
+                obj_namespace,
+                label_selector,
+                names,
+                deadline,
+                watches,
+            )
+            for (kind, obj_namespace), names in watched.items()
+        }
+        try:
+            wait(futures.values(), return_when=FIRST_EXCEPTION)
+        finally:
+            # A failed watch cancels the others
+            watches.stop()
+        for (kind, obj_namespace), future in futures.items():
+            for name, obj in future.result().items():
+                ready[(kind, obj_namespace, name)] = obj
+
+    if pending := [obj for key, obj in keys.items() if key not in ready]:
+        raise ReadinessTimeout(pending)
+    return [ready[key] for key in keys]
@@ -1,10 +1,14 @@
 import functools
+import json
 import logging
+import socket
 from pathlib import Path
-from typing import Any, Callable, Iterable, LiteralString, cast
+from threading import Lock
+from types import ModuleType
+from typing import Any, Callable, Iterable, LiteralString, Mapping, NamedTuple, cast
 
 from kubernetes import client
-from kubernetes.client import ApiClient, V1Status
+from kubernetes.client import ApiClient, Configuration, V1ObjectMeta, V1Status
 from kubernetes.client.rest import ApiException
 from kubernetes.utils import FailToCreateError
 from kubernetes.utils.create_from_yaml import (  # type: ignore
@@ -12,6 +16,7 @@ from kubernetes.utils.create_from_yaml import (  # type: ignore
     UPPER_FOLLOWED_BY_LOWER_RE,
 )
 
+from .manifest import Manifest
 from .types import SUPPORTED_KINDS, SUPPORTED_KUBERNETES_KINDS, K8sListModel, K8sModel
 
 
@@ -29,7 +34,8 @@ _valid_ops: list[LiteralString] = [
     "list",
     "patch",
     "update",
-]  # TODO: add support for 'watch'
+    "watch",
+]
 
 
 class UnsupportedOperation(Exception): ...
@@ -37,6 +43,12 @@ class UnsupportedOperation(Exception): ...
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_FIELD_MANAGER: LiteralString = "deploydocus"
+
+PARTIAL_OBJECT_METADATA_LIST: LiteralString = (
+    "application/json;as=PartialObjectMetadataList;v=v1;g=meta.k8s.io"
+)
+
 
 def remove_empty_val(obj_dict: Any) -> dict[str, Any] | list[Any]:
     """Removes from the dictionary, any key-value pair whose value is an empty.
@@ -75,6 +87,137 @@ def remove_empty_val(obj_dict: Any) -> dict[str, Any] | list[Any]:
         raise Exception(f"{obj_dict}") from e
 
 
+class CrudTarget(NamedTuple):
+    """How to perform an operation on a kind with the kubernetes client"""
+
+    method: str
+    """The name of the method of the API class, e.g. "read_namespaced_deployment"
+    """
+    namespaced: bool
+    """True if the method takes a namespace, i.e. the kind is namespaced"""
+    api_class: type
+    """The kubernetes.client API class, e.g. AppsV1Api"""
+
+
+def _api_class_name(api_version: str) -> str:
+    group, _, version = api_version.partition("/")
+    if version == "":
+        version = group
+        group = "core"
+    # Take care for the case e.g. api_type is "apiextensions.k8s.io"
+    # Only replace the last instance
+    group = "".join(group.rsplit(".k8s.io", 1))
+    # convert group name from DNS subdomain format to
+    # python class name convention
+    group = "".join(word.capitalize() for word in group.split("."))
+    return "{0}{1}Api".format(group, version.capitalize())
+
+
+@functools.cache
+def _resolve_crud_target(api_version: str, kind: str, op: str) -> CrudTarget | None:
+    api_class: type = getattr(client, _api_class_name(api_version))
+    if kind.endswith("List"):
+        kind = kind[:-4]
+    # Replace CamelCased kind into snake_case
+    method_suffix = UPPER_FOLLOWED_BY_LOWER_RE.sub(r"\1_\2", kind)
+    method_suffix = LOWER_OR_NUM_FOLLOWED_BY_UPPER_RE.sub(
+        r"\1_\2", method_suffix
+    ).lower()
+
+    # A watch is a list request with watch=True (see kubernetes.watch.Watch)
+    op_prefix = {"get": "read", "watch": "list"}.get(op, op)
+    fn_namespaced, fn_nonnamespaced = (
+        f"{op_prefix}_namespaced_{method_suffix}",
+        f"{op_prefix}_{method_suffix}",
+    )
+    if hasattr(api_class, fn_namespaced):
+        return CrudTarget(fn_namespaced, True, api_class)
+    elif hasattr(api_class, fn_nonnamespaced):
+        return CrudTarget(fn_nonnamespaced, False, api_class)
+    return None
+
+
+_CRUD_DISPATCH: dict[tuple[str, str], CrudTarget | None] = {
+    (kind, op): _resolve_crud_target(api_version, kind, op)
+    for kind, api_version in SUPPORTED_KINDS.items()
+    for op in _valid_ops
+}
+
+
+def crud_target(kind: str, op: str, api_version: str | None = None) -> CrudTarget:
+    """Look up how to perform an operation on a kind. The SUPPORTED_KINDS are
+    resolved once, at import.
+
+    Args:
+        kind: The kind of the object
+        op: One of the valid operations ("create", "get", "list", ...)
+        api_version: The apiVersion of the object. Only needed for kinds not in
+            SUPPORTED_KINDS
+
+    Returns:
+        The API class, method and whether the kind is namespaced
+
+    Raises:
+        UnsupportedOperation: If the kind does not support the operation
+    """
+    assert op in _valid_ops, f"Unknown verb {op}. Must be one of {_valid_ops}"
+    if api_version is None or api_version == SUPPORTED_KINDS.get(kind):
+        assert kind in SUPPORTED_KINDS, (
+            "The kind of objects supported have to be one of "
+            f"{SUPPORTED_KUBERNETES_KINDS}"
+        )
+        target = _CRUD_DISPATCH[(kind, op)]
+    else:
+        target = _resolve_crud_target(api_version, kind, op)
+    if target is None:
+        raise UnsupportedOperation(
+            f"The object of kind {kind} does not support a/an {op} operation."
+        )
+    return target
+
+
+_API_INSTANCES_ATTR = "_deploydocus_apis"
+_api_instances_lock = Lock()
+
+
+def k8s_api(k8s_client: ApiClient, api_class: type) -> Any:
+    """The instance of an API class bound to an API client. Instances are created
+    once per client and reused.
+
+    The instances are kept on the client itself, so that they are collected along
+    with it.
+
+    Args:
+        k8s_client: The kubernetes API client
+        api_class: The kubernetes.client API class, e.g. AppsV1Api
+
+    Returns:
+        The API object
+    """
+    with _api_instances_lock:
+        apis: dict[type, Any] = k8s_client.__dict__.setdefault(_API_INSTANCES_ATTR, {})
+        if (api := apis.get(api_class)) is None:
+            api = apis[api_class] = api_class(k8s_client)
+    return api
+
+
+def interrupt_response(response: Any):
+    """Shut down the connection of a streamed (`_preload_content=False`) urllib3
+    response, such as that of a watch. The thread reading it is unblocked right
+    away, whereas stopping a `Watch` only takes effect at its next event.
+
+    Args:
+        response: The response
+    """
+    sock = getattr(getattr(response, "connection", None), "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+@functools.cache
 def k8s_api_class(kind: str) -> type:
     """Searches
 
@@ -84,18 +227,10 @@ def k8s_api_class(kind: str) -> type:
     Returns:
 
     """
-    assert kind in list(
-        SUPPORTED_KINDS.keys()
+    assert (
+        kind in SUPPORTED_KINDS
     ), f"The kind of objects supported have to be one of {SUPPORTED_KUBERNETES_KINDS}"
-    api_version = SUPPORTED_KINDS[kind]
-    group, _, version = api_version.partition("/")
-    if version == "":
-        version = group
-        group = "core"
-    group = "".join(group.rsplit(".k8s.io", 1))
-    group = "".join(word.capitalize() for word in group.split("."))
-    ret = "{0}{1}Api".format(group, version.capitalize())
-    return getattr(client, ret)
+    return getattr(client, _api_class_name(SUPPORTED_KINDS[kind]))
 
 
 def k8s_crud_callable(
@@ -117,33 +252,254 @@ def k8s_crud_callable(
 
     """
     # TODO: replace labels_selector type to LabelsSelectorDict type
-    assert op in _valid_ops, f"Unknown verb {op}. Must be one of {_valid_ops}"
-    api_class: type = k8s_api_class(kind)
-    api_class_obj = api_class(k8s_client)
-    if kind.endswith("List"):
-        kind = kind[:-4]
-    method_suffix = UPPER_FOLLOWED_BY_LOWER_RE.sub(r"\1_\2", kind)
-    method_suffix = LOWER_OR_NUM_FOLLOWED_BY_UPPER_RE.sub(
-        r"\1_\2", method_suffix
-    ).lower()
+    target = crud_target(kind, op)
+    return getattr(k8s_api(k8s_client, target.api_class), target.method), (
+        target.namespaced
+    )
 
-    op_prefix = "read" if op == "get" else op
-    fn_namespaced, fn_nonnamespaced = (
-        f"{op_prefix}_namespaced_{method_suffix}",
-        f"{op_prefix}_{method_suffix}",
+
+def k8s_plural(kind: str) -> str:
+    """The (lowercase) plural resource name of a kind, as used in the API paths.
+
+    Args:
+        kind: e.g. "NetworkPolicy"
+
+    Returns:
+        e.g. "networkpolicies"
+    """
+    kind = kind.lower()
+    if kind.endswith("y"):
+        return f"{kind[:-1]}ies"
+    if kind.endswith("s"):
+        return f"{kind}es"
+    return f"{kind}s"
+
+
+def k8s_resource_path(
+    kind: str,
+    *,
+    namespaced: bool,
+    namespace: str | None = None,
+    name: str | None = None,
+) -> str:
+    """The API path of the collection of objects of a kind or, if a name is given,
+    of a single object.
+
+    Args:
+        kind: One of SUPPORTED_KINDS
+        namespaced: True if the kind is a namespaced kind
+        namespace: The namespace of the collection. Ignored for non-namespaced
+            kinds
+        name: The name of the object
+
+    Returns:
+        e.g. "/apis/apps/v1/namespaces/default/deployments"
+    """
+    api_version = SUPPORTED_KINDS[kind]
+    prefix = f"/api/{api_version}" if "/" not in api_version else f"/apis/{api_version}"
+    if namespaced and namespace:
+        prefix = f"{prefix}/namespaces/{namespace}"
+    path = f"{prefix}/{k8s_plural(kind)}"
+    return f"{path}/{name}" if name else path
+
+
+def k8s_model_class(kind: str, models: ModuleType = client) -> type:
+    """The kubernetes.client model class of a kind (e.g. V1Deployment)
+
+    Args:
+        kind: One of SUPPORTED_KINDS
+        models: The module of the models, kubernetes.client or a client mirroring
+            it (e.g. kubernetes_asyncio.client)
+
+    Returns:
+        The model class
+    """
+    _, _, version = SUPPORTED_KINDS[kind].rpartition("/")
+    return getattr(models, f"{version.capitalize()}{kind}")
+
+
+@functools.cache
+def _lenient_configuration(configuration_class: type = Configuration) -> Any:
+    # Metadata-only objects lack fields (e.g. roleRef) that the models require
+    configuration = configuration_class()
+    configuration.client_side_validation = False
+    return configuration
+
+
+class _JsonResponse:
+    """Adapter so that `ApiClient.deserialize` can decode an already read body"""
+
+    def __init__(self, data: Any):
+        self.data = json.dumps(data)
+
+
+def metadata_list_request(
+    kind: str,
+    *,
+    namespaced: bool,
+    namespace: str | None = None,
+    label_selector: str | None = None,
+) -> dict[str, Any]:
+    """The `ApiClient.call_api` arguments of a metadata-only list (see
+    `list_metadata_only`), except for the response type.
+    """
+    query_params = [("labelSelector", label_selector)] if label_selector else []
+    return dict(
+        resource_path=k8s_resource_path(
+            kind, namespaced=namespaced, namespace=namespace
+        ),
+        method="GET",
+        path_params={},
+        query_params=query_params,
+        header_params={"Accept": f"{PARTIAL_OBJECT_METADATA_LIST},application/json"},
+        auth_settings=["BearerToken"],
+        _return_http_data_only=True,
     )
 
-    if hasattr(api_class_obj, fn_namespaced):
-        # Namespaced object
-        return getattr(api_class_obj, fn_namespaced), True
-    elif hasattr(api_class_obj, fn_nonnamespaced):
-        # Non-namespaced object
-        return getattr(api_class_obj, fn_nonnamespaced), False
-    else:
-        raise UnsupportedOperation(
-            f"The object of kind {kind} does not support a/an "
-            f"{op} operation. {fn_namespaced}/{fn_nonnamespaced}"
+
+def metadata_list_models(
+    k8s_client: Any, kind: str, data: Mapping[str, Any], models: ModuleType = client
+) -> list[Any]:
+    """Turn the body of a metadata-only list into models of the kind with only
+    api_version, kind and metadata set.
+
+    Args:
+        k8s_client: The API client which deserializes the metadata
+        kind: One of SUPPORTED_KINDS
+        data: The decoded body of the response
+        models: The module of the models (see `k8s_model_class`)
+
+    Returns:
+        The models
+    """
+    items: list[dict[str, Any]] = data.get("items") or []
+    metadata: list[V1ObjectMeta] = k8s_client.deserialize(
+        _JsonResponse([item.get("metadata", {}) for item in items]),
+        "list[V1ObjectMeta]",
+    )
+    model_class = k8s_model_class(kind, models)
+    configuration = _lenient_configuration(models.Configuration)
+    return [
+        model_class(
+            api_version=SUPPORTED_KINDS[kind],
+            kind=kind,
+            metadata=m,
+            local_vars_configuration=configuration,
         )
+        for m in metadata
+    ]
+
+
+def list_metadata_only(
+    k8s_client: ApiClient,
+    *,
+    kind: str,
+    namespaced: bool,
+    namespace: str | None = None,
+    label_selector: str | None = None,
+) -> list[K8sModel]:
+    """List the objects of a kind fetching only their metadata (the API server
+    returns a PartialObjectMetadataList). Servers that do not support it fall back
+    to the full list, of which only the metadata is kept.
+
+    Args:
+        k8s_client: The kubernetes API client
+        kind: One of SUPPORTED_KINDS
+        namespaced: True if the kind is a namespaced kind
+        namespace: The namespace to list. None lists all namespaces
+        label_selector: The label selector
+
+    Returns:
+        The objects of the kind with only api_version, kind and metadata set
+    """
+    data = k8s_client.call_api(
+        **metadata_list_request(
+            kind,
+            namespaced=namespaced,
+            namespace=namespace,
+            label_selector=label_selector,
+        ),
+        response_type="object",
+    )
+    return metadata_list_models(k8s_client, kind, data)
+
+
+def server_side_apply_request(
+    body: Mapping[str, Any],
+    *,
+    namespaced: bool,
+    namespace: str | None = None,
+    field_manager: str = DEFAULT_FIELD_MANAGER,
+    force: bool = False,
+) -> dict[str, Any]:
+    """The `ApiClient.call_api` arguments of a server-side apply (see
+    `server_side_apply`), except for the response type.
+
+    The body is sent already serialized (JSON being YAML): depending on their
+    version, the REST clients either refuse to encode a dict for the
+    `application/apply-patch+yaml` content type or JSON-encode whatever they are
+    given. With a charset parameter (which the API server ignores), the content
+    type is not one they encode, and the bytes are sent as they are.
+    """
+    query_params: list[tuple[str, Any]] = [("fieldManager", field_manager)]
+    if force:
+        query_params.append(("force", "true"))
+    return dict(
+        resource_path=k8s_resource_path(
+            body["kind"],
+            namespaced=namespaced,
+            namespace=namespace,
+            name=body["metadata"]["name"],
+        ),
+        method="PATCH",
+        path_params={},
+        query_params=query_params,
+        header_params={
+            "Accept": "application/json",
+            "Content-Type": "application/apply-patch+yaml; charset=utf-8",
+        },
+        body=json.dumps(body).encode(),
+        auth_settings=["BearerToken"],
+        _return_http_data_only=True,
+    )
+
+
+def server_side_apply(
+    k8s_client: ApiClient,
+    body: Any,
+    *,
+    namespaced: bool,
+    namespace: str | None = None,
+    field_manager: str = DEFAULT_FIELD_MANAGER,
+    force: bool = False,
+) -> K8sModel:
+    """Create or update an object with a single server-side apply request (a PATCH
+    with the `application/apply-patch+yaml` content type).
+
+    Args:
+        k8s_client: The kubernetes API client
+        body: The object (a dict or a kubernetes.client model). Must have its
+            apiVersion, kind and metadata.name set
+        namespaced: True if the kind is a namespaced kind
+        namespace: The namespace of a namespaced object
+        field_manager: The field manager owning the applied fields
+        force: If True, take over the fields owned by other field managers
+            instead of failing with a conflict
+
+    Returns:
+        The applied object, as returned by the API server
+    """
+    body = k8s_client.sanitize_for_serialization(body)
+    return k8s_client.call_api(
+        **server_side_apply_request(
+            body,
+            namespaced=namespaced,
+            namespace=namespace,
+            field_manager=field_manager,
+            force=force,
+        ),
+        response_type=k8s_model_class(body["kind"]).__name__,
+    )
 
 
 delete_component_factory = functools.partial(k8s_crud_callable, op="delete")
@@ -166,7 +522,8 @@ patch_component_factory.__doc__ = k8s_crud_callable.__doc__
 
 
 def find_component_by_kind_name(
-    component: K8sModel | dict[str, Any], components_set: Iterable[K8sModel]
+    component: K8sModel | dict[str, Any] | Manifest,
+    components_set: Iterable[K8sModel],
 ) -> K8sModel | None:
     """search for a k8s component from a sequence of K8s objects
 
@@ -177,11 +534,8 @@ def find_component_by_kind_name(
     Returns:
 
     """
-    name, kind = (
-        (component["metadata"]["name"], component["kind"])
-        if isinstance(component, dict)
-        else (component.metadata.name, component.kind)
-    )
+    manifest = Manifest.of(component)
+    name, kind = manifest.name, manifest.kind
     for cmpnt in components_set:
         if cmpnt.kind == kind and cmpnt.metadata.name == name:
             return cmpnt
@@ -195,7 +549,8 @@ def delete_from_dict(
 
     Args:
         k8s_client: an ApiClient object, initialized with the client args.
-        data: A dictionary holding valid kubernetes objects
+        data: A dictionary holding valid kubernetes objects, or a kubernetes.client
+            model
         verbose: If True, print confirmation from the delete action.
                 Default is False.
         namespace: Contains the namespace to delete all
@@ -216,10 +571,11 @@ def delete_from_dict(
     api_exceptions = []
     k8s_objects = []
 
-    if not isinstance(data, dict):
-        data = cast(K8sModel, data).to_dict()
-    if "List" in data["kind"]:
-        kind = data["kind"].replace("List", "")
+    manifest = Manifest.of(data)
+    if "List" in manifest.kind:
+        # Only lists need their items, and so a dict of a model
+        data = manifest.body
+        kind = manifest.kind.replace("List", "")
         for yml_object in reversed(data["items"]):
             if kind != "":
                 yml_object["apiVersion"] = data["apiVersion"]
@@ -235,8 +591,14 @@ def delete_from_dict(
     else:
         # This is a single object. Call the single item method
         try:
-            deleted = delete_from_yaml_single_item(
-                k8s_client, data, verbose, namespace=namespace, **kwargs
+            deleted = _delete_single(
+                k8s_client,
+                api_version=cast(str, manifest.api_version),
+                kind=manifest.kind,
+                name=manifest.name,
+                namespace=manifest.namespace or namespace,
+                verbose=verbose,
+                **kwargs,
             )
             if deleted:
                 k8s_objects.append(deleted)
@@ -287,6 +649,38 @@ def delete_from_model(
     return k8s_objects
 
 
+def _delete_single(
+    k8s_client: ApiClient,
+    *,
+    api_version: str,
+    kind: str,
+    name: str,
+    namespace: str | None,
+    verbose=False,
+    **kwargs,
+):
+    target = crud_target(kind, "delete", api_version=api_version)
+    delete = getattr(k8s_api(k8s_client, target.api_class), target.method)
+    # Decide which namespace we are going to delete the object from, if any
+    if target.namespaced:
+        if namespace:
+            kwargs["namespace"] = namespace
+    else:
+        kwargs.pop("namespace", None)
+    try:
+        resp = delete(name=name, **kwargs)
+    except ApiException as ae:
+        if ae.status == 404:
+            return None
+        raise
+    if verbose:
+        msg = "{0} deleted.".format(kind)
+        if hasattr(resp, "status"):
+            msg += " status='{0}'".format(str(resp.status))
+        logger.info(msg)
+    return resp
+
+
 def delete_from_yaml_single_item(k8s_client, yml_object, verbose=False, **kwargs):
     """
 
@@ -303,98 +697,33 @@ def delete_from_yaml_single_item(k8s_client, yml_object, verbose=False, **kwargs
         the .status attribute of the exception is 404
     """
     try:
-        group, _, version = yml_object["apiVersion"].partition("/")
+        api_version: str = yml_object["apiVersion"]
     except TypeError as te:
         te.add_note(f"{yml_object=}")
         raise Exception("bad yaml") from te
-    if version == "":
-        version = group
-        group = "core"
-    # Take care for the case e.g. api_type is "apiextensions.k8s.io"
-    # Only replace the last instance
-    group = "".join(group.rsplit(".k8s.io", 1))
-    # convert group name from DNS subdomain format to
-    # python class name convention
-    group = "".join(word.capitalize() for word in group.split("."))
-    fcn_to_call = "{0}{1}Api".format(group, version.capitalize())
-    k8s_api = getattr(client, fcn_to_call)(k8s_client)
-    # Replace CamelCased action_type into snake_case
-    kind = yml_object["kind"]
-    kind = UPPER_FOLLOWED_BY_LOWER_RE.sub(r"\1_\2", kind)
-    kind = LOWER_OR_NUM_FOLLOWED_BY_UPPER_RE.sub(r"\1_\2", kind).lower()
-    # Expect the user to delete namespaced objects more often
-    try:
-        if hasattr(k8s_api, "delete_namespaced_{0}".format(kind)):
-            # Decide which namespace we are going to put the object in,
-            # if any
-            name = yml_object["metadata"]["name"]
-            if "namespace" in yml_object["metadata"]:
-                namespace = yml_object["metadata"]["namespace"]
-                kwargs["namespace"] = namespace
-
-            resp = getattr(k8s_api, "delete_namespaced_{0}".format(kind))(
-                name=name, **kwargs
-            )
-        else:
-            kwargs.pop("namespace")
-            name = yml_object["metadata"]["name"]
-            resp = getattr(k8s_api, "delete_{0}".format(kind))(name=name, **kwargs)
-    except ApiException as ae:
-        if ae.status == 404:
-            return None
-        raise
-    if verbose:
-        msg = "{0} deleted.".format(kind)
-        if hasattr(resp, "status"):
-            msg += " status='{0}'".format(str(resp.status))
-        logger.info(msg)
-    return resp
+    namespace = kwargs.pop("namespace", None)
+    return _delete_single(
+        k8s_client,
+        api_version=api_version,
+        kind=yml_object["kind"],
+        name=yml_object["metadata"]["name"],
+        namespace=yml_object["metadata"].get("namespace", namespace),
+        verbose=verbose,
+        **kwargs,
+    )
 
 
 def delete_single_model(k8s_client, yml_object, verbose=False, **kwargs):
-    group, _, version = yml_object.api_version.partition("/")
-    if version == "":
-        version = group
-        group = "core"
-    # Take care for the case e.g. api_type is "apiextensions.k8s.io"
-    # Only replace the last instance
-    group = "".join(group.rsplit(".k8s.io", 1))
-    # convert group name from DNS subdomain format to
-    # python class name convention
-    group = "".join(word.capitalize() for word in group.split("."))
-    fcn_to_call = "{0}{1}Api".format(group, version.capitalize())
-    k8s_api = getattr(client, fcn_to_call)(k8s_client)
-    # Replace CamelCased action_type into snake_case
-    kind = yml_object.kind
-    kind = UPPER_FOLLOWED_BY_LOWER_RE.sub(r"\1_\2", kind)
-    kind = LOWER_OR_NUM_FOLLOWED_BY_UPPER_RE.sub(r"\1_\2", kind).lower()
-    # Expect the user to delete namespaced objects more often
-    try:
-        if hasattr(k8s_api, "delete_namespaced_{0}".format(kind)):
-            # Decide which namespace we are going to put the object in,
-            # if any
-            name = yml_object.metadata.name
-            if hasattr(yml_object.metadata, "namespace"):
-                namespace = yml_object.metadata.namespace
-                kwargs["namespace"] = namespace
-
-            resp = getattr(k8s_api, "delete_namespaced_{0}".format(kind))(
-                name=name, **kwargs
-            )
-        else:
-            kwargs.pop("namespace")
-            name = yml_object.metadata.name
-            resp = getattr(k8s_api, "delete_{0}".format(kind))(name=name, **kwargs)
-    except ApiException as ae:
-        if ae.status == 404:
-            return None
-        raise
-    if verbose:
-        msg = "{0} deleted.".format(kind)
-        if hasattr(resp, "status"):
-            msg += " status='{0}'".format(str(resp.status))
-        logger.info(msg)
-    return resp
+    namespace = kwargs.pop("namespace", None)
+    return _delete_single(
+        k8s_client,
+        api_version=yml_object.api_version,
+        kind=yml_object.kind,
+        name=yml_object.metadata.name,
+        namespace=yml_object.metadata.namespace or namespace,
+        verbose=verbose,
+        **kwargs,
+    )
 
 
 def is_k8s_model(model: Any) -> bool:
@@ -0,0 +1,257 @@
+"""A minimal in-process Kubernetes API server for the unit tests: it stores the
+objects it is sent (create, read, list, patch, delete, delete collection),
+streams scripted watch events and records the requests, so that installers can
+be exercised against a real HTTP client.
+"""
+
+import copy
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from typing import Any, NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+type ObjectPath = tuple[str, str | None, str, str]
+"""The API group version path, namespace, resource and name of an object"""
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    content_type: str | None
+    query: dict[str, str]
+
+
+def _merge(target: dict, patch: dict) -> dict:
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+    return target
+
+
+def _split(path: str) -> tuple[str, str | None, str, str | None]:
+    parts = path.strip("/").split("/")
+    split = 2 if parts[0] == "api" else 3
+    group_version, rest = "/" + "/".join(parts[:split]), parts[split:]
+    namespace: str | None = None
+    if len(rest) >= 3 and rest[0] == "namespaces":
+        namespace, rest = rest[1], rest[2:]
+    return group_version, namespace, rest[0], (rest[1] if len(rest) > 1 else None)
+
+
+def _selected(obj: dict, label_selector: str | None) -> bool:
+    labels = obj["metadata"].get("labels") or {}
+    for term in filter(None, (label_selector or "").split(",")):
+        key, _, value = term.partition("=")
+        if labels.get(key) != value:
+            return False
+    return True
+
+
+class _Server(ThreadingHTTPServer):
+    # Installers open many connections at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FakeApiServer:
+    """Serves the objects of a namespace-aware store on localhost. Use as a context
+    manager; `url` is the host of the client configuration.
+    """
+
+    def __init__(self):
+        self.objects: dict[ObjectPath, dict[str, Any]] = {}
+        self.requests: list[Request] = []
+        self.watches: dict[str, list[list[dict[str, Any]]]] = {}
+        """The events of the successive watches of a collection, by collection path
+        (e.g. `/apis/apps/v1/namespaces/ns/deployments`). After its events, a
+        watch stays open until its timeoutSeconds. The last events are repeated."""
+        self.failures: dict[str, int] = {}
+        """The status codes of the writes to fail, by object path (e.g.
+        `/api/v1/namespaces/ns/configmaps/a`), creations included"""
+        self._closing = threading.Event()
+        self._lock = threading.Lock()
+        self._resource_version = count(1)
+        self._server = _Server(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeApiServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._closing.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def writes(self) -> list[Request]:
+        """The requests that changed the store"""
+        return [r for r in self.requests if r.method not in ("GET", "HEAD")]
+
+    def _key(self, path: str) -> ObjectPath:
+        group_version, namespace, resource, name = _split(path)
+        return group_version, namespace, resource, name or ""
+
+    def get(self, path: str) -> dict[str, Any]:
+        """An object by its API path, e.g. `/api/v1/namespaces/ns/configmaps/a`
+
+        Raises:
+            KeyError: If there is no such object
+        """
+        return self.objects[self._key(path)]
+
+    def __contains__(self, path: str) -> bool:
+        """Tell if there is an object at an API path"""
+        return self._key(path) in self.objects
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: Any):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _status(self, code: int, reason: str):
+                self._reply(
+                    code,
+                    {
+                        "kind": "Status",
+                        "apiVersion": "v1",
+                        "status": "Failure",
+                        "reason": reason,
+                        "code": code,
+                    },
+                )
+
+            def _handle(self):
+                url = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                content_type = self.headers.get("Content-Type")
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                with server._lock:
+                    server.requests.append(
+                        Request(self.command, url.path, content_type, query)
+                    )
+                    if (query.get("watch") or "").lower() != "true":
+                        return self._dispatch(url.path, query, content_type, body)
+                    scripts = server.watches.get(url.path) or [[]]
+                    events = scripts.pop(0) if len(scripts) > 1 else scripts[0]
+                self._watch(events, float(query.get("timeoutSeconds") or 60))
+
+            def _watch(self, events: list[dict[str, Any]], timeout: float):
+                # One chunk per event, as the API server does
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for event in events:
+                        data = f"{json.dumps(event)}\n".encode()
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    server._closing.wait(timeout)
+                    self.wfile.write(b"0\r\n\r\n")
+                except OSError:
+                    pass
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle
+
+            def _dispatch(self, path, query, content_type, body):
+                group_version, namespace, resource, name = _split(path)
+                key = (group_version, namespace, resource, name or "")
+                objects = server.objects
+
+                if name is None and self.command in ("GET", "DELETE"):
+                    selected = [
+                        k
+                        for k in sorted(objects)
+                        if k[0] == group_version
+                        and k[2] == resource
+                        and (namespace is None or k[1] == namespace)
+                        and _selected(objects[k], query.get("labelSelector"))
+                    ]
+                    items = [copy.deepcopy(objects[k]) for k in selected]
+                    if self.command == "DELETE":  # delete_collection
+                        for k in selected:
+                            del objects[k]
+                    if "PartialObjectMetadataList" in (self.headers["Accept"] or ""):
+                        items = [{"metadata": i["metadata"]} for i in items]
+                    return self._reply(
+                        200,
+                        {
+                            "kind": "List",
+                            "apiVersion": "v1",
+                            "metadata": {"resourceVersion": "1"},
+                            "items": items,
+                        },
+                    )
+                if self.command != "GET" and (
+                    code := server.failures.get(
+                        path
+                        if name or not body
+                        else f"{path}/{body['metadata']['name']}"
+                    )
+                ):
+                    return self._status(code, "Failure")
+                if name is None and self.command == "POST":
+                    key = (*key[:3], body["metadata"]["name"])
+                    if key in objects:
+                        return self._status(409, "AlreadyExists")
+                    return self._store(key, namespace, body, 201)
+
+                existing = objects.get(key)
+                if self.command == "GET":
+                    if existing is None:
+                        return self._status(404, "NotFound")
+                    return self._reply(200, existing)
+                if self.command == "DELETE":
+                    if objects.pop(key, None) is None:
+                        return self._status(404, "NotFound")
+                    return self._reply(200, {"kind": "Status", "status": "Success"})
+                if self.command == "PUT":
+                    if existing is None:
+                        return self._status(404, "NotFound")
+                    return self._store(key, namespace, body, 200)
+                # PATCH
+                if existing is None:
+                    if not (content_type or "").startswith("application/apply-patch"):
+                        return self._status(404, "NotFound")
+                    return self._store(key, namespace, body, 201)
+                return self._store(
+                    key, namespace, _merge(copy.deepcopy(existing), body), 200
+                )
+
+            def _store(self, key, namespace, obj, status: int):
+                obj = copy.deepcopy(obj)
+                metadata = obj.setdefault("metadata", {})
+                if namespace is not None:
+                    metadata["namespace"] = namespace
+                metadata["resourceVersion"] = str(next(server._resource_version))
+                server.objects[key] = obj
+                self._reply(status, obj)
+
+        return Handler
@@ -1,12 +1,191 @@
+import json
+import sys
+from types import SimpleNamespace
+
 from typer.testing import CliRunner
 
+from deploydocus.cli.loader import find_pkg_classes, load_module, load_releases
+from deploydocus.cli.main import app
+
 runner = CliRunner()
 
+_PKG_MODULE = """
+from deploydocus import AbstractK8sPkg, InstanceSettings
+
+
+class DemoSettings(InstanceSettings):
+    replicas: int = 1
+
+
+class DemoPkg(AbstractK8sPkg):
+    def render(self):
+        return [
+            {
+                "apiVersion": "v1",
+                "kind": "ConfigMap",
+                "metadata": {"name": self.instance_settings.instance_name},
+            }
+        ]
+"""
+
+
+def _write_pkg(tmp_path):
+    pkg_dir = tmp_path / "demopkg"
+    pkg_dir.mkdir()
+    (pkg_dir / "__init__.py").write_text(_PKG_MODULE)
+    (pkg_dir / "pkg.json").write_text(
+        json.dumps({"pkg_name": "demo", "pkg_version": "1.0"})
+    )
+    return pkg_dir
+
 
-def test_module_search():
+def test_module_search(tmp_path):
     """Test import of module by types (duck-type)
 
     Returns:
         None
     """
-    pass
+    module = load_module(filepath=_write_pkg(tmp_path))
+    pkg_class, settings_class = find_pkg_classes(module)
+    assert (pkg_class.__name__, settings_class.__name__) == ("DemoPkg", "DemoSettings")
+    assert load_module(filepath=tmp_path / "demopkg" / "__init__.py") is module
+
+
+def test_module_file_named_like_another_module(tmp_path):
+    (tmp_path / "json.py").write_text(_PKG_MODULE)
+    module = load_module(filepath=tmp_path / "json.py")
+    assert sys.modules["json"] is json
+    assert module.__name__.startswith("deploydocus_pkg_")
+    assert find_pkg_classes(module)[0].__name__ == "DemoPkg"
+
+
+def test_load_releases(tmp_path):
+    pkg_dir = _write_pkg(tmp_path)
+    releases_dir = tmp_path / "releases"
+    releases_dir.mkdir()
+    for name in ("b", "a"):
+        (releases_dir / f"{name}.json").write_text(
+            json.dumps({"instance_version": "1", "instance_namespace": name})
+        )
+    releases = load_releases(releases_dir, filepath=pkg_dir)
+    assert [(r.name, r.settings["instance_namespace"]) for r in releases] == [
+        ("a", "a"),
+        ("b", "b"),
+    ]
+
+    manifest = tmp_path / "releases.yaml"
+    manifest.write_text(
+        "releases:\n"
+        "- name: c\n"
+        "  filepath: demopkg\n"
+        "  settings_file: releases/a.json\n"
+        "  settings: {replicas: 3}\n"
+    )
+    (release,) = load_releases(manifest)
+    assert release.filepath == pkg_dir
+    assert release.settings == {
+        "instance_version": "1",
+        "instance_namespace": "a",
+        "replicas": 3,
+    }
+
+
+def test_recon_batch(tmp_path, monkeypatch):
+    pkg_dir = _write_pkg(tmp_path)
+    releases_dir = tmp_path / "releases"
+    releases_dir.mkdir()
+    for name in ("one", "two", "bad"):
+        settings = {"instance_version": "1", "instance_namespace": name}
+        if name == "bad":
+            settings["replicas"] = "many"
+        (releases_dir / f"{name}.json").write_text(json.dumps(settings))
+
+    reconciled = []
+
+    class FakeInstaller:
+        def upgrade_current_installation(self, pkg, create_allowed, **kwargs):
+            reconciled.append((pkg.pkg_name, pkg.instance_settings.instance_name))
+            return pkg.render()
+
+    class FakeClusterContext:
+        def __init__(self, **kwargs):
+            pass
+
+        def __enter__(self):
+            return SimpleNamespace(pkg_installer=FakeInstaller)
+
+        def __exit__(self, *args):
+            pass
+
+    monkeypatch.setattr("deploydocus.installer.ClusterContext", FakeClusterContext)
+    result = runner.invoke(
+        app,
+        [
+            "recon",
+            "--filepath",
+            str(pkg_dir),
+            "--releases",
+            str(releases_dir),
+            "--workers",
+            "2",
+        ],
+    )
+    assert result.exit_code == 1, result.output
+    assert sorted(reconciled) == [("demo", "one"), ("demo", "two")]
+    assert "3 release(s)" in result.output and "1 failed" in result.output
+
+
+def _installed(kind: str, namespace: str | None, name: str):
+    return SimpleNamespace(
+        kind=kind, metadata=SimpleNamespace(namespace=namespace, name=name)
+    )
+
+
+def test_reverse(monkeypatch):
+    found = [
+        _installed("Namespace", None, "a"),
+        _installed("ConfigMap", "a", "cm1"),
+        _installed("ConfigMap", "a", "cm2"),
+        _installed("Deployment", "b", "web"),
+    ]
+    calls = []
+
+    class FakeInstaller:
+        def find_installed(self, selectors, namespaces, **kwargs):
+            calls.append(("find", selectors, namespaces))
+            return found
+
+        def delete_installed(self, components, **kwargs):
+            calls.append(("delete", len(components)))
+            return components
+
+    class FakeClusterContext:
+        def __init__(self, **kwargs):
+            pass
+
+        def __enter__(self):
+            return SimpleNamespace(pkg_installer=FakeInstaller)
+
+        def __exit__(self, *args):
+            pass
+
+    monkeypatch.setattr("deploydocus.installer.ClusterContext", FakeClusterContext)
+    result = runner.invoke(app, ["reverse", "myapp", "--dry-run"])
+    assert result.exit_code == 0, result.output
+    assert calls == [
+        (
+            "find",
+            "app.kubernetes.io/instance=myapp,"
+            "app.kubernetes.io/managed-by=deploydocus.io",
+            None,
+        )
+    ]
+    assert "4 object(s) in 2 namespace(s) would be deleted" in result.output
+
+    calls.clear()
+    result = runner.invoke(
+        app, ["reverse", "myapp", "-n", "a", "-n", "b", "--pkg-name", "demo"]
+    )
+    assert result.exit_code == 0, result.output
+    assert calls[0][1].startswith("app.kubernetes.io/name=demo,")
+    assert calls[0][2] == ["a", "b"] and calls[1] == ("delete", 4)
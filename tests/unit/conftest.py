@@ -1,10 +1,13 @@
 from typing import Generator
 
 import pytest
+from kubernetes.client import ApiClient, Configuration
 from pydantic import AnyUrl
 
 from deploydocus.appstate.sources import GitRepo
 
+from .apiserver import FakeApiServer
+
 
 @pytest.fixture
 def helm_repo_charts() -> Generator[tuple[GitRepo, str, str], None, None]:
@@ -13,3 +16,15 @@ def helm_repo_charts() -> Generator[tuple[GitRepo, str, str], None, None]:
         "oci://registry-1.docker.io/bitnamicharts/mariadb",
         "https://owkin.github.io/charts/pypiserver",
     )
+
+
+@pytest.fixture
+def apiserver() -> Generator[FakeApiServer, None, None]:
+    with FakeApiServer() as server:
+        yield server
+
+
+@pytest.fixture
+def api_client(apiserver: FakeApiServer) -> Generator[ApiClient, None, None]:
+    with ApiClient(Configuration(host=apiserver.url)) as client:
+        yield client
@@ -0,0 +1,53 @@
+import asyncio
+
+from kubernetes_asyncio.client import ApiClient, Configuration
+
+from deploydocus.package.async_installer import AsyncPkgInstaller
+
+from .apiserver import FakeApiServer
+from .test_installer import _CONFIGMAPS, ConfigMapsPkg
+
+
+def _run(apiserver: FakeApiServer, test, **kwargs):
+    async def run():
+        client = ApiClient(Configuration(host=apiserver.url))
+        async with AsyncPkgInstaller(client, **kwargs) as installer:
+            return await test(installer)
+
+    return asyncio.run(run())
+
+
+def test_install_find_uninstall(apiserver: FakeApiServer):
+    pkg = ConfigMapsPkg({"a": "1", "b": "1"})
+
+    async def test(installer: AsyncPkgInstaller):
+        installed = await installer.install(pkg)
+        found = await installer.find_current_app_installations(pkg, metadata_only=True)
+        rendered_kinds = await installer.find_current_app_installations(
+            pkg, rendered_kinds_only=True
+        )
+        uninstalled = await installer.uninstall(pkg)
+        return installed, found, rendered_kinds, uninstalled
+
+    installed, found, rendered_kinds, uninstalled = _run(apiserver, test)
+    assert sorted(c.metadata.name for c in installed) == ["a", "b"]
+    assert (
+        [(c.kind, c.metadata.name) for c in found]
+        == [(c.kind, c.metadata.name) for c in rendered_kinds]
+        == [("ConfigMap", "a"), ("ConfigMap", "b")]
+    )
+    assert sorted(c.metadata.name for c in uninstalled) == ["a", "b"]
+    assert apiserver.objects == {}
+
+
+def test_server_side_apply(apiserver: FakeApiServer):
+    async def test(installer: AsyncPkgInstaller):
+        await installer.install(ConfigMapsPkg({"a": "1"}))
+        return await installer._install(ConfigMapsPkg({"a": "2"}).render()[0], "ns")
+
+    applied = _run(apiserver, test, server_side_apply=True)
+    assert applied.data == {"key": "2"}
+    assert apiserver.get(f"{_CONFIGMAPS}/a")["data"] == {"key": "2"}
+    assert [(r.method, r.content_type) for r in apiserver.writes()] == [
+        ("PATCH", "application/apply-patch+yaml; charset=utf-8"),
+    ] * 2
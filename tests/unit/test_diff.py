@@ -0,0 +1,74 @@
+from kubernetes.client import V1ConfigMap, V1ObjectMeta
+
+from deploydocus.package.diff import diff_manifests, spec_hash, with_spec_hash
+from deploydocus.package.manifest import Manifest
+
+
+def _configmap(name: str, value: str) -> dict:
+    return {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {"name": name},
+        "data": {"key": value},
+    }
+
+
+def _installed(manifest: dict) -> V1ConfigMap:
+    annotated = with_spec_hash(manifest)
+    return V1ConfigMap(
+        api_version="v1",
+        kind="ConfigMap",
+        metadata=V1ObjectMeta(
+            name=manifest["metadata"]["name"],
+            namespace="ns",
+            annotations=annotated["metadata"]["annotations"],
+        ),
+    )
+
+
+def test_spec_hash_ignores_server_fields():
+    manifest = _configmap("a", "1")
+    served = with_spec_hash(manifest)
+    served["metadata"].update(resourceVersion="42", uid="u")
+    served["status"] = {}
+    assert spec_hash(served) == spec_hash(manifest)
+    assert spec_hash(_configmap("a", "2")) != spec_hash(manifest)
+
+
+def test_diff_manifests():
+    installed = [
+        _installed(_configmap("same", "1")),
+        _installed(_configmap("changed", "1")),
+        _installed(_configmap("orphan", "1")),
+    ]
+    desired = [
+        _configmap("same", "1"),
+        _configmap("changed", "2"),
+        _configmap("new", "1"),
+    ]
+    diff = diff_manifests(
+        desired, installed, namespace="ns", is_namespaced=lambda kind: True
+    )
+    assert [c.name for c in diff.create] == ["new"]
+    assert [c.name for c in diff.patch] == ["changed"]
+    assert [c.metadata.name for c in diff.prune] == ["orphan"]
+    assert [c.metadata.name for c in diff.unchanged] == ["same"]
+
+
+def test_manifest_record():
+    manifest = _configmap("a", "1")
+    record = Manifest.of(manifest)
+    assert (record.kind, record.name, record.namespace) == ("ConfigMap", "a", None)
+    assert record.body is manifest
+    assert record.spec_hash == spec_hash(manifest)
+    assert record.with_spec_hash() == with_spec_hash(manifest)
+    assert Manifest.of(record) is record
+
+    model = Manifest.of(_installed(manifest))
+    assert (model.kind, model.name, model.namespace) == ("ConfigMap", "a", "ns")
+    assert model.key(namespace="default", is_namespaced=lambda kind: True) == (
+        "ConfigMap",
+        "ns",
+        "a",
+    )
+    assert model.body["metadata"]["name"] == "a"
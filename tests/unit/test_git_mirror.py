@@ -0,0 +1,47 @@
+import shutil
+import subprocess
+
+import pytest
+
+from deploydocus.appstate.sources import GitMirrorCache
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def _git(*args) -> str:
+    return subprocess.run(
+        ["git", *args], check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def _filter(path) -> str:
+    return subprocess.run(
+        ["git", "-C", path, "config", "remote.origin.partialclonefilter"],
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def test_partial_and_full_mirrors_are_separate(tmp_path):
+    work = tmp_path / "work"
+    _git("init", "-q", work)
+    (work / "chart").mkdir()
+    (work / "chart" / "Chart.yaml").write_text("name: chart\n")
+    _git("-C", work, "add", ".")
+    _git("-C", work, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "1")
+    _git("clone", "-q", "--bare", work, tmp_path / "repo.git")
+    _git("-C", tmp_path / "repo.git", "config", "uploadpack.allowFilter", "true")
+    url = f"file://{tmp_path / 'repo.git'}"
+    cache = GitMirrorCache(tmp_path / "cache")
+
+    cache.clone(url, tmp_path / "sparse", partial=True)
+    assert _filter(cache.mirror_path(url, partial=True)) == "blob:none"
+    assert _filter(tmp_path / "sparse") == "blob:none"
+    assert not cache.mirror_path(url).exists()
+
+    cache.clone(url, tmp_path / "full")
+    assert _filter(cache.mirror_path(url)) == _filter(tmp_path / "full") == ""
+
+    # Served by the full mirror from now on
+    cache.clone(url, tmp_path / "sparse2", partial=True)
+    assert _filter(tmp_path / "sparse2") == ""
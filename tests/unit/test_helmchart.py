@@ -1,4 +1,14 @@
-from deploydocus.appstate.helm3.helm import HelmRepoChart
+import io
+from pathlib import Path
+from typing import Any
+
+import pytest
+from plumbum import local
+
+from deploydocus.appstate import binutils
+from deploydocus.appstate.helm3.helm import HelmChartGitRepo, HelmRepoChart
+from deploydocus.appstate.helm3.helm_shell import HelmTemplateError, helm_template_iter
+from deploydocus.appstate.helm3.service import HelmService
 
 
 def test_helmchart_repo_oci(helm_repo_charts):
@@ -13,3 +23,64 @@ def test_helmchart_repo_https(helm_repo_charts):
     chart = HelmRepoChart(url=helm_repo_charts[2])
     assert str(chart.repo) == "https://owkin.github.io/charts", f"{chart.repo=}"
     assert str(chart.chart_name) == "pypiserver", f"{chart.chart_name=}"
+
+
+def _fake_helm(tmp_path: Path, script: str) -> Any:
+    helm = tmp_path / "helm"
+    helm.write_text(f"#!/bin/sh\n{script}\n")
+    helm.chmod(0o755)
+    return local[str(helm)]
+
+
+def test_helm_template_iter_streams(tmp_path):
+    # The second object is only written once the first one has been received
+    ready = tmp_path / "ready"
+    helm = _fake_helm(
+        tmp_path,
+        f"""echo "# $*"
+echo "kind: ConfigMap"
+echo "---"
+for i in $(seq 100); do [ -e {ready} ] && break; sleep 0.05; done
+[ -e {ready} ] || exit 1
+echo "kind: Secret"
+""",
+    )
+    tee = io.BytesIO()
+    objects = helm_template_iter("app", "chart", ["-n", "ns"], helm=helm, tee=tee)
+    assert next(objects) == {"kind": "ConfigMap"}
+    ready.touch()
+    assert list(objects) == [{"kind": "Secret"}]
+    assert tee.getvalue() == (
+        b"# template app chart -n ns\nkind: ConfigMap\n---\nkind: Secret\n"
+    )
+
+
+def test_helm_template_iter_error(tmp_path):
+    helm = _fake_helm(tmp_path, 'echo "kind: ConfigMap"; echo boom >&2; exit 1')
+    objects = helm_template_iter(None, "chart", [], helm=helm)
+    assert next(objects) == {"kind": "ConfigMap"}
+    with pytest.raises(HelmTemplateError, match="boom"):
+        next(objects)
+
+
+def test_helm_service_template_error(tmp_path):
+    class FakeHelmService(HelmService):
+        @property
+        def helm(self):
+            return _fake_helm(tmp_path, "echo boom >&2; exit 1")
+
+    with pytest.raises(HelmTemplateError, match="boom"):
+        FakeHelmService(tmp_path).template("app", "chart", [])
+
+
+def test_helmchart_git_repo_namespace(helm_repo_charts, tmp_path, monkeypatch):
+    helm = _fake_helm(tmp_path, 'echo "kind: ConfigMap"; echo "# $*"')
+    monkeypatch.setattr(binutils, "helm", helm, raising=False)
+    monkeypatch.setattr(HelmChartGitRepo, "_clone", lambda *args: None)
+    chart = HelmChartGitRepo(url=helm_repo_charts[0], relpath="app")
+
+    rendered = chart.render("app", namespace="ns", cache=False)
+    assert rendered.endswith(" -n ns\n"), rendered
+    assert list(chart.documents("app", namespace="ns", cache=False)) == [
+        {"kind": "ConfigMap"}
+    ]
@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import deploydocus
+
+# Cumulative import time budgets, in seconds
+IMPORT_BUDGET = 0.2
+CLI_IMPORT_BUDGET = 0.6
+
+_HEAVY_MODULES = ("kubernetes", "pydantic", "pydantic_settings", "plumbum", "yaml")
+
+
+def _import_times(module: str) -> tuple[float, set[str]]:
+    """Import a module in a new interpreter (with no helm nor kubectl on the PATH)
+
+    Returns:
+        The cumulative import time of the module and the modules imported
+    """
+    code = f"import sys, {module}; print(' '.join(sys.modules))"
+    env = {
+        **os.environ,
+        "PATH": os.defpath,
+        "PYTHONPATH": str(Path(deploydocus.__file__).parents[1]),
+    }
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    # The module and each of its parent packages are reported separately
+    parts = module.split(".")
+    packages = {".".join(parts[: i + 1]) for i in range(len(parts))}
+    cumulative_us = sum(
+        int(line.split("|")[1])
+        for line in proc.stderr.splitlines()
+        if line.split("|")[-1].strip() in packages
+    )
+    return cumulative_us / 1e6, set(proc.stdout.split())
+
+
+@pytest.mark.parametrize(
+    "module, budget",
+    [("deploydocus", IMPORT_BUDGET), ("deploydocus.cli.main", CLI_IMPORT_BUDGET)],
+)
+def test_import_time(module, budget):
+    seconds, modules = _import_times(module)
+    assert not modules.intersection(_HEAVY_MODULES), f"{module} imports them eagerly"
+    assert seconds < budget, f"import {module} took {seconds:.3f}s"
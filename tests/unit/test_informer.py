@@ -0,0 +1,124 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from kubernetes.client import ApiClient, V1ConfigMap, V1ListMeta, V1ObjectMeta
+from kubernetes.client.exceptions import ApiException  # type: ignore
+
+from deploydocus.package import informer as informer_module
+from deploydocus.package.informer import (
+    InformerCache,
+    ObjectStore,
+    parse_label_selector,
+)
+
+from .apiserver import FakeApiServer
+
+_SELECTOR = "app.kubernetes.io/managed-by=deploydocus.io"
+
+
+def _configmap(name: str, namespace: str = "ns", rv: str = "1", **labels):
+    return V1ConfigMap(
+        metadata=V1ObjectMeta(
+            name=name,
+            namespace=namespace,
+            resource_version=rv,
+            labels={"app.kubernetes.io/managed-by": "deploydocus.io", **labels},
+        )
+    )
+
+
+def _event(event_type: str, obj: V1ConfigMap) -> dict:
+    raw = ApiClient().sanitize_for_serialization(obj)
+    return {"type": event_type, "object": obj, "raw_object": raw}
+
+
+def test_object_store():
+    store = ObjectStore()
+    store.upsert(_configmap("a", app="web"))
+    store.upsert(_configmap("b", app="db"))
+    store.upsert(_configmap("c", namespace="other", app="web"))
+    assert [o.metadata.name for o in store.list(label_selector="app=web")] == [
+        "a",
+        "c",
+    ]
+    assert [o.metadata.name for o in store.list("ns", {"app": "web"})] == ["a"]
+
+    store.upsert(_configmap("a", app="db"))  # Relabelled
+    assert [o.metadata.name for o in store.list(label_selector="app=db")] == [
+        "a",
+        "b",
+    ]
+    store.delete(_configmap("b"))
+    assert store.get("ns", "b") is None and len(store) == 2
+    assert parse_label_selector("a=b, c==d") == {"a": "b", "c": "d"}
+    with pytest.raises(ValueError):
+        parse_label_selector("a!=b")
+
+
+def test_informer_relists_when_gone(monkeypatch):
+    lists = iter(
+        [
+            SimpleNamespace(
+                items=[_configmap("a")], metadata=V1ListMeta(resource_version="10")
+            ),
+            SimpleNamespace(
+                items=[_configmap("b", rv="20")],
+                metadata=V1ListMeta(resource_version="20"),
+            ),
+        ]
+    )
+    watches = iter(
+        [
+            [_event("ADDED", _configmap("c", rv="11")), ApiException(status=410)],
+            [
+                {
+                    "type": "BOOKMARK",
+                    "object": {},
+                    "raw_object": {"metadata": {"resourceVersion": "25"}},
+                },
+                _event("DELETED", _configmap("b", rv="26")),
+            ],
+        ]
+    )
+    cache: InformerCache
+
+    class FakeWatch:
+        def stream(self, fn, **kwargs):
+            assert kwargs["allow_watch_bookmarks"] and kwargs["label_selector"]
+            events = next(watches, None)
+            if events is None:
+                cache.stop()
+                return
+            for event in events:
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+
+        def stop(self):
+            pass
+
+    monkeypatch.setattr(informer_module.watch, "Watch", FakeWatch)
+    cache = InformerCache(ApiClient(), ["ConfigMap"], label_selector=_SELECTOR)
+    informer = cache.informers["ConfigMap"]
+    informer._list_fn = lambda **kwargs: next(lists)
+    informer.run()
+
+    assert informer.store.resource_version == "26"
+    assert informer.store.list() == []
+    assert cache.covers("ConfigMap", "ns", f"{_SELECTOR},app=web")
+    assert not cache.covers("ConfigMap", "ns", "app=web")
+    assert not cache.covers("Secret", "ns", _SELECTOR)
+
+
+def test_stop_ends_a_quiet_watch(apiserver: FakeApiServer, api_client):
+    cache = InformerCache(api_client, ["ConfigMap"], namespace="ns")
+    with cache:
+        assert cache.covers("ConfigMap", "ns")
+        # The watch stays open (quiet), until its timeoutSeconds
+        while not any(r.query.get("watch") for r in apiserver.requests):
+            time.sleep(0.01)
+        started = time.monotonic()
+    assert time.monotonic() - started < 5
+    thread = cache.informers["ConfigMap"]._thread
+    assert thread is not None and not thread.is_alive()
@@ -0,0 +1,285 @@
+import copy
+
+import pytest
+from kubernetes.client import V1ConfigMap
+from kubernetes.client.exceptions import ApiException  # type: ignore
+
+from deploydocus.package.diff import spec_hash
+from deploydocus.package.installer import PkgInstaller, _label_selector
+from deploydocus.package.kinds import (
+    UNKNOWN_KIND_RANK,
+    install_waves,
+    kind_rank,
+    register_kind,
+    sort_by_kind,
+    stream_waves,
+)
+from deploydocus.package.pkg import SPEC_HASH_ANNOTATION, AbstractK8sPkg
+from deploydocus.package.settings import InstanceSettings
+
+from .apiserver import FakeApiServer
+
+
+def _component(kind: str, name: str) -> dict:
+    return {"kind": kind, "metadata": {"name": name}}
+
+
+class ConfigMapsPkg(AbstractK8sPkg):
+    """A package of ConfigMaps, one per entry of `values`"""
+
+    def __init__(self, values: dict[str, str], pkg_version: str = "1"):
+        super().__init__(
+            InstanceSettings(
+                instance_name="app", instance_version="1", instance_namespace="ns"
+            ),
+            pkg_version=pkg_version,
+        )
+        self.values = values
+
+    def render(self):
+        return [
+            {
+                "apiVersion": "v1",
+                "kind": "ConfigMap",
+                "metadata": {"name": name, "labels": self.default_labels},
+                "data": {"key": value},
+            }
+            for name, value in self.values.items()
+        ]
+
+
+_CONFIGMAPS = "/api/v1/namespaces/ns/configmaps"
+
+
+def test_install_waves_ordering():
+    components = [
+        _component("Deployment", "d1"),
+        _component("ConfigMap", "c1"),
+        _component("Namespace", "ns"),
+        _component("Deployment", "d2"),
+        _component("ConfigMap", "c2"),
+    ]
+    waves = [
+        [(c["kind"], c["metadata"]["name"]) for c in wave]
+        for wave in install_waves(components)
+    ]
+    assert waves == [
+        [("Namespace", "ns")],
+        [("ConfigMap", "c1"), ("ConfigMap", "c2")],
+        [("Deployment", "d1"), ("Deployment", "d2")],
+    ], f"{waves=}"
+
+
+def test_stream_waves_flush_on_kind_change():
+    components = iter(
+        [
+            _component("Namespace", "ns"),
+            _component("ConfigMap", "c1"),
+            _component("ConfigMap", "c2"),
+            _component("Deployment", "d1"),
+            _component("ConfigMap", "late"),
+        ]
+    )
+    waves = [[c["metadata"]["name"] for c in wave] for wave in stream_waves(components)]
+    assert waves == [["ns"], ["c1", "c2"], ["d1"], ["late"]], f"{waves=}"
+
+
+def test_kind_rank_custom_kinds():
+    class WithCustomKinds(AbstractK8sPkg):
+        custom_kinds = ("Certificate",)
+
+        def render(self):
+            return []
+
+    register_kind("Issuer", after="CustomResourceDefinition")
+    components = [
+        {"kind": "Deployment"},
+        {"kind": "Mystery"},
+        {"kind": "Certificate"},
+        {"kind": "Namespace"},
+        {"kind": "Issuer"},
+        {"kind": "CustomResourceDefinition"},
+    ]
+    assert [c["kind"] for c in sort_by_kind(components)] == [
+        "Namespace",
+        "CustomResourceDefinition",
+        "Issuer",
+        "Deployment",
+        "Certificate",
+        "Mystery",
+    ]
+    assert kind_rank("Mystery") == UNKNOWN_KIND_RANK
+    assert register_kind("Namespace") == kind_rank("Namespace") == 0
+
+
+def test_upgrade_creates_patches_and_prunes(apiserver: FakeApiServer, api_client):
+    installer = PkgInstaller(api_client=api_client)
+    installer.install(ConfigMapsPkg({"same": "1", "changed": "1", "gone": "1"}))
+    apiserver.requests.clear()
+
+    pruned: list = []
+    upgraded = installer.upgrade_current_installation(
+        ConfigMapsPkg({"same": "1", "changed": "2", "new": "1"}), pruned=pruned
+    )
+    assert sorted(c.metadata.name for c in upgraded) == ["changed", "new"]
+    assert [c.metadata.name for c in pruned] == ["gone"]
+    assert sorted(r[:2] for r in apiserver.writes()) == [
+        ("DELETE", f"{_CONFIGMAPS}/gone"),
+        ("PATCH", f"{_CONFIGMAPS}/changed"),
+        ("POST", _CONFIGMAPS),
+    ]
+    assert apiserver.get(f"{_CONFIGMAPS}/changed")["data"] == {"key": "2"}
+    assert f"{_CONFIGMAPS}/gone" not in apiserver
+
+
+def test_spec_hash_skips_unchanged_writes(apiserver: FakeApiServer, api_client):
+    installer = PkgInstaller(api_client=api_client)
+    installed = ConfigMapsPkg({"a": "1"})
+    installer.install(installed)
+    annotations = apiserver.get(f"{_CONFIGMAPS}/a")["metadata"]["annotations"]
+    assert annotations[SPEC_HASH_ANNOTATION] == spec_hash(installed.render()[0])
+
+    apiserver.requests.clear()
+    installer._install(installed.render()[0], "ns")
+    installer.upgrade_current_installation(installed)
+    assert apiserver.writes() == []
+
+    installer._install(ConfigMapsPkg({"a": "2"}).render()[0], "ns")
+    assert [r[:2] for r in apiserver.writes()] == [("PATCH", f"{_CONFIGMAPS}/a")]
+
+
+def test_find_rendered_kinds_only(apiserver: FakeApiServer, api_client):
+    installer = PkgInstaller(api_client=api_client)
+    pkg = ConfigMapsPkg({"a": "1"})
+    installer.install(pkg)
+    apiserver.requests.clear()
+
+    found = installer.find_current_app_installations(
+        pkg, rendered_kinds_only=True, extra_kinds=["Secret", "Mystery"]
+    )
+    assert [(c.kind, c.metadata.name) for c in found] == [("ConfigMap", "a")]
+    assert sorted(r.path for r in apiserver.requests) == [
+        _CONFIGMAPS,
+        "/api/v1/namespaces/ns/secrets",
+    ]
+
+
+def test_server_side_apply(apiserver: FakeApiServer, api_client):
+    installer = PkgInstaller(api_client=api_client, server_side_apply=True)
+    applied = installer._install(ConfigMapsPkg({"a": "1"}).render()[0], "ns")
+    assert isinstance(applied, V1ConfigMap)
+    assert applied.data == {"key": "1"}
+    assert [r.method for r in apiserver.writes()] == ["PATCH"]
+
+
+def test_uninstall_concurrently(apiserver: FakeApiServer, api_client):
+    installer = PkgInstaller(api_client=api_client)
+    pkg = ConfigMapsPkg({"a": "1", "b": "1", "c": "1"})
+    installer.install(pkg)
+    apiserver.requests.clear()
+
+    uninstalled = installer.uninstall(
+        pkg, max_workers=3, propagation_policy="Foreground"
+    )
+    assert sorted(c.metadata.name for c in uninstalled) == ["a", "b", "c"]
+    assert apiserver.objects == {}
+    assert sorted((r.path, r.query) for r in apiserver.writes()) == [
+        (f"{_CONFIGMAPS}/{name}", {"propagationPolicy": "Foreground"})
+        for name in ["a", "b", "c"]
+    ]
+
+
+def test_uninstall_delete_collection(apiserver: FakeApiServer, api_client):
+    installer = PkgInstaller(api_client=api_client)
+    pkg = ConfigMapsPkg({"a": "1", "b": "1"})
+    installer.install(pkg)
+    apiserver.requests.clear()
+
+    uninstalled = installer.uninstall(
+        pkg, use_delete_collection=True, propagation_policy="Background"
+    )
+    assert sorted(c.metadata.name for c in uninstalled) == ["a", "b"]
+    assert apiserver.objects == {}
+    assert [(r.method, r.path, r.query) for r in apiserver.writes()] == [
+        (
+            "DELETE",
+            _CONFIGMAPS,
+            {
+                "labelSelector": _label_selector(pkg),
+                "propagationPolicy": "Background",
+            },
+        )
+    ]
+
+
+def test_uninstall_delete_collection_spares_owned_objects(
+    apiserver: FakeApiServer, api_client
+):
+    installer = PkgInstaller(api_client=api_client)
+    pkg = ConfigMapsPkg({"a": "1", "b": "1"})
+    installer.install(pkg)
+    # Selected by the package's labels, but owned by another object
+    owned = copy.deepcopy(apiserver.get(f"{_CONFIGMAPS}/a"))
+    owned["metadata"]["name"] = "owned"
+    owned["metadata"]["ownerReferences"] = [
+        {"apiVersion": "v1", "kind": "Pod", "name": "p", "uid": "1"}
+    ]
+    apiserver.objects[("/api/v1", "ns", "configmaps", "owned")] = owned
+    apiserver.requests.clear()
+
+    uninstalled = installer.uninstall(pkg, use_delete_collection=True)
+    assert sorted(c.metadata.name for c in uninstalled) == ["a", "b"]
+    assert sorted((r.method, r.path) for r in apiserver.writes()) == [
+        ("DELETE", f"{_CONFIGMAPS}/a"),
+        ("DELETE", f"{_CONFIGMAPS}/b"),
+    ]
+    assert f"{_CONFIGMAPS}/owned" in apiserver
+
+
+class SecretsAndConfigMapsPkg(ConfigMapsPkg):
+    """A Secret and a ConfigMap per entry of `values`: two waves"""
+
+    def render(self):
+        return [
+            {**c, "kind": "Secret", "data": {}} for c in super().render()
+        ] + super().render()
+
+
+_SECRETS = "/api/v1/namespaces/ns/secrets"
+
+
+def test_install_waves_concurrently(apiserver: FakeApiServer, api_client):
+    installer = PkgInstaller(api_client=api_client)
+    installed: list = []
+    installer.install(
+        SecretsAndConfigMapsPkg({"a": "1", "b": "1", "c": "1"}),
+        installed,
+        max_workers=4,
+    )
+    assert [(c.kind, c.metadata.name) for c in installed] == [
+        (kind, name) for kind in ["Secret", "ConfigMap"] for name in ["a", "b", "c"]
+    ]
+    assert sorted(k[2:] for k in apiserver.objects) == [
+        (resource, name)
+        for resource in ["configmaps", "secrets"]
+        for name in ["a", "b", "c"]
+    ]
+
+
+def test_install_failed_wave_stops_the_next_ones(apiserver: FakeApiServer, api_client):
+    apiserver.failures[f"{_SECRETS}/b"] = 422
+    installer = PkgInstaller(api_client=api_client)
+    installed: list = []
+    with pytest.raises(ApiException) as exc_info:
+        installer.install(
+            SecretsAndConfigMapsPkg({"a": "1", "b": "1", "c": "1"}),
+            installed,
+            max_workers=4,
+        )
+    assert exc_info.value.status == 422
+    # The rest of the failed wave is applied, the next waves are not
+    assert [(c.kind, c.metadata.name) for c in installed] == [
+        ("Secret", "a"),
+        ("Secret", "c"),
+    ]
+    assert not any(r.path.startswith(_CONFIGMAPS) for r in apiserver.writes())
@@ -0,0 +1,56 @@
+from kubernetes.client import V1ConfigMap, V1Namespace, V1ObjectMeta
+
+from deploydocus.package.inventory import Inventory, ReleaseKey, release_key
+
+
+def _labels(instance: str, pkg_name: str, pkg_version: str) -> dict[str, str]:
+    return {
+        "app.kubernetes.io/name": pkg_name,
+        "app.kubernetes.io/instance": instance,
+        "app.kubernetes.io/managed-by": "deploydocus.io",
+        "deploydocus-pkg": f"{pkg_name}-{pkg_version}",
+    }
+
+
+def _configmap(name: str, namespace: str, labels: dict[str, str]) -> V1ConfigMap:
+    return V1ConfigMap(
+        kind="ConfigMap",
+        metadata=V1ObjectMeta(name=name, namespace=namespace, labels=labels),
+    )
+
+
+def test_inventory():
+    web_v1 = _labels("web", "my-app", "1.0.0")
+    web_v2 = _labels("web", "my-app", "2.0.0")
+    db = _labels("db", "postgres", "15")
+    inventory = Inventory(
+        [
+            V1Namespace(kind="Namespace", metadata=V1ObjectMeta(name="a", labels=db)),
+            _configmap("web", "a", web_v1),
+            _configmap("web", "b", web_v2),
+            _configmap("web-extra", "b", web_v2),
+            _configmap("db", "a", db),
+            _configmap("stray", "a", {"app.kubernetes.io/managed-by": "x"}),
+        ]
+    )
+    assert [r.key for r in inventory.releases] == [
+        ReleaseKey("db", "postgres", "15"),
+        ReleaseKey("web", "my-app", "1.0.0"),
+        ReleaseKey("web", "my-app", "2.0.0"),
+    ]
+    (release,) = inventory.query(instance="web", namespace="b")
+    assert release.key.pkg_version == "2.0.0" and len(release.objects) == 2
+    assert [r.key.instance for r in inventory.query(namespace="a")] == ["db", "web"]
+    assert inventory.query(pkg_name="my-app", pkg_version="1.0.0")[0].namespaces == {
+        "a"
+    }
+    owner = inventory.owner("Namespace", None, "a")
+    assert owner is not None and owner.kinds == {"Namespace": 1, "ConfigMap": 1}
+    assert inventory.owner("ConfigMap", "a", "stray") is None
+
+
+def test_release_key_without_name_label():
+    cm = _configmap(
+        "x", "a", {"app.kubernetes.io/instance": "i", "deploydocus-pkg": "a-b-1.2"}
+    )
+    assert release_key(cm) == ReleaseKey("i", "a-b", "1.2")
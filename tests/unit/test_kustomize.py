@@ -0,0 +1,130 @@
+from pathlib import Path
+
+import pytest
+from plumbum import local
+
+from deploydocus.appstate import binutils
+from deploydocus.appstate.cache import RenderCache
+from deploydocus.appstate.kustomize import kustomize as kustomize_module
+from deploydocus.appstate.kustomize.kustomize import (
+    Kustomization,
+    KustomizeError,
+    _is_pinned,
+    _kustomization_dependencies,
+    _kustomization_tree,
+    _tree_digest,
+)
+
+
+def test_kustomization_dependencies(tmp_path):
+    overlay = tmp_path / "overlays" / "prod"
+    overlay.mkdir(parents=True)
+    (overlay / "kustomization.yaml").write_text(
+        "resources:\n"
+        "- ../../base\n"
+        "- deployment.yaml\n"
+        "- ../../common/configmap.yaml\n"
+        "- https://github.com/kubernetes-sigs/kustomize//examples/helloWorld\n"
+        "- ../../../outside\n"
+        "components:\n"
+        "- ../../components/tls\n"
+    )
+    dependencies = set(_kustomization_dependencies(tmp_path, Path("overlays/prod")))
+    assert dependencies == {
+        Path("base"),
+        Path("common"),
+        Path("components/tls"),
+    }, f"{dependencies=}"
+
+
+def test_kustomization_tree_digest(tmp_path):
+    overlay = tmp_path / "overlay"
+    overlay.mkdir()
+    (overlay / "kustomization.yaml").write_text(
+        "resources:\n"
+        "- ../base\n"
+        "- https://github.com/org/repo//deploy?ref=v1.0.0\n"
+        "- github.com/org/other//deploy\n"
+    )
+    base = tmp_path / "base"
+    base.mkdir()
+    (base / "kustomization.yaml").write_text("resources:\n- cm.yaml\n")
+    (base / "cm.yaml").write_text("kind: ConfigMap\n")
+    (tmp_path / "unrelated.yaml").write_text("kind: Secret\n")
+
+    dirs, remote = _kustomization_tree(tmp_path, Path("overlay"))
+    assert dirs == [Path("overlay"), Path("base")], f"{dirs=}"
+    assert [_is_pinned(r) for r in remote] == [True, False], f"{remote=}"
+
+    digest = _tree_digest(tmp_path, dirs)
+    (tmp_path / "unrelated.yaml").write_text("kind: Secret\ndata: {}\n")
+    assert _tree_digest(tmp_path, dirs) == digest
+    (base / "cm.yaml").write_text("kind: ConfigMap\ndata: {}\n")
+    assert _tree_digest(tmp_path, dirs) != digest
+
+
+def test_tree_digest_follows_bases_outside_the_root(tmp_path):
+    root = tmp_path / "overlay"
+    root.mkdir()
+    (root / "kustomization.yaml").write_text("resources:\n- ../base\n")
+    base = tmp_path / "base"
+    base.mkdir()
+    (base / "kustomization.yaml").write_text("resources:\n- cm.yaml\n")
+    (base / "cm.yaml").write_text("kind: ConfigMap\n")
+
+    dirs, _ = _kustomization_tree(root, Path("."))
+    assert dirs == [Path("."), Path("../base")], f"{dirs=}"
+    assert list(_kustomization_dependencies(root, Path("."))) == []
+
+    digest = _tree_digest(root, dirs)
+    (base / "cm.yaml").write_text("kind: ConfigMap\ndata: {}\n")
+    assert _tree_digest(root, dirs) != digest
+
+
+def test_documents_stream_and_cache(tmp_path, monkeypatch):
+    root = tmp_path / "app"
+    root.mkdir()
+    (root / "kustomization.yaml").write_text("resources:\n- cm.yaml\n")
+    (root / "cm.yaml").write_text("kind: ConfigMap\n")
+    # The second object is only written once the first one has been received
+    ready, builds = tmp_path / "ready", tmp_path / "builds"
+    kustomize = tmp_path / "kustomize"
+    kustomize.write_text(
+        f"""#!/bin/sh
+echo build >> {builds}
+echo "kind: ConfigMap"
+echo "---"
+for i in $(seq 100); do [ -e {ready} ] && break; sleep 0.05; done
+[ -e {ready} ] || exit 1
+echo "kind: Secret"
+"""
+    )
+    kustomize.chmod(0o755)
+    monkeypatch.setattr(
+        binutils, "kustomize_build", local[str(kustomize)], raising=False
+    )
+    monkeypatch.setattr(kustomize_module, "_kustomize_version", lambda: "v1")
+    kustomization = Kustomization(kustomization=root)
+    cache = RenderCache(tmp_path / "cache")
+
+    objects = kustomization.documents(cache=cache)
+    assert next(objects) == {"kind": "ConfigMap"}
+    ready.touch()
+    assert list(objects) == [{"kind": "Secret"}]
+    assert list(kustomization.documents(cache=cache)) == [
+        {"kind": "ConfigMap"},
+        {"kind": "Secret"},
+    ]
+    assert builds.read_text() == "build\n"
+
+
+def test_documents_error(tmp_path, monkeypatch):
+    (tmp_path / "kustomization.yaml").write_text("resources: []\n")
+    monkeypatch.setattr(
+        binutils,
+        "kustomize_build",
+        local["sh"]["-c", "echo boom >&2; exit 1"],
+        raising=False,
+    )
+    with pytest.raises(KustomizeError, match="boom"):
+        list(Kustomization(kustomization=tmp_path).documents(cache=False))
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+from kubernetes import client
+from kubernetes.client.exceptions import ApiException  # type: ignore
+
+from deploydocus.package.errors import ReadinessTimeout
+from deploydocus.package.readiness import is_ready, wait_until_ready
+
+from .apiserver import FakeApiServer
+
+
+def _deployment(desired: int, **status) -> client.V1Deployment:
+    return client.V1Deployment(
+        kind="Deployment",
+        metadata=client.V1ObjectMeta(name="d", generation=2),
+        spec=client.V1DeploymentSpec(
+            replicas=desired, selector=client.V1LabelSelector(), template={}
+        ),
+        status=client.V1DeploymentStatus(observed_generation=2, **status),
+    )
+
+
+def test_deployment_readiness():
+    assert is_ready(
+        _deployment(2, replicas=2, updated_replicas=2, available_replicas=2)
+    )
+    # Old replicas still around
+    assert not is_ready(
+        _deployment(2, replicas=3, updated_replicas=2, available_replicas=2)
+    )
+    assert not is_ready(
+        _deployment(2, replicas=2, updated_replicas=2, available_replicas=1)
+    )
+
+
+def test_kinds_without_rules_are_ready():
+    assert is_ready(client.V1ConfigMap(kind="ConfigMap"))
+
+
+_DEPLOYMENTS = "/apis/apps/v1/namespaces/ns/deployments"
+_JOBS = "/apis/batch/v1/namespaces/ns/jobs"
+
+
+def _event(event_type: str, obj) -> dict:
+    return {
+        "type": event_type,
+        "object": client.ApiClient().sanitize_for_serialization(obj),
+    }
+
+
+def _error(code: int) -> dict:
+    return {
+        "type": "ERROR",
+        "object": {"kind": "Status", "code": code, "reason": "", "message": ""},
+    }
+
+
+def _installed(kind: str, name: str):
+    return client.V1ConfigMap(kind=kind, metadata=client.V1ObjectMeta(name=name))
+
+
+def test_wait_until_ready_restarts_expired_watch(apiserver: FakeApiServer, api_client):
+    ready = _deployment(1, replicas=1, updated_replicas=1, available_replicas=1)
+    ready.metadata.resource_version = "7"
+    apiserver.watches[_DEPLOYMENTS] = [
+        [_event("ADDED", _deployment(1, replicas=1)), _error(410)],
+        [_event("MODIFIED", ready)],
+    ]
+    found = wait_until_ready(
+        api_client,
+        [_installed("Deployment", "d"), _installed("ConfigMap", "c")],
+        namespace="ns",
+        label_selector="app=a",
+        timeout=10,
+    )
+    assert [(f.kind, f.metadata.name) for f in found] == [("Deployment", "d")]
+    watches = [r.query for r in apiserver.requests if r.path == _DEPLOYMENTS]
+    assert len(watches) == 2 and all("resourceVersion" not in q for q in watches)
+    assert watches[0]["labelSelector"] == "app=a"
+
+
+def test_wait_until_ready_timeout(apiserver: FakeApiServer, api_client):
+    apiserver.watches[_DEPLOYMENTS] = [[_event("ADDED", _deployment(1))]]
+    with pytest.raises(ReadinessTimeout) as raised:
+        wait_until_ready(
+            api_client,
+            [_installed("Deployment", "d")],
+            namespace="ns",
+            label_selector="app=a",
+            timeout=1,
+        )
+    assert [c.metadata.name for c in raised.value.components_pending] == ["d"]
+
+
+def test_failed_watch_cancels_the_others(apiserver: FakeApiServer, api_client):
+    # The Deployment watch gets no events: it would last until the timeout
+    apiserver.watches[_JOBS] = [[_error(500)]]
+    start = time.monotonic()
+    with pytest.raises(ApiException) as raised:
+        wait_until_ready(
+            api_client,
+            [_installed("Deployment", "d"), _installed("Job", "j")],
+            namespace="ns",
+            label_selector="app=a",
+            timeout=30,
+        )
+    assert raised.value.status == 500
+    assert time.monotonic() - start < 5
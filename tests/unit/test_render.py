@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from deploydocus.appstate.render import render_all, stream_all
+
+
+def _rendered(*kinds: str):
+    def _render() -> str:
+        return "".join(
+            f"---\nkind: {kind}\nmetadata:\n  name: {kind.lower()}-{i}\n"
+            for i, kind in enumerate(kinds)
+        )
+
+    return _render
+
+
+def test_render_all_merges_in_kind_order():
+    objects = render_all(
+        [
+            _rendered("Deployment", "Unknown", "ConfigMap"),
+            _rendered("Namespace", "ConfigMap"),
+        ]
+    )
+    assert [o["metadata"]["name"] for o in objects] == [
+        "namespace-0",
+        "configmap-2",
+        "configmap-1",
+        "deployment-0",
+        "unknown-1",
+    ]
+
+
+def test_stream_all_renders_concurrently_in_source_order():
+    second_rendered = threading.Event()
+
+    def _first() -> str:
+        # Only completes if the second source is rendered meanwhile
+        assert second_rendered.wait(5)
+        return _rendered("Deployment")()
+
+    def _second() -> str:
+        second_rendered.set()
+        return _rendered("Namespace", "ConfigMap")()
+
+    objects = stream_all([_first, _second])
+    assert [o["metadata"]["name"] for o in objects] == [
+        "deployment-0",
+        "namespace-0",
+        "configmap-1",
+    ]
+
+
+def test_stream_all_raises_render_errors_in_order():
+    def _failed() -> str:
+        raise RuntimeError("render failed")
+
+    objects = stream_all([_rendered("ConfigMap"), _failed, _rendered("Secret")])
+    assert next(objects)["metadata"]["name"] == "configmap-0"
+    with pytest.raises(RuntimeError, match="render failed"):
+        next(objects)
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from deploydocus.appstate.cache import RenderCache, values_digests
+
+
+def test_render_cache_lru_eviction(tmp_path):
+    cache = RenderCache(tmp_path, max_bytes=10)
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    os.utime(tmp_path / "a.yaml", (0, 0))
+    os.utime(tmp_path / "b.yaml", (1, 1))
+    assert cache.get("a") == "12345"  # a is now the most recently used
+    cache.put("c", "12345")
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+    assert cache.get("c") == "12345"
+
+
+def test_values_digests_follow_file_content(tmp_path):
+    values = tmp_path / "values.yaml"
+    values.write_text("replicas: 1\n")
+    args = ["-f", str(values), "--set", "a=b"]
+    before = values_digests(args)
+    assert before == values_digests([f"--values={values}", "--set", "a=b"])
+    values.write_text("replicas: 2\n")
+    assert values_digests(args) != before
+
+
+def test_render_cache_writer_discards_failed_render(tmp_path):
+    cache = RenderCache(tmp_path)
+    with pytest.raises(RuntimeError):
+        with cache.writer("a") as f:
+            f.write(b"kind: ConfigMap\n")
+            raise RuntimeError
+    assert cache.get("a") is None
+    assert list(tmp_path.iterdir()) == []
+    with cache.writer("a") as f:
+        f.write(b"kind: ConfigMap\n")
+    assert cache.get("a") == "kind: ConfigMap\n"
@@ -0,0 +1,60 @@
+import gc
+import weakref
+
+import pytest
+from kubernetes.client import ApiClient, AppsV1Api, Configuration
+
+from deploydocus.package.utils import (
+    UnsupportedOperation,
+    crud_target,
+    k8s_api,
+    k8s_crud_callable,
+    k8s_resource_path,
+)
+
+
+@pytest.mark.parametrize(
+    "kind,namespaced,namespace,path",
+    [
+        ("ConfigMap", True, "ns", "/api/v1/namespaces/ns/configmaps"),
+        (
+            "NetworkPolicy",
+            True,
+            "ns",
+            "/apis/networking.k8s.io/v1/namespaces/ns/networkpolicies",
+        ),
+        ("Ingress", True, "ns", "/apis/networking.k8s.io/v1/namespaces/ns/ingresses"),
+        ("StorageClass", False, "ns", "/apis/storage.k8s.io/v1/storageclasses"),
+        ("Deployment", True, None, "/apis/apps/v1/deployments"),
+    ],
+)
+def test_k8s_resource_path(kind, namespaced, namespace, path):
+    assert k8s_resource_path(kind, namespaced=namespaced, namespace=namespace) == path
+
+
+def test_k8s_crud_callable_reuses_api_objects():
+    k8s_client = ApiClient(Configuration())
+    get_op, namespaced = k8s_crud_callable(
+        kind="Deployment", k8s_client=k8s_client, op="get"
+    )
+    list_op, _ = k8s_crud_callable(kind="Deployment", k8s_client=k8s_client, op="list")
+    assert get_op.__name__ == "read_namespaced_deployment" and namespaced
+    assert get_op.__self__ is list_op.__self__
+
+
+def test_k8s_api_does_not_keep_clients_alive():
+    for _ in range(5):
+        k8s_client = ApiClient(Configuration())
+        api = k8s_api(k8s_client, AppsV1Api)
+        assert k8s_api(k8s_client, AppsV1Api) is api
+        client_ref = weakref.ref(k8s_client)
+        del k8s_client, api
+        gc.collect()
+        assert client_ref() is None
+
+
+def test_crud_target_non_namespaced():
+    target = crud_target("ClusterRole", "delete")
+    assert target.method == "delete_cluster_role" and not target.namespaced
+    with pytest.raises(UnsupportedOperation):
+        crud_target("Namespace", "delete_collection")
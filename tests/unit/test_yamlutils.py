@@ -0,0 +1,10 @@
+import io
+
+from deploydocus.appstate.yamlutils import load_all
+
+
+def test_load_all_streams_documents():
+    stream = io.BytesIO(b"---\na: 1\n---\n---\n# comment only\n---\nb: 2\n")
+    documents = load_all(stream)
+    assert next(documents) == {"a": 1}
+    assert list(documents) == [{"b": 2}]